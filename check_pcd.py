@@ -1,10 +1,18 @@
 import open3d as o3d
 import os
+import sys
+import argparse
 import numpy as np
-import laspy
 import matplotlib.pyplot as plt
 
-def view_colored_point_cloud(file_path):
+# src/ klasörünü import yoluna ekle (ortak modüller için)
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "src")
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from common.point_cache import load_xyz
+
+def view_colored_point_cloud(file_path, build_cache=False):
     # 1. Dosya Kontrolü
     if not os.path.exists(file_path):
         print(f"HATA: Dosya bulunamadı -> {file_path}")
@@ -12,10 +20,9 @@ def view_colored_point_cloud(file_path):
 
     print(f"Dosya işleniyor: {file_path}")
     
-    # 2. LAZ Dosyasını Oku
+    # 2. LAZ Dosyasını Oku (sütunlu önbellek varsa LAZ çözülmez)
     try:
-        las = laspy.read(file_path)
-        points = np.vstack((las.x, las.y, las.z)).transpose()
+        points = load_xyz(file_path, build=build_cache)
         
         # Open3D Nesnesi Oluştur
         pcd = o3d.geometry.PointCloud()
@@ -65,8 +72,13 @@ def view_colored_point_cloud(file_path):
 
 if __name__ == "__main__":
     # Görüntülemek istediğin dosya
-
- 
     target_path = os.path.join("data", "processed", "RS000016_unity_scaled.laz")
-    
-    view_colored_point_cloud(target_path)
+
+    parser = argparse.ArgumentParser(description="Nokta bulutunu yüksekliğe göre renklendirip gösterir.")
+    parser.add_argument("path", nargs="?", default=target_path,
+                        help="LAS/LAZ/PCD dosyası veya .columns önbellek klasörü.")
+    parser.add_argument("--cache", action="store_true",
+                        help="Önbellek yoksa LAZ'ı bir kez çözüp '<ad>.columns' önbelleğini yaz.")
+    args = parser.parse_args()
+
+    view_colored_point_cloud(args.path, args.cache)
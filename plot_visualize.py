@@ -1,24 +1,42 @@
-import open3d as o3d
+import os
+import sys
+import argparse
 import numpy as np
 import plotly.graph_objects as go
 from matplotlib.colors import hsv_to_rgb
 
+# src/ klasörünü import yoluna ekle (ortak modüller için)
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "src")
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from common.spatial_index import tile_files, add_region_arguments, region_from_args
+from common.point_cache import with_cache
+from common.tile_loader import load_tiles
+
 TILES_DIR = "data/processed/tiles"
 
-def load_points(pattern):
-    import glob, os
-    all_points = []
-    for f in glob.glob(pattern):
-        pcd = o3d.io.read_point_cloud(f)
-        if not pcd.is_empty():
-            all_points.append(np.asarray(pcd.points))
-    if not all_points:
+def load_points(file_name, tiles_dir=TILES_DIR, region=None, index=None):
+    # region verilirse yalnızca bölgeye değen karolar okunur, noktalar kırpılır.
+    # Sütunlu önbellek varsa PCD yerine o okunur; dosyalar eşzamanlı okunur.
+    points = load_tiles(tile_files(tiles_dir, with_cache(file_name), region, index), region,
+                        desc=f"{file_name} yükleniyor")
+    if points is None:
         return np.empty((0,3))
-    return np.vstack(all_points)
+    return points
+
+parser = argparse.ArgumentParser(description="Ground / non-ground noktalarını Plotly ile görselleştirir.")
+parser.add_argument("--tiles_dir", default=TILES_DIR)
+add_region_arguments(parser)
+args = parser.parse_args()
+try:
+    region, index = region_from_args(args, args.tiles_dir)
+except ValueError as e:
+    parser.error(str(e))
 
 # Ground ve non-ground birleştir
-g = load_points(f"{TILES_DIR}/*/ground.pcd")
-ng = load_points(f"{TILES_DIR}/*/non_ground.pcd")
+g = load_points("ground.pcd", args.tiles_dir, region, index)
+ng = load_points("non_ground.pcd", args.tiles_dir, region, index)
 
 print(f"Ground: {len(g)} | Non-ground: {len(ng)}")
 
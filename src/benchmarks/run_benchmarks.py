@@ -0,0 +1,334 @@
+# src/benchmarks/run_benchmarks.py
+
+import os
+import sys
+import csv
+import json
+import time
+import shutil
+import platform
+import resource
+import argparse
+import subprocess
+from datetime import datetime, timezone
+
+# src/ klasörünü import yoluna ekle (ortak modüller için)
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from benchmarks.synthetic import write_synthetic_las
+
+# ----------------------------------------------------------------------
+# Aşama benchmark'ı: sentetik bulutlar üzerinde her aşamayı farklı boyut ve
+# worker sayılarıyla çalıştırır; süre, tepe bellek (RSS), nokta/sn ve yazılan
+# bayt miktarını JSON + CSV rapora yazar. Her ölçüm ayrı bir alt süreçte
+# yapılır (tepe RSS'ler birbirine karışmaz, import süresi ölçüme girmez).
+# İnternet gerektirmez; yalnızca repo bağımlılıkları yeterlidir.
+# ----------------------------------------------------------------------
+BENCH_DIR = os.path.join("data", "benchmarks")
+
+# --- AYARLAR ---
+DEFAULT_SIZES = [250_000, 1_000_000, 4_000_000]
+DEFAULT_DENSITIES = [20.0]
+DEFAULT_WORKERS = sorted({1, 2, 4, os.cpu_count() or 1})
+DEFAULT_SEED = 0
+
+# Aşamalar ve sırası: tiling aşamaları boyut başına bir kez (worker'dan bağımsız),
+# karo aşamaları her worker sayısı için aynı karolar üzerinde çalışır
+TILING_STAGES = ("tiling", "tiling_stream")
+TILE_STAGES = ("csf", "mesh", "heightmap")
+STAGES = TILING_STAGES + TILE_STAGES
+# Karo klasörleri dışına yazan aşamaların çıktı klasörleri (work_dir altında)
+STAGE_OUTPUT_DIRS = {"mesh": "meshes", "heightmap": "heightmaps"}
+# ground.las okuyan aşamalar: csf seçilmediyse önce bir kez (ölçülmeden) csf çalışır
+GROUND_STAGES = ("mesh", "heightmap")
+
+REPORT_FIELDS = [
+    "stage", "points", "density", "workers", "success", "wall_time_sec",
+    "points_per_sec", "peak_rss_mb", "peak_child_rss_mb", "bytes_written",
+    "tiles", "failed_tiles", "error"
+]
+
+
+def _dir_size(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+def _stage_output_bytes(stage, work_dir):
+    """
+    Aşamanın bu çalıştırmada yazdığı dosyaların toplam boyutu (yeniden
+    çalıştırmalarda dosyalar üzerine yazıldığı için fark değil, çıktı boyutu ölçülür).
+    """
+    tiles_dir = os.path.join(work_dir, "tiles")
+    if stage in TILING_STAGES:
+        return _dir_size(tiles_dir)
+    if stage == "csf":
+        return sum(os.path.getsize(os.path.join(tile, name))
+                   for tile in _tile_folders(tiles_dir)
+                   for name in ("ground.las", "non_ground.las")
+                   if os.path.exists(os.path.join(tile, name)))
+    return _dir_size(os.path.join(work_dir, STAGE_OUTPUT_DIRS[stage]))
+
+
+def _tile_folders(tiles_dir):
+    if not os.path.isdir(tiles_dir):
+        return []
+    return sorted(f.path for f in os.scandir(tiles_dir) if f.is_dir())
+
+
+def _failed_tiles(summary):
+    """
+    Hata fırlatan karolar + sonuç dict'inde success=False dönenler
+    (ör. mesh/heightmap'te "ground.las bulunamadı").
+    """
+    returned_failures = sum(1 for _, r in summary["succeeded"]
+                            if isinstance(r, dict) and r.get("success") is False)
+    return len(summary["failed"]) + returned_failures
+
+
+def _run_stage(stage, input_path, work_dir, workers):
+    """
+    Aşamayı bu süreçte çalıştırır. Dönüş: (karo sayısı, başarısız karo sayısı)
+    Modüller burada import edilir: eksik bir bağımlılık yalnızca ilgili aşamayı düşürür.
+    """
+    tiles_dir = os.path.join(work_dir, "tiles")
+    meshes_dir = os.path.join(work_dir, STAGE_OUTPUT_DIRS["mesh"])
+    heightmaps_dir = os.path.join(work_dir, STAGE_OUTPUT_DIRS["heightmap"])
+
+    if stage in TILING_STAGES:
+        from preprocessing.tiling import create_files_from_las, create_files_from_las_streaming
+        shutil.rmtree(tiles_dir, ignore_errors=True)
+        os.makedirs(tiles_dir)
+        if stage == "tiling":
+            create_files_from_las(input_path, tiles_dir, formats=("las",))
+        else:
+            create_files_from_las_streaming(input_path, tiles_dir, formats=("las",))
+        return len(_tile_folders(tiles_dir)), 0
+
+    tile_folders = _tile_folders(tiles_dir)
+    if stage == "csf":
+        from segmentation.csf_filter import apply_csf_parallel
+        summary = apply_csf_parallel(tile_folders, workers=workers)
+    elif stage == "mesh":
+        from meshing.delaunay import create_meshes_parallel
+        shutil.rmtree(meshes_dir, ignore_errors=True)
+        os.makedirs(meshes_dir)
+        summary = create_meshes_parallel(tile_folders, meshes_dir, workers=workers)
+    elif stage == "heightmap":
+        from meshing.heightmap import create_heightmaps_parallel
+        shutil.rmtree(heightmaps_dir, ignore_errors=True)
+        os.makedirs(heightmaps_dir)
+        summary = create_heightmaps_parallel(tile_folders, heightmaps_dir, workers=workers)
+    else:
+        raise ValueError(f"Bilinmeyen aşama: {stage}")
+    return summary["total"], _failed_tiles(summary)
+
+
+def run_child(stage, input_path, work_dir, workers):
+    """
+    Alt süreç giriş noktası: aşamayı çalıştırır, ölçümü stdout'a tek satır JSON yazar.
+    """
+    # Aşamanın kendi çıktıları (ilerleme çubukları vb.) stderr'e gitsin
+    real_stdout = sys.stdout
+    sys.stdout = sys.stderr
+
+    result = {"success": True, "error": None, "tiles": 0, "failed_tiles": 0}
+    start = time.perf_counter()
+    try:
+        result["tiles"], result["failed_tiles"] = _run_stage(stage, input_path, work_dir, workers)
+    except Exception as e:
+        result["success"] = False
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["wall_time_sec"] = time.perf_counter() - start
+
+    # Linux'ta ru_maxrss KB cinsindendir; çocuk değeri en büyük tek worker'ın tepesidir
+    result["peak_rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+    result["peak_child_rss_mb"] = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024.0
+    result["bytes_written"] = _stage_output_bytes(stage, work_dir)
+
+    sys.stdout = real_stdout
+    print(json.dumps(result))
+
+
+def measure(stage, input_path, work_dir, workers, n_points, density):
+    """
+    Aşamayı ayrı bir Python sürecinde çalıştırıp ölçüm kaydını döndürür.
+    """
+    cmd = [sys.executable, os.path.abspath(__file__), "--_child", stage,
+           "--_input", input_path, "--_work_dir", work_dir, "--_workers", str(workers)]
+    proc = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+
+    lines = proc.stdout.strip().splitlines()
+    try:
+        result = json.loads(lines[-1])
+    except (IndexError, ValueError):
+        result = {"success": False, "error": f"Alt süreç çıkış kodu {proc.returncode}",
+                  "wall_time_sec": None, "peak_rss_mb": None, "peak_child_rss_mb": None,
+                  "bytes_written": None, "tiles": 0, "failed_tiles": 0}
+
+    wall = result.get("wall_time_sec")
+    # Karosu düşen (veya hiç karo işlemeyen) ölçümün hızı anlamsızdır:
+    # üretilmeyen çıktı hızlı görünür
+    complete = result["success"] and result.get("tiles") and not result.get("failed_tiles")
+    result.update({
+        "stage": stage,
+        "points": n_points,
+        "density": density,
+        "workers": workers,
+        "points_per_sec": n_points / wall if complete and wall else None
+    })
+    return result
+
+
+def environment_info():
+    """
+    Raporu commit'ler arasında karşılaştırmak için ortam bilgisi.
+    """
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=SRC_DIR, capture_output=True,
+                                text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "git_commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds")
+    }
+
+
+def run_benchmarks(sizes=DEFAULT_SIZES, densities=DEFAULT_DENSITIES, workers_list=DEFAULT_WORKERS,
+                   stages=STAGES, seed=DEFAULT_SEED, bench_dir=BENCH_DIR):
+    """
+    Tüm (boyut, yoğunluk, aşama, worker) kombinasyonlarını ölçer ve raporu yazar.
+    Dönüş: rapor dict'i ({"environment", "results"})
+    """
+    cache_dir = os.path.join(bench_dir, "cache")
+    work_root = os.path.join(bench_dir, "work")
+    results = []
+
+    for n_points in sizes:
+        for density in densities:
+            input_path = os.path.join(cache_dir, f"synthetic_{n_points}_{density:g}_{seed}.las")
+            if not os.path.exists(input_path):
+                print(f"Sentetik bulut üretiliyor: {input_path}")
+                write_synthetic_las(input_path, n_points, density, seed)
+
+            work_dir = os.path.join(work_root, f"{n_points}_{density:g}")
+            shutil.rmtree(work_dir, ignore_errors=True)
+            os.makedirs(work_dir)
+
+            for stage in [s for s in stages if s in TILING_STAGES]:
+                results.append(measure(stage, input_path, work_dir, 1, n_points, density))
+                _print_result(results[-1])
+            # Karo aşamaları için karolar yoksa (tiling seçilmediyse) bir kez üret
+            if not _tile_folders(os.path.join(work_dir, "tiles")) and any(s in TILE_STAGES for s in stages):
+                _prepare("tiling", input_path, work_dir, n_points, density)
+            # mesh/heightmap ground.las ister; csf ölçülmüyorsa bir kez üret
+            if "csf" not in stages and any(s in GROUND_STAGES for s in stages):
+                _prepare("csf", input_path, work_dir, n_points, density)
+
+            for workers in workers_list:
+                # TILE_STAGES sırasıyla: csf, ground.las okuyan aşamalardan önce
+                for stage in [s for s in TILE_STAGES if s in stages]:
+                    results.append(measure(stage, input_path, work_dir, workers, n_points, density))
+                    _print_result(results[-1])
+
+    return {"environment": environment_info(), "results": results}
+
+
+def _prepare(stage, input_path, work_dir, n_points, density):
+    # Ölçülmeyen hazırlık çalıştırması; hatası sonraki aşamaların ölçümünde de görünür
+    result = measure(stage, input_path, work_dir, 1, n_points, density)
+    if result["points_per_sec"] is None:
+        print(f"Uyarı: hazırlık aşaması '{stage}' tamamlanamadı "
+              f"({result['error'] or str(result['failed_tiles']) + '/' + str(result['tiles']) + ' karo başarısız'}).")
+
+
+def _print_result(r):
+    if r["success"] and r["points_per_sec"] is None:
+        print(f"  {r['stage']:<14} {r['points']:>10} nokta  workers={r['workers']:<3} "
+              f"EKSİK: {r['failed_tiles']}/{r['tiles']} karo başarısız")
+    elif r["success"]:
+        print(f"  {r['stage']:<14} {r['points']:>10} nokta  workers={r['workers']:<3} "
+              f"{r['wall_time_sec']:8.2f} sn  {r['points_per_sec'] or 0:12.0f} nokta/sn  "
+              f"RSS {r['peak_rss_mb']:.0f}/{r['peak_child_rss_mb']:.0f} MB  "
+              f"{r['bytes_written'] / 1e6:.1f} MB yazıldı")
+    else:
+        print(f"  {r['stage']:<14} {r['points']:>10} nokta  workers={r['workers']:<3} HATA: {r['error']}")
+
+
+def write_report(report, output_dir):
+    """
+    Raporu report.json ve report.csv olarak yazar; yolları döndürür.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    json_path = os.path.join(output_dir, "report.json")
+    csv_path = os.path.join(output_dir, "report.csv")
+    with open(json_path, "w") as f:
+        json.dump(report, f, indent=4)
+    with open(csv_path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=REPORT_FIELDS, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(report["results"])
+    return json_path, csv_path
+
+
+def compare_reports(baseline, current):
+    """
+    İki raporu (stage, points, density, workers) anahtarıyla eşleyip süre oranlarını yazdırır.
+    oran < 1: mevcut commit daha hızlı.
+    """
+    def index(report):
+        return {(r["stage"], r["points"], r["density"], r["workers"]): r
+                for r in report["results"] if r["points_per_sec"] is not None}
+
+    base, cur = index(baseline), index(current)
+    print(f"\nKarşılaştırma: {baseline['environment'].get('git_commit')} -> {current['environment'].get('git_commit')}")
+    for key in sorted(base.keys() & cur.keys()):
+        ratio = cur[key]["wall_time_sec"] / base[key]["wall_time_sec"]
+        stage, points, density, workers = key
+        print(f"  {stage:<14} {points:>10} nokta  workers={workers:<3} "
+              f"{base[key]['wall_time_sec']:8.2f} -> {cur[key]['wall_time_sec']:8.2f} sn  (x{ratio:.2f})")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Sentetik bulutlarla pipeline aşamalarını ölçer (çevrimdışı).")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Nokta sayıları.")
+    parser.add_argument("--densities", type=float, nargs="+", default=DEFAULT_DENSITIES, help="Nokta / m².")
+    parser.add_argument("--workers", type=int, nargs="+", default=DEFAULT_WORKERS)
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=list(STAGES))
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--bench_dir", default=BENCH_DIR)
+    parser.add_argument("--output", default=None,
+                        help="Rapor klasörü (varsayılan: <bench_dir>/reports/<zaman>).")
+    parser.add_argument("--compare", default=None, help="Karşılaştırılacak önceki report.json.")
+    # Alt süreç modu (measure() tarafından kullanılır)
+    parser.add_argument("--_child", choices=STAGES, help=argparse.SUPPRESS)
+    parser.add_argument("--_input", help=argparse.SUPPRESS)
+    parser.add_argument("--_work_dir", help=argparse.SUPPRESS)
+    parser.add_argument("--_workers", type=int, default=1, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args._child:
+        run_child(args._child, args._input, args._work_dir, args._workers)
+    else:
+        report = run_benchmarks(args.sizes, args.densities, args.workers, args.stages,
+                                args.seed, args.bench_dir)
+        output_dir = args.output or os.path.join(
+            args.bench_dir, "reports", datetime.now().strftime("%Y%m%d_%H%M%S"))
+        json_path, csv_path = write_report(report, output_dir)
+        print(f"\nRapor yazıldı: {json_path}, {csv_path}")
+
+        if args.compare:
+            with open(args.compare, "r") as f:
+                compare_reports(json.load(f), report)
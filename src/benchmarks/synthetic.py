@@ -0,0 +1,150 @@
+# src/benchmarks/synthetic.py
+
+import os
+import argparse
+import numpy as np
+import laspy
+
+# ----------------------------------------------------------------------
+# Benchmark'lar için sentetik (tohumlu, tekrarlanabilir) LiDAR bulutu:
+#   - Arazi: yumuşak tepeler + eğim + gürültü (tek dönüş)
+#   - Binalar: düz çatılı dikdörtgen bloklar (altlarında zemin noktası yok)
+#   - Bitki örtüsü: kubbe tepeli ağaçlar; tepe noktaları ilk dönüş, bir kısmının
+#     altındaki zeminde son dönüşü var (CSF'in "last/first" ayrımı çalışsın diye)
+# Koordinatlar metre ve yerel (merkezlenmiş) — tiling.py'nin beklediği girdi.
+# ----------------------------------------------------------------------
+GROUND_FRACTION = 0.65
+BUILDING_FRACTION = 0.15
+VEGETATION_FRACTION = 0.20
+# Bitki noktalarının ne kadarının altında zemine ulaşan son dönüş var
+VEGETATION_PENETRATION = 0.5
+
+BUILDING_AREA_PER = 2500.0   # m² başına bir bina (~50 x 50 m'de bir)
+TREE_AREA_PER = 400.0        # m² başına bir ağaç
+
+OUTPUT_POINT_FORMAT = 6
+OUTPUT_SCALE = 0.01
+
+
+def terrain_height(x, y):
+    return 5.0 * np.sin(x / 60.0) + 3.0 * np.cos(y / 45.0) + 0.02 * x
+
+
+def _inside_any(x, y, boxes):
+    """
+    (x, y) noktalarından herhangi bir bina tabanına düşenlerin maskesi.
+    """
+    inside = np.zeros(len(x), dtype=bool)
+    for x0, y0, x1, y1 in boxes:
+        inside |= (x >= x0) & (x < x1) & (y >= y0) & (y < y1)
+    return inside
+
+
+def generate_synthetic_cloud(n_points, density=20.0, seed=0):
+    """
+    n_points noktalık, yaklaşık 'density' nokta/m² yoğunluklu kare bir alan üretir.
+    Dönüş: x, y, z, return_number, number_of_returns, intensity dizilerini içeren dict.
+    """
+    rng = np.random.default_rng(seed)
+    side = float(np.sqrt(n_points / density))
+    half = side / 2.0
+
+    n_building = int(n_points * BUILDING_FRACTION)
+    n_vegetation = int(n_points * VEGETATION_FRACTION)
+    n_penetration = int(n_vegetation * VEGETATION_PENETRATION)
+    n_ground = n_points - n_building - n_vegetation - n_penetration
+
+    # Binalar
+    n_boxes = max(1, int(side * side / BUILDING_AREA_PER))
+    centers = rng.uniform(-half, half, (n_boxes, 2))
+    sizes = rng.uniform(8.0, 30.0, (n_boxes, 2))
+    heights = rng.uniform(4.0, 25.0, n_boxes)
+    boxes = np.column_stack((centers - sizes / 2, centers + sizes / 2))
+
+    # Zemin (bina tabanları hariç): fazladan örnekle, ele, ilk n_ground'u al
+    gx, gy = np.empty(0), np.empty(0)
+    while len(gx) < n_ground:
+        cx = rng.uniform(-half, half, int(n_ground * 1.3) + 16)
+        cy = rng.uniform(-half, half, len(cx))
+        keep = ~_inside_any(cx, cy, boxes)
+        gx, gy = np.concatenate((gx, cx[keep])), np.concatenate((gy, cy[keep]))
+    gx, gy = gx[:n_ground], gy[:n_ground]
+    gz = terrain_height(gx, gy) + rng.normal(0.0, 0.03, n_ground)
+
+    # Çatılar (alanla orantılı bina seçimi)
+    area = sizes[:, 0] * sizes[:, 1]
+    which = rng.choice(n_boxes, n_building, p=area / area.sum())
+    bx = boxes[which, 0] + rng.random(n_building) * sizes[which, 0]
+    by = boxes[which, 1] + rng.random(n_building) * sizes[which, 1]
+    bz = terrain_height(centers[which, 0], centers[which, 1]) + heights[which] + rng.normal(0.0, 0.02, n_building)
+
+    # Ağaçlar: kubbe profilli taç
+    n_trees = max(1, int(side * side / TREE_AREA_PER))
+    tree_xy = rng.uniform(-half, half, (n_trees, 2))
+    crown_r = rng.uniform(2.0, 6.0, n_trees)
+    tree_h = rng.uniform(5.0, 15.0, n_trees)
+    which = rng.integers(0, n_trees, n_vegetation)
+    r = crown_r[which] * np.sqrt(rng.random(n_vegetation))
+    theta = rng.uniform(0.0, 2 * np.pi, n_vegetation)
+    vx = tree_xy[which, 0] + r * np.cos(theta)
+    vy = tree_xy[which, 1] + r * np.sin(theta)
+    profile = 1.0 - (r / crown_r[which]) ** 2
+    vz = terrain_height(vx, vy) + tree_h[which] * (0.6 + 0.4 * profile) + rng.normal(0.0, 0.3, n_vegetation)
+
+    # Taçtan geçip zemine ulaşan son dönüşler
+    px, py = vx[:n_penetration], vy[:n_penetration]
+    pz = terrain_height(px, py) + rng.normal(0.0, 0.03, n_penetration)
+
+    x = np.concatenate((gx, bx, vx, px))
+    y = np.concatenate((gy, by, vy, py))
+    z = np.concatenate((gz, bz, vz, pz))
+
+    return_number = np.ones(n_points, dtype=np.uint8)
+    number_of_returns = np.ones(n_points, dtype=np.uint8)
+    veg_start = n_ground + n_building
+    number_of_returns[veg_start:veg_start + n_penetration] = 2
+    return_number[veg_start + n_vegetation:] = 2
+    number_of_returns[veg_start + n_vegetation:] = 2
+
+    # Dosya içi sıra rastgele olsun (gerçek uçuş hatlarına benzer şekilde karışık)
+    order = rng.permutation(n_points)
+    intensity = rng.integers(0, 65535, n_points, dtype=np.uint16)
+    return {
+        "x": x[order], "y": y[order], "z": z[order],
+        "return_number": return_number[order],
+        "number_of_returns": number_of_returns[order],
+        "intensity": intensity
+    }
+
+
+def write_synthetic_las(path, n_points, density=20.0, seed=0):
+    """
+    Sentetik bulutu LAS olarak yazar ve yolu döndürür.
+    """
+    cloud = generate_synthetic_cloud(n_points, density, seed)
+    header = laspy.LasHeader(point_format=OUTPUT_POINT_FORMAT, version="1.4")
+    header.scales = np.array([OUTPUT_SCALE] * 3)
+    header.offsets = np.zeros(3)
+
+    las = laspy.LasData(header)
+    las.x, las.y, las.z = cloud["x"], cloud["y"], cloud["z"]
+    las.return_number = cloud["return_number"]
+    las.number_of_returns = cloud["number_of_returns"]
+    las.intensity = cloud["intensity"]
+    las.classification = np.ones(n_points, dtype=np.uint8)
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    las.write(path)
+    return path
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark için tohumlu sentetik LAS bulutu üretir.")
+    parser.add_argument("output", help="Yazılacak .las dosyası.")
+    parser.add_argument("--points", type=int, default=1_000_000)
+    parser.add_argument("--density", type=float, default=20.0, help="Nokta / m².")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    write_synthetic_las(args.output, args.points, args.density, args.seed)
+    print(f"Yazıldı: {args.output} ({args.points} nokta)")
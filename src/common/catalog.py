@@ -0,0 +1,399 @@
+# src/common/catalog.py
+
+import os
+import sys
+import json
+import sqlite3
+import argparse
+from contextlib import contextmanager, closing
+from datetime import datetime, timezone
+
+# ----------------------------------------------------------------------
+# Karo kataloğu: tüm karoların metadata'sı tek bir SQLite dosyasında
+# ('<tiles_dir>/catalog.sqlite', WAL modu).
+#   - Sınırlar, ızgara indeksi, durum ve sayılar sütun olarak tutulur
+#     (bbox ve durum sorguları tek SQL sorgusu); metadata'nın tamamı
+#     (parametreler, dosya yolları, aşama kayıtları) JSON sütununda durur.
+#   - Aşamalar metadata'yı update_tile_metadata ile tek bir işlem (transaction)
+#     içinde oku-değiştir-yaz şeklinde günceller; paralel worker'lar birbirinin
+#     yazdığını ezmez.
+#   - Unity metadata.json okuduğu için her güncellemede dosya da yazılır
+#     (EXPORT_JSON); kapatılırsa toplu dışa aktarım: catalog.py --export_json
+#   - Katalog yoksa (eski çıktılar) her şey yalnızca metadata.json ile çalışır.
+# ----------------------------------------------------------------------
+CATALOG_FILENAME = "catalog.sqlite"
+METADATA_FILENAME = "metadata.json"
+EXPORT_JSON = True
+BUSY_TIMEOUT_SEC = 60.0
+
+# processing_status değerleri, ilerleme sırasıyla (metadata'da durum yoksa "tiled")
+STATUS_ORDER = ("tiled", "segmented", "meshed")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tiles (
+    tile_name      TEXT PRIMARY KEY,
+    grid_i         INTEGER,
+    grid_j         INTEGER,
+    x_min          REAL,
+    y_min          REAL,
+    x_max          REAL,
+    y_max          REAL,
+    status         TEXT NOT NULL,
+    point_count    INTEGER,
+    ground_count   INTEGER,
+    vertex_count   INTEGER,
+    triangle_count INTEGER,
+    metadata       TEXT NOT NULL,
+    updated_at     TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS tiles_status ON tiles (status);
+CREATE INDEX IF NOT EXISTS tiles_grid ON tiles (grid_i, grid_j);
+CREATE INDEX IF NOT EXISTS tiles_bounds ON tiles (x_min, y_min);
+"""
+
+# SQLite R*Tree modülüyle derlenmişse bbox sorguları bu indeksi kullanır
+RTREE_SCHEMA = "CREATE VIRTUAL TABLE IF NOT EXISTS tiles_rtree USING rtree(id, x_min, x_max, y_min, y_max)"
+
+COLUMNS = ("tile_name", "grid_i", "grid_j", "x_min", "y_min", "x_max", "y_max", "status",
+           "point_count", "ground_count", "vertex_count", "triangle_count", "metadata", "updated_at")
+
+
+def catalog_path(tiles_dir):
+    return os.path.join(tiles_dir, CATALOG_FILENAME)
+
+
+def _tile_location(tile_directory):
+    # (karoların kök klasörü, karo adı)
+    tile_directory = os.path.normpath(tile_directory)
+    return os.path.dirname(tile_directory), os.path.basename(tile_directory)
+
+
+def connect(tiles_dir, create=False):
+    """
+    Kataloğa bağlanır. create=False iken katalog dosyası yoksa None döner.
+    Bağlantı autocommit modundadır; yazma işlemleri transaction() ile yapılır.
+    """
+    path = catalog_path(tiles_dir)
+    if not create and not os.path.exists(path):
+        return None
+    conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT_SEC, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA synchronous=NORMAL")
+    if create:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(SCHEMA)
+        try:
+            conn.execute(RTREE_SCHEMA)
+        except sqlite3.OperationalError:
+            pass
+    return conn
+
+
+def init_catalog(tiles_dir):
+    """
+    Kataloğu (yoksa) oluşturur. Paralel worker'lar başlamadan ana süreçte
+    çağrılır; şema oluşturma yarışı olmaz.
+    """
+    os.makedirs(tiles_dir, exist_ok=True)
+    connect(tiles_dir, create=True).close()
+    return catalog_path(tiles_dir)
+
+
+def _has_rtree(conn):
+    row = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'tiles_rtree'").fetchone()
+    return row is not None
+
+
+@contextmanager
+def transaction(conn):
+    """
+    BEGIN IMMEDIATE: yazma kilidi baştan alınır, böylece oku-değiştir-yaz
+    sırasında başka bir süreç araya giremez (bekler, busy timeout).
+    """
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+
+def _row_values(tile_name, metadata):
+    local = metadata.get("bounds", {}).get("local", {})
+    grid = metadata.get("grid_index", {})
+    counts = metadata.get("point_counts", {})
+    mesh = metadata.get("mesh_info", {})
+    return (
+        tile_name, grid.get("i"), grid.get("j"),
+        local.get("x_min"), local.get("y_min"), local.get("x_max"), local.get("y_max"),
+        metadata.get("processing_status", STATUS_ORDER[0]),
+        counts.get("raw", metadata.get("point_count")), counts.get("ground"),
+        mesh.get("vertex_count"), mesh.get("triangle_count"),
+        json.dumps(metadata),
+        datetime.now(timezone.utc).isoformat(timespec="seconds")
+    )
+
+
+def _put(conn, tile_name, metadata):
+    values = _row_values(tile_name, metadata)
+    updates = ", ".join(f"{c} = excluded.{c}" for c in COLUMNS[1:])
+    # ON CONFLICT ... DO UPDATE rowid'i korur (R*Tree kaydı aynı satırı gösterir)
+    conn.execute(
+        f"INSERT INTO tiles ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))}) "
+        f"ON CONFLICT (tile_name) DO UPDATE SET {updates}",
+        values
+    )
+    x_min, y_min, x_max, y_max = values[3:7]
+    if _has_rtree(conn) and None not in (x_min, y_min, x_max, y_max):
+        rowid = conn.execute("SELECT rowid FROM tiles WHERE tile_name = ?", (tile_name,)).fetchone()[0]
+        conn.execute("INSERT OR REPLACE INTO tiles_rtree VALUES (?, ?, ?, ?, ?)",
+                     (rowid, x_min, x_max, y_min, y_max))
+
+
+def _get(conn, tile_name):
+    row = conn.execute("SELECT metadata FROM tiles WHERE tile_name = ?", (tile_name,)).fetchone()
+    return json.loads(row[0]) if row else None
+
+
+def read_metadata_json(tile_directory):
+    metadata_path = os.path.join(tile_directory, METADATA_FILENAME)
+    if not os.path.exists(metadata_path):
+        return None
+    try:
+        with open(metadata_path, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_metadata_json(tile_directory, metadata):
+    """
+    metadata.json'u geçici dosya + os.replace ile yazar (yarım kalmış dosya okunmaz).
+    """
+    metadata_path = os.path.join(tile_directory, METADATA_FILENAME)
+    tmp_path = metadata_path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(metadata, f, indent=4)
+    os.replace(tmp_path, metadata_path)
+
+
+def catalog_metadata(tile_directory):
+    """
+    Karonun metadata'sını katalogdan okur; katalog veya kayıt yoksa None.
+    """
+    tiles_dir, tile_name = _tile_location(tile_directory)
+    conn = connect(tiles_dir)
+    if conn is None:
+        return None
+    with closing(conn):
+        try:
+            return _get(conn, tile_name)
+        except sqlite3.OperationalError:
+            return None
+
+
+def save_tile_metadata(tile_directory, metadata, create=False):
+    """
+    Karonun metadata'sını olduğu gibi yazar (katalog + metadata.json).
+    create=True ise katalog yoksa oluşturulur (tiling aşaması).
+    """
+    tiles_dir, tile_name = _tile_location(tile_directory)
+    conn = connect(tiles_dir, create=create)
+    if conn is None:
+        write_metadata_json(tile_directory, metadata)
+        return
+    with closing(conn), transaction(conn):
+        _put(conn, tile_name, metadata)
+        if EXPORT_JSON:
+            write_metadata_json(tile_directory, metadata)
+
+
+def update_tile_metadata(tile_directory, update):
+    """
+    Karonun metadata'sını tek transaction içinde okur, update(metadata) ile
+    yerinde değiştirir ve geri yazar. Kayıt hiç yoksa (ne katalogda ne
+    metadata.json'da) hiçbir şey yapmaz ve None döner; aksi halde güncel metadata.
+    """
+    tiles_dir, tile_name = _tile_location(tile_directory)
+    conn = connect(tiles_dir)
+    if conn is None:
+        metadata = read_metadata_json(tile_directory)
+        if metadata is None:
+            return None
+        update(metadata)
+        write_metadata_json(tile_directory, metadata)
+        return metadata
+
+    with closing(conn), transaction(conn):
+        metadata = _get(conn, tile_name)
+        if metadata is None:
+            metadata = read_metadata_json(tile_directory)
+        if metadata is None:
+            return None
+        update(metadata)
+        _put(conn, tile_name, metadata)
+        if EXPORT_JSON:
+            write_metadata_json(tile_directory, metadata)
+    return metadata
+
+
+def load_all_metadata(tiles_dir):
+    """
+    Katalogdaki tüm karolar: {karo klasörü: metadata}. Katalog yoksa None.
+    """
+    conn = connect(tiles_dir)
+    if conn is None:
+        return None
+    with closing(conn):
+        rows = conn.execute("SELECT tile_name, metadata FROM tiles").fetchall()
+    return {os.path.join(tiles_dir, name): json.loads(metadata) for name, metadata in rows}
+
+
+def _pending_statuses(status):
+    # 'status' durumuna henüz ulaşmamış durumlar (ör. "meshed" -> tiled, segmented)
+    return STATUS_ORDER[:STATUS_ORDER.index(status)]
+
+
+def query_tiles(tiles_dir, bbox=None, status=None, pending=None):
+    """
+    Katalog sorgusu. Filtreler birlikte uygulanır:
+      bbox:    (x_min, y_min, x_max, y_max) yerel koordinatlarda; kesişen karolar
+      status:  processing_status bu değere eşit olanlar
+      pending: bu duruma henüz ulaşmamış olanlar (ör. "meshed" = mesh'i olmayanlar)
+    Dönüş: metadata sütunu hariç satırlar (dict listesi, ızgara sırasıyla).
+    """
+    conn = connect(tiles_dir)
+    if conn is None:
+        raise FileNotFoundError(f"Katalog bulunamadı: {catalog_path(tiles_dir)}")
+
+    columns = ", ".join(f"t.{c}" for c in COLUMNS if c != "metadata")
+    source = "tiles t"
+    where, args = [], []
+    with closing(conn):
+        if bbox is not None:
+            x_min, y_min, x_max, y_max = bbox
+            if _has_rtree(conn):
+                source += " JOIN tiles_rtree r ON r.id = t.rowid"
+                where.append("r.x_min <= ? AND r.x_max >= ? AND r.y_min <= ? AND r.y_max >= ?")
+                args += [x_max, x_min, y_max, y_min]
+            # R*Tree 32-bit float tutar (dışa yuvarlanır); kesin kontrol gerçek sütunlarla
+            where.append("t.x_min <= ? AND t.x_max >= ? AND t.y_min <= ? AND t.y_max >= ?")
+            args += [x_max, x_min, y_max, y_min]
+        if status is not None:
+            where.append("t.status = ?")
+            args.append(status)
+        if pending is not None:
+            statuses = _pending_statuses(pending)
+            where.append(f"t.status IN ({', '.join('?' * len(statuses))})" if statuses else "0")
+            args += statuses
+
+        sql = f"SELECT {columns} FROM {source}"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY t.grid_i, t.grid_j"
+        return [dict(row) for row in conn.execute(sql, args)]
+
+
+def tile_directories(tiles_dir, pending=None):
+    """
+    İşlenecek karo klasörleri. Katalog varsa ondan (pending ile filtrelenebilir),
+    yoksa klasör taranır ve durum metadata.json'dan okunur.
+    """
+    if os.path.exists(catalog_path(tiles_dir)):
+        rows = query_tiles(tiles_dir, pending=pending)
+        dirs = [os.path.join(tiles_dir, row["tile_name"]) for row in rows]
+        return [d for d in dirs if os.path.isdir(d)]
+
+    if not os.path.isdir(tiles_dir):
+        return []
+    dirs = [f.path for f in os.scandir(tiles_dir) if f.is_dir()]
+    if pending is None:
+        return dirs
+    statuses = _pending_statuses(pending)
+    return [
+        d for d in dirs
+        if (read_metadata_json(d) or {}).get("processing_status", STATUS_ORDER[0]) in statuses
+    ]
+
+
+def import_json(tiles_dir):
+    """
+    Klasördeki metadata.json dosyalarından kataloğu oluşturur / günceller
+    (katalogdan önceki çıktılar için geçiş). Dönüş: aktarılan karo sayısı.
+    """
+    init_catalog(tiles_dir)
+    count = 0
+    with closing(connect(tiles_dir)) as conn, transaction(conn):
+        for entry in sorted(os.scandir(tiles_dir), key=lambda e: e.name):
+            if not entry.is_dir():
+                continue
+            metadata = read_metadata_json(entry.path)
+            if metadata is not None:
+                _put(conn, entry.name, metadata)
+                count += 1
+    return count
+
+
+def export_json(tiles_dir):
+    """
+    Katalogdaki her karo için metadata.json yazar (Unity uyumluluğu).
+    Dönüş: yazılan dosya sayısı.
+    """
+    all_metadata = load_all_metadata(tiles_dir)
+    if all_metadata is None:
+        raise FileNotFoundError(f"Katalog bulunamadı: {catalog_path(tiles_dir)}")
+    count = 0
+    for tile_directory, metadata in all_metadata.items():
+        if os.path.isdir(tile_directory):
+            write_metadata_json(tile_directory, metadata)
+            count += 1
+    return count
+
+
+def status_counts(tiles_dir):
+    conn = connect(tiles_dir)
+    if conn is None:
+        raise FileNotFoundError(f"Katalog bulunamadı: {catalog_path(tiles_dir)}")
+    with closing(conn):
+        rows = conn.execute("SELECT status, COUNT(*) FROM tiles GROUP BY status").fetchall()
+    return {status: count for status, count in rows}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Karo kataloğu (SQLite) sorgu ve içe/dışa aktarım aracı.")
+    parser.add_argument("--tiles_dir", default=os.path.join("data", "processed", "tiles"))
+    parser.add_argument("--import_json", action="store_true",
+                        help="Mevcut metadata.json dosyalarından kataloğu oluştur.")
+    parser.add_argument("--export_json", action="store_true",
+                        help="Katalogdan tüm metadata.json dosyalarını yaz (Unity).")
+    parser.add_argument("--bbox", type=float, nargs=4, metavar=("X_MIN", "Y_MIN", "X_MAX", "Y_MAX"),
+                        help="Bu dikdörtgenle kesişen karolar (yerel koordinat).")
+    parser.add_argument("--status", choices=STATUS_ORDER, help="Bu durumdaki karolar.")
+    parser.add_argument("--pending", choices=STATUS_ORDER[1:],
+                        help="Bu duruma henüz ulaşmamış karolar (ör. meshed).")
+    args = parser.parse_args()
+
+    try:
+        if args.import_json:
+            print(f"Kataloğa aktarılan karo: {import_json(args.tiles_dir)}")
+        if args.export_json:
+            print(f"Yazılan metadata.json: {export_json(args.tiles_dir)}")
+
+        if args.bbox is not None or args.status or args.pending:
+            rows = query_tiles(args.tiles_dir, args.bbox, args.status, args.pending)
+            for row in rows:
+                print(f"{row['tile_name']:<14} {row['status']:<10} "
+                      f"X [{row['x_min']:.1f}, {row['x_max']:.1f}] Y [{row['y_min']:.1f}, {row['y_max']:.1f}] "
+                      f"nokta={row['point_count']}")
+            print(f"Toplam {len(rows)} karo.")
+        elif not (args.import_json or args.export_json):
+            counts = status_counts(args.tiles_dir)
+            print(f"Katalog: {catalog_path(args.tiles_dir)}")
+            for status in STATUS_ORDER:
+                print(f"  {status:<10} {counts.pop(status, 0)}")
+            for status, count in counts.items():
+                print(f"  {status:<10} {count}")
+    except FileNotFoundError as e:
+        print(f"Hata: {e} (önce tiling çalıştırın veya --import_json kullanın)")
+        sys.exit(1)
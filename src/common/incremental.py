@@ -0,0 +1,117 @@
+# src/common/incremental.py
+
+import os
+import json
+import hashlib
+from datetime import datetime, timezone
+
+from common.catalog import catalog_metadata, read_metadata_json
+
+HASH_BLOCK_SIZE = 8 * 1024 * 1024
+
+
+def _sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def file_fingerprint(path, previous=None):
+    """
+    Dosyanın boyut, mtime ve sha256 özetini döndürür.
+    Boyut ve mtime önceki kayıtla aynıysa özet yeniden hesaplanmaz
+    (git'in stat önbelleği gibi), böylece büyük dosyalar bir kez hash'lenir.
+    """
+    st = os.stat(path)
+    fingerprint = {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+    if (previous and previous.get("sha256")
+            and previous.get("size") == st.st_size
+            and previous.get("mtime_ns") == st.st_mtime_ns):
+        fingerprint["sha256"] = previous["sha256"]
+    else:
+        fingerprint["sha256"] = _sha256(path)
+    return fingerprint
+
+
+def fingerprint_matches(path, recorded):
+    """
+    Dosya kayıttaki haliyle aynı mı? Önce ucuz stat kontrolü yapılır;
+    mtime değişmiş ama boyut aynıysa içerik özeti karşılaştırılır
+    (aynı içerikle yeniden teslim edilen dosyalar güncel sayılır).
+    """
+    if not recorded or not os.path.exists(path):
+        return False
+    st = os.stat(path)
+    if st.st_size != recorded.get("size"):
+        return False
+    if st.st_mtime_ns == recorded.get("mtime_ns"):
+        return True
+    return recorded.get("sha256") is not None and _sha256(path) == recorded["sha256"]
+
+
+def load_tile_metadata(tile_directory):
+    """
+    Karonun metadata'sını okur: önce katalogdan (varsa), yoksa klasördeki
+    metadata.json'dan. İkisi de yoksa veya bozuksa None döner.
+    """
+    metadata = catalog_metadata(tile_directory)
+    if metadata is not None:
+        return metadata
+    return read_metadata_json(tile_directory)
+
+
+def _normalize_params(params):
+    # JSON'a yazılıp geri okunan değerlerle karşılaştırılabilsin (tuple -> list vb.)
+    return json.loads(json.dumps(params))
+
+
+def stage_is_current(metadata, stage, inputs, outputs, params):
+    """
+    Bir aşamanın çıktıları hâlâ geçerli mi?
+    - Kayıtlı parametreler mevcut parametrelerle aynı olmalı,
+    - Girdi dosyaları kayıttaki parmak izleriyle eşleşmeli,
+    - Çıktı dosyalarının hepsi mevcut olmalı.
+
+    inputs: {isim: yol}, outputs: [yol, ...], params: JSON'a yazılabilir dict
+    """
+    if not metadata:
+        return False
+    record = metadata.get("stages", {}).get(stage)
+    if not record:
+        return False
+    if record.get("params") != _normalize_params(params):
+        return False
+
+    recorded_inputs = record.get("inputs", {})
+    if set(recorded_inputs) != set(inputs):
+        return False
+    for name, path in inputs.items():
+        if not fingerprint_matches(path, recorded_inputs[name]):
+            return False
+
+    return all(os.path.exists(path) for path in outputs)
+
+
+def record_stage(metadata, stage, inputs, params, known_fingerprints=None, **extra):
+    """
+    Aşamanın girdi parmak izlerini ve parametrelerini metadata['stages'][stage]
+    altına yazar. Dosyaya kaydetmek çağıranın sorumluluğundadır.
+    known_fingerprints: önceden hesaplanmış {isim: parmak izi} (ör. birçok karonun
+    ortak kaynağı için tek seferlik hash).
+    """
+    stages = metadata.setdefault("stages", {})
+    previous_inputs = stages.get(stage, {}).get("inputs", {})
+    known_fingerprints = known_fingerprints or {}
+    record = {
+        "inputs": {
+            name: known_fingerprints.get(name) or file_fingerprint(path, previous_inputs.get(name))
+            for name, path in inputs.items()
+        },
+        "params": _normalize_params(params),
+        "completed_at": datetime.now(timezone.utc).isoformat(timespec="seconds")
+    }
+    record.update(extra)
+    stages[stage] = record
+    return record
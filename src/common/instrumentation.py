@@ -0,0 +1,217 @@
+# src/common/instrumentation.py
+
+import os
+import json
+import time
+import cProfile
+from contextlib import contextmanager
+from datetime import datetime
+import numpy as np
+
+# Çalıştırma raporlarının yazıldığı klasör
+REPORTS_DIR = os.path.join("data", "processed", "reports")
+
+# Bu ortam değişkeni bir klasör gösteriyorsa her karo cProfile altında çalışır ve
+# '<klasör>/<aşama>_<karo>.prof' yazılır (snakeviz / pstats ile incelenebilir).
+# Ortam değişkeni olduğu için süreç havuzundaki worker'lara da geçer.
+# py-spy için ek bir şey gerekmez; adımlar ayrı fonksiyon/bağlam olarak
+# yığında görünür:  py-spy record --subprocesses -o mesh.svg -- python src/meshing/delaunay.py
+PROFILE_ENV = "PIPELINE_PROFILE_DIR"
+
+REPORT_PERCENTILES = (50, 90, 99)
+SLOWEST_TILES = 10
+
+
+class StageTimer:
+    """
+    Bir karonun aşama içi adımlarını (okuma, CSF, üçgenleme, normaller, yazma...)
+    ve sayaçlarını toplar:
+
+        timer = StageTimer()
+        with timer.step("read"):
+            ...
+        timer.count("points_in", n)
+        metadata["timings"]["mesh"] = timer.as_dict()
+    """
+
+    def __init__(self):
+        self.steps = {}
+        self.counters = {}
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def step(self, name):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.steps[name] = self.steps.get(name, 0.0) + time.perf_counter() - t0
+
+    def add(self, name, seconds):
+        # Başka yerde ölçülmüş süre (ör. karolar arasında paylaşılan bir adımın
+        # karoya düşen payı); toplam süreye de eklenir
+        self.steps[name] = self.steps.get(name, 0.0) + seconds
+        self._start -= seconds
+
+    def count(self, name, value):
+        self.counters[name] = int(value)
+
+    def as_dict(self):
+        return {
+            "total_sec": round(time.perf_counter() - self._start, 6),
+            "steps": {name: round(sec, 6) for name, sec in self.steps.items()},
+            "counters": dict(self.counters)
+        }
+
+
+def record_timings(metadata, stage, timer):
+    """
+    Zamanlamaları metadata['timings'][stage] altına yazar (dosyaya kaydetmek çağıranda).
+    """
+    metadata.setdefault("timings", {})[stage] = timer.as_dict()
+
+
+@contextmanager
+def maybe_profile(stage, tile_name):
+    """
+    PROFILE_ENV ayarlıysa bloğu cProfile ile çalıştırıp .prof dosyası yazar;
+    değilse hiçbir şey yapmaz (ek maliyet yok).
+    """
+    profile_dir = os.environ.get(PROFILE_ENV)
+    if not profile_dir:
+        yield
+        return
+
+    os.makedirs(profile_dir, exist_ok=True)
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        profiler.dump_stats(os.path.join(profile_dir, f"{stage}_{tile_name}.prof"))
+
+
+def _item_name(item):
+    if isinstance(item, dict):
+        return str(item.get("tile_name", "item"))
+    return os.path.splitext(os.path.basename(os.path.normpath(str(item))))[0]
+
+
+class _Profiled:
+    # Süreç havuzuna gönderilebilsin diye kapanış (closure) değil, modül düzeyinde sınıf
+    def __init__(self, func, stage):
+        self.func = func
+        self.stage = stage
+
+    def __call__(self, item):
+        with maybe_profile(self.stage, _item_name(item)):
+            return self.func(item)
+
+
+def profiled(func, stage):
+    """
+    run_parallel'a verilecek fonksiyonu profilleme kancasıyla sarar.
+    PROFILE_ENV ayarlı değilse fonksiyonu olduğu gibi döndürür.
+    """
+    if not os.environ.get(PROFILE_ENV):
+        return func
+    return _Profiled(func, stage)
+
+
+def enable_profiling(profile_dir):
+    """
+    CLI'lardaki --profile seçeneği için: bu süreç ve başlatacağı worker'lar profillenir.
+    """
+    os.environ[PROFILE_ENV] = os.path.abspath(profile_dir)
+
+
+def _percentiles(values):
+    values = np.asarray(values, dtype=np.float64)
+    summary = {f"p{p}": float(np.percentile(values, p)) for p in REPORT_PERCENTILES}
+    summary["max"] = float(values.max())
+    summary["mean"] = float(values.mean())
+    summary["sum"] = float(values.sum())
+    return summary
+
+
+def build_run_report(stage, tile_timings, failed=(), elapsed_sec=None, slowest=SLOWEST_TILES):
+    """
+    Karo zamanlamalarından çalıştırma raporu üretir: toplam ve adım başına
+    yüzdelikler (p50/p90/p99/max), sayaç toplamları ve en yavaş karolar.
+
+    tile_timings: [(karo, StageTimer.as_dict()), ...]
+    failed: [(karo, hata), ...] (ör. run_parallel özetinin "failed" listesi)
+    """
+    tile_timings = [(str(tile), t) for tile, t in tile_timings if t]
+    report = {
+        "stage": stage,
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "tiles": len(tile_timings),
+        "failed": [{"tile": str(tile), "error": error} for tile, error in failed],
+        "elapsed_sec": elapsed_sec,
+        "total": None,
+        "steps": {},
+        "counters": {},
+        "slowest_tiles": []
+    }
+    if not tile_timings:
+        return report
+
+    report["total"] = _percentiles([t["total_sec"] for _, t in tile_timings])
+    step_names = sorted({name for _, t in tile_timings for name in t["steps"]})
+    report["steps"] = {
+        name: _percentiles([t["steps"].get(name, 0.0) for _, t in tile_timings])
+        for name in step_names
+    }
+    counter_names = sorted({name for _, t in tile_timings for name in t["counters"]})
+    report["counters"] = {
+        name: int(sum(t["counters"].get(name, 0) for _, t in tile_timings))
+        for name in counter_names
+    }
+    ranked = sorted(tile_timings, key=lambda item: item[1]["total_sec"], reverse=True)[:slowest]
+    report["slowest_tiles"] = [
+        {"tile": os.path.basename(os.path.normpath(tile)), **t} for tile, t in ranked
+    ]
+    return report
+
+
+def report_from_summary(stage, summary, slowest=SLOWEST_TILES):
+    """
+    run_parallel özetinden rapor: sonuç dict'lerindeki "timings" alanları kullanılır.
+    """
+    tile_timings = [
+        (tile, result.get("timings"))
+        for tile, result in summary["succeeded"]
+        if isinstance(result, dict) and not result.get("skipped")
+    ]
+    return build_run_report(stage, tile_timings, summary["failed"], summary.get("elapsed_sec"), slowest)
+
+
+def print_run_report(report):
+    print(f"\n--- Çalıştırma raporu: {report['stage']} ---")
+    print(f"Ölçülen karo: {report['tiles']}, başarısız: {len(report['failed'])}")
+    if not report["total"]:
+        return
+    header = "  ".join(f"{'p' + str(p):>6}" for p in REPORT_PERCENTILES)
+    print(f"{'adım':<14} {header}  {'max':>6}  {'toplam (sn)':>10}")
+    rows = [("TOPLAM", report["total"])] + list(report["steps"].items())
+    for name, s in rows:
+        cells = "  ".join(f"{s[f'p{p}']:6.3f}" for p in REPORT_PERCENTILES)
+        print(f"{name:<14} {cells}  {s['max']:6.3f}  {s['sum']:10.2f}")
+    if report["counters"]:
+        print("Sayaçlar: " + ", ".join(f"{k}={v}" for k, v in report["counters"].items()))
+    print("En yavaş karolar: " + ", ".join(
+        f"{t['tile']} ({t['total_sec']:.2f} sn)" for t in report["slowest_tiles"][:5]))
+
+
+def write_run_report(report, report_dir=REPORTS_DIR):
+    """
+    Raporu '<report_dir>/<aşama>_<zaman>.json' olarak yazar ve yolu döndürür.
+    """
+    os.makedirs(report_dir, exist_ok=True)
+    stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    path = os.path.join(report_dir, f"{report['stage']}_{stamp}.json")
+    with open(path, "w") as f:
+        json.dump(report, f, indent=4)
+    return path
@@ -0,0 +1,88 @@
+# src/common/manifest.py
+
+import os
+import json
+from datetime import datetime, timezone
+
+from common.incremental import file_fingerprint, fingerprint_matches
+
+# Her veri dosyasının yanında tutulan küçük JSON (ör. X.laz -> X.laz.manifest.json)
+MANIFEST_SUFFIX = ".manifest.json"
+
+
+def manifest_path(data_path):
+    return str(data_path) + MANIFEST_SUFFIX
+
+
+def load_manifest(data_path):
+    """
+    Veri dosyasının manifest'ini okur; yoksa veya bozuksa None döner.
+    """
+    path = manifest_path(data_path)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def update_manifest(data_path, **fields):
+    """
+    Manifest'e alan ekler/günceller (mevcut alanlar korunur) ve kaydeder.
+    """
+    manifest = load_manifest(data_path) or {}
+    manifest.update(fields)
+    manifest["updated_at"] = datetime.now(timezone.utc).isoformat(timespec="seconds")
+    with open(manifest_path(data_path), "w") as f:
+        json.dump(manifest, f, indent=4)
+    return manifest
+
+
+def cached_bbox(data_path, compute_bbox):
+    """
+    Dosyanın bbox'ını manifest'ten döndürür; dosya o zamandan beri değiştiyse
+    (veya kayıt yoksa) compute_bbox(data_path) ile hesaplayıp önbelleğe yazar.
+    Pahalı 'pdal info --stats' taraması böylece girdi başına en fazla bir kez yapılır.
+    """
+    manifest = load_manifest(data_path) or {}
+    if manifest.get("bbox") and fingerprint_matches(data_path, manifest.get("fingerprint")):
+        print(f"bbox önbellekten okundu: {manifest_path(data_path)}")
+        return manifest["bbox"]
+
+    bbox = compute_bbox(data_path)
+    update_manifest(
+        data_path,
+        fingerprint=file_fingerprint(data_path, manifest.get("fingerprint")),
+        bbox=bbox
+    )
+    return bbox
+
+
+def record_dataset_transform(output_path, source_path, scale, origin, bbox=None):
+    """
+    Dönüştürülmüş çıktının manifest'ine kaynak dosyayı (parmak izi ile),
+    toplam ölçeği ve merkezleme ofsetini (Local -> Global) yazar.
+    """
+    # Kaynak değişmediyse önceki özet yeniden kullanılır (büyük dosyayı tekrar hash'leme)
+    previous = (load_manifest(output_path) or {}).get("source")
+    fields = {
+        "source_file": os.path.basename(str(source_path)),
+        "source": file_fingerprint(source_path, previous),
+        "scale": scale,
+        "origin": {"x": origin[0], "y": origin[1], "z": origin[2]}
+    }
+    if bbox is not None:
+        fields["source_bbox"] = bbox
+    return update_manifest(output_path, **fields)
+
+
+def dataset_origin(data_path):
+    """
+    Manifest'teki merkezleme ofsetini (x, y, z) döndürür; kayıt yoksa None.
+    """
+    origin = (load_manifest(data_path) or {}).get("origin")
+    if not origin:
+        return None
+    return (origin["x"], origin["y"], origin["z"])
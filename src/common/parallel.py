@@ -0,0 +1,113 @@
+# src/common/parallel.py
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+from tqdm import tqdm
+
+
+_NO_ITEM = object()
+
+
+def _format_error(e):
+    return f"{type(e).__name__}: {e}"
+
+
+def run_parallel(func, items, workers=None, max_in_flight=None, desc=None,
+                 total=None, key=None):
+    """
+    func'u items içindeki her eleman (genelde karo klasörü) için bir süreç
+    havuzunda çalıştırır. PDAL/Open3D çağrıları GIL'i bırakmadığı (thread'ler
+    sırayla çalışacağı) için thread yerine process kullanılır.
+
+    - Aynı anda en fazla max_in_flight iş kuyruğa verilir (varsayılan 2 x workers),
+      böylece binlerce karo tek seferde havuza yığılmaz.
+    - Bir karodaki hata (ya da çöken bir worker) tüm işi durdurmaz; hata
+      kaydedilir ve kalan karolarla devam edilir.
+    - workers == 1 ise havuz açılmaz, iş aynı süreçte sırayla yapılır.
+    - items bir üreteç (generator) olabilir; elemanlar ancak kuyrukta yer
+      açıldıkça üretilir. Böylece üretici (ör. tiling) bir sonraki işi
+      hazırlarken worker'lar öncekileri işler. total ilerleme çubuğu içindir.
+    - key verilirse özetlerde eleman yerine key(eleman) saklanır (büyük dizi
+      taşıyan işlerin bellekte tutulmaması için).
+
+    Dönüş: {"total", "succeeded": [(item, sonuç)], "failed": [(item, hata)], "elapsed_sec"}
+    """
+    if total is None and hasattr(items, "__len__"):
+        total = len(items)
+    key = key or (lambda item: item)
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = max_in_flight or 2 * workers
+
+    succeeded = []
+    failed = []
+    start_time = time.perf_counter()
+
+    with tqdm(total=total, desc=desc) as pbar:
+        if workers == 1:
+            for item in items:
+                try:
+                    succeeded.append((key(item), func(item)))
+                except Exception as e:
+                    failed.append((key(item), _format_error(e)))
+                pbar.update(1)
+        else:
+            remaining = iter(items)
+            executor = ProcessPoolExecutor(max_workers=workers)
+            pending = {}
+            try:
+                while True:
+                    # Kuyruğu sınırlı sayıda işle doldur
+                    while len(pending) < max_in_flight:
+                        item = next(remaining, _NO_ITEM)
+                        if item is _NO_ITEM:
+                            break
+                        pending[executor.submit(func, item)] = key(item)
+
+                    if not pending:
+                        break
+
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    pool_broken = False
+                    for future in done:
+                        item = pending.pop(future)
+                        try:
+                            succeeded.append((item, future.result()))
+                        except BrokenProcessPool as e:
+                            failed.append((item, _format_error(e)))
+                            pool_broken = True
+                        except Exception as e:
+                            failed.append((item, _format_error(e)))
+                        pbar.update(1)
+
+                    if pool_broken:
+                        # Çöken worker havuzu kullanılamaz hale getirir: kalan
+                        # uçuştaki işler de başarısız sayılır, yeni havuzla devam edilir.
+                        for future, item in pending.items():
+                            failed.append((item, "BrokenProcessPool: worker süreci çöktü"))
+                            pbar.update(1)
+                        pending.clear()
+                        executor.shutdown(wait=False, cancel_futures=True)
+                        executor = ProcessPoolExecutor(max_workers=workers)
+
+                    pbar.set_postfix(ok=len(succeeded), hata=len(failed))
+            finally:
+                executor.shutdown(wait=True, cancel_futures=True)
+
+    return {
+        "total": len(succeeded) + len(failed),
+        "succeeded": succeeded,
+        "failed": failed,
+        "elapsed_sec": time.perf_counter() - start_time
+    }
+
+
+def print_summary(summary, label="İşlem"):
+    """
+    run_parallel özetini kısa bir rapor olarak yazdırır.
+    """
+    print(f"\n{label}: {len(summary['succeeded'])}/{summary['total']} başarılı, "
+          f"{len(summary['failed'])} hatalı ({summary['elapsed_sec']:.1f} sn).")
+    for item, error in summary["failed"]:
+        print(f"  Hata ({os.path.basename(os.path.normpath(str(item)))}): {error}")
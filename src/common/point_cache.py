@@ -0,0 +1,178 @@
+# src/common/point_cache.py
+
+import os
+import json
+import shutil
+import numpy as np
+import laspy
+
+# ----------------------------------------------------------------------
+# Sütunlu nokta önbelleği: bir nokta dosyasının (raw.las, ground.las, ...)
+# sıkıştırılmamış kopyası, aynı klasörde '<ad>.columns/' altında öznitelik
+# başına bir .npy dosyası:
+#     xyz.npy (N, 3) float64, classification.npy, intensity.npy, ...
+# np.load(mmap_mode="r") ile açılır: LAZ çözme ve Python dizisine kopyalama
+# olmadan doğrudan sayfa önbelleğinden okunan salt okunur görünümler.
+#
+# 'columns.json' en son yazılır (tamamlanma işareti) ve kaynak dosyanın
+# boyut/mtime bilgisini tutar; kaynak değişmişse önbellek yok sayılır.
+# Kaynak dosyası yazılmadan üretilen önbellek (ör. pipeline.py --write columns)
+# doğrulanamaz: kaynak dosya sonradan yazılırken drop_point_cache ile silinir.
+# ----------------------------------------------------------------------
+CACHE_SUFFIX = ".columns"
+INDEX_FILENAME = "columns.json"
+LAS_ATTRIBUTES = ("classification", "intensity", "return_number", "number_of_returns")
+SOURCE_EXTENSIONS = (".las", ".laz", ".pcd")
+
+
+def cache_path(path):
+    """
+    Kaynak dosyanın (veya zaten .columns klasörünün) önbellek klasörü.
+    raw.las, raw.laz ve raw.pcd aynı 'raw.columns' önbelleğini paylaşır.
+    """
+    if path.rstrip(os.sep).endswith(CACHE_SUFFIX):
+        return path.rstrip(os.sep)
+    return os.path.splitext(path)[0] + CACHE_SUFFIX
+
+
+def with_cache(file_name):
+    """
+    Karo dosyası adı için önce önbellek, sonra dosyanın kendisi:
+    "ground.pcd" -> ("ground.columns", "ground.pcd") (spatial_index.tile_files için).
+    """
+    return (os.path.basename(cache_path(file_name)), file_name)
+
+
+def _source_stat(path):
+    st = os.stat(path)
+    return {"name": os.path.basename(path), "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+def las_columns(las, attributes=LAS_ATTRIBUTES):
+    """
+    LasData / ScaleAwarePointRecord'dan (xyz, {öznitelik: dizi}).
+    """
+    xyz = np.column_stack((las.x, las.y, las.z)).astype(np.float64)
+    columns = {name: np.asarray(las[name]) for name in attributes}
+    return xyz, columns
+
+
+def write_point_cache(cache_dir, xyz, attributes=None, source_path=None):
+    """
+    Sütunları '<cache_dir>/<öznitelik>.npy' olarak yazar. source_path verilirse
+    (yazılmış kaynak dosya) parmak izi kaydedilir.
+    """
+    if os.path.isdir(cache_dir):
+        shutil.rmtree(cache_dir)
+    os.makedirs(cache_dir)
+    attributes = attributes or {}
+    np.save(os.path.join(cache_dir, "xyz.npy"), np.ascontiguousarray(xyz, dtype=np.float64))
+    for name, values in attributes.items():
+        np.save(os.path.join(cache_dir, f"{name}.npy"), np.ascontiguousarray(values))
+
+    index = {
+        "count": int(len(xyz)),
+        "attributes": ["xyz", *attributes],
+        "source": _source_stat(source_path) if source_path else None
+    }
+    with open(os.path.join(cache_dir, INDEX_FILENAME), "w") as f:
+        json.dump(index, f, indent=4)
+    return cache_dir
+
+
+def drop_point_cache(path):
+    """
+    Kaynak dosya yeniden yazılmadan önce önbelleğini siler (parmak izi
+    olmayan önbellek aksi halde eski veriyi sunmaya devam ederdi).
+    """
+    cache_dir = cache_path(path)
+    if os.path.isdir(cache_dir):
+        shutil.rmtree(cache_dir)
+
+
+def build_point_cache(las_path, attributes=LAS_ATTRIBUTES):
+    """
+    LAS/LAZ dosyasını bir kez çözüp önbelleğini yazar.
+    """
+    las = laspy.read(las_path)
+    xyz, columns = las_columns(las, attributes)
+    return write_point_cache(cache_path(las_path), xyz, columns, las_path)
+
+
+def open_point_cache(path):
+    """
+    Güncel önbellek varsa {öznitelik: salt okunur memmap} döner, yoksa None.
+    Kaynak dosya (kayıtlıysa) hâlâ aynı boyut/mtime'a sahip olmalı.
+    """
+    cache_dir = cache_path(path)
+    index_path = os.path.join(cache_dir, INDEX_FILENAME)
+    if not os.path.exists(index_path):
+        return None
+    try:
+        with open(index_path, "r") as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    source = index.get("source")
+    if source:
+        source_path = os.path.join(os.path.dirname(cache_dir), source["name"])
+        if os.path.exists(source_path):
+            st = os.stat(source_path)
+            if st.st_size != source["size"] or st.st_mtime_ns != source["mtime_ns"]:
+                return None
+
+    return {
+        name: np.load(os.path.join(cache_dir, f"{name}.npy"), mmap_mode="r")
+        for name in index["attributes"]
+    }
+
+
+def _source_for(path):
+    # .columns klasörü verildiyse aynı addaki kaynak dosya
+    if not path.rstrip(os.sep).endswith(CACHE_SUFFIX):
+        return path
+    stem = cache_path(path)[:-len(CACHE_SUFFIX)]
+    for ext in SOURCE_EXTENSIONS:
+        if os.path.exists(stem + ext):
+            return stem + ext
+    return None
+
+
+def load_columns(path, attributes=(), build=False):
+    """
+    Nokta dosyasının xyz'si ve istenen öznitelikleri: önce önbellekten
+    (kopyasız memmap), yoksa dosya çözülür. build=True ise LAS/LAZ çözüldükten
+    sonra önbellek yazılır ve bir sonraki okuma önbellekten yapılır.
+
+    path: .las / .laz / .pcd dosyası veya .columns klasörü.
+    Dönüş: {"xyz": (N, 3), öznitelik: (N,) ...}
+    """
+    cached = open_point_cache(path)
+    if cached is not None and all(name in cached for name in attributes):
+        return {name: cached[name] for name in ("xyz", *attributes)}
+
+    source = _source_for(path)
+    if source is None or not os.path.exists(source):
+        raise FileNotFoundError(f"Nokta dosyası bulunamadı: {path}")
+
+    ext = os.path.splitext(source)[1].lower()
+    if ext == ".pcd":
+        if attributes:
+            raise ValueError(f"PCD dosyasında öznitelik yok: {', '.join(attributes)}")
+        import open3d as o3d  # yalnızca PCD okumak için gerekli
+        return {"xyz": np.asarray(o3d.io.read_point_cloud(source).points)}
+
+    if build:
+        build_point_cache(source)
+        return load_columns(source, attributes)
+    las = laspy.read(source)
+    xyz, columns = las_columns(las, attributes)
+    return {"xyz": xyz, **columns}
+
+
+def load_xyz(path, build=False):
+    """
+    (N, 3) XYZ: önbellek varsa memmap görünümü, yoksa çözülmüş dizi.
+    """
+    return load_columns(path, build=build)["xyz"]
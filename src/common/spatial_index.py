@@ -0,0 +1,183 @@
+# src/common/spatial_index.py
+
+import os
+import glob
+import numpy as np
+
+from common.catalog import catalog_path, catalog_metadata, query_tiles, read_metadata_json
+
+# ----------------------------------------------------------------------
+# Karo düzeyinde uzamsal indeks: her karonun bounds.local dikdörtgeni tek bir
+# (N, 4) dizide tutulur; bbox / yarıçap sorgusu vektörel kesişim testiyle
+# yalnızca ilgili karoları döndürür. Sınırlar katalog varsa tek SQL
+# sorgusundan, yoksa metadata.json dosyalarından okunur.
+# Görselleştiriciler bu sayede büyük bir sahada küçük bir bölgeye bakarken
+# yalnızca o bölgeye değen karoların dosyalarını okur.
+# ----------------------------------------------------------------------
+
+
+class Region:
+    """
+    İlgilenilen bölge (yerel koordinat, XY düzleminde):
+      Region(bbox=(x_min, y_min, x_max, y_max))  veya
+      Region(center=(x, y), radius=r)
+    """
+
+    def __init__(self, bbox=None, center=None, radius=None):
+        if bbox is None and (center is None or radius is None):
+            raise ValueError("bbox veya center + radius verilmeli")
+        self.center = None if center is None else (float(center[0]), float(center[1]))
+        self.radius = None if radius is None else float(radius)
+        if bbox is None:
+            cx, cy = self.center
+            bbox = (cx - self.radius, cy - self.radius, cx + self.radius, cy + self.radius)
+        self.bbox = tuple(float(v) for v in bbox)
+
+    def shifted(self, dx, dy):
+        # Global -> yerel dönüşüm için (offset_values çıkarılır)
+        if self.center is not None:
+            return Region(center=(self.center[0] + dx, self.center[1] + dy), radius=self.radius)
+        x_min, y_min, x_max, y_max = self.bbox
+        return Region(bbox=(x_min + dx, y_min + dy, x_max + dx, y_max + dy))
+
+    def intersects(self, bounds):
+        """
+        bounds (N, 4) = [x_min, y_min, x_max, y_max] dikdörtgenlerinden bölgeye
+        değenlerin maskesi. Daire için dikdörtgene en yakın nokta uzaklığı kullanılır.
+        """
+        x_min, y_min, x_max, y_max = self.bbox
+        mask = ((bounds[:, 0] <= x_max) & (bounds[:, 2] >= x_min) &
+                (bounds[:, 1] <= y_max) & (bounds[:, 3] >= y_min))
+        if self.center is not None:
+            cx, cy = self.center
+            dx = np.clip(cx, bounds[:, 0], bounds[:, 2]) - cx
+            dy = np.clip(cy, bounds[:, 1], bounds[:, 3]) - cy
+            mask &= dx * dx + dy * dy <= self.radius * self.radius
+        return mask
+
+    def mask(self, points):
+        """
+        Noktaların (N, >=2) bölge içinde kalanlarının kesin maskesi.
+        """
+        x, y = points[:, 0], points[:, 1]
+        if self.center is not None:
+            cx, cy = self.center
+            return (x - cx) ** 2 + (y - cy) ** 2 <= self.radius * self.radius
+        x_min, y_min, x_max, y_max = self.bbox
+        return (x >= x_min) & (x <= x_max) & (y >= y_min) & (y <= y_max)
+
+    def __repr__(self):
+        if self.center is not None:
+            return f"Region(center={self.center}, radius={self.radius})"
+        return f"Region(bbox={self.bbox})"
+
+
+class TileIndex:
+    """
+    Karo sınırlarının indeksi:
+
+        index = TileIndex.from_tiles_dir("data/processed/tiles")
+        tile_dirs = index.query(Region(center=(120.0, -40.0), radius=150.0))
+    """
+
+    def __init__(self, tiles_dir, tile_names, bounds, offset=None):
+        self.tiles_dir = tiles_dir
+        self.tile_names = list(tile_names)
+        self.bounds = np.asarray(bounds, dtype=np.float64).reshape(-1, 4)
+        # Local -> Global ofseti (x, y); --global bölgeler için
+        self.offset = offset
+
+    @classmethod
+    def from_tiles_dir(cls, tiles_dir):
+        if os.path.exists(catalog_path(tiles_dir)):
+            rows = [r for r in query_tiles(tiles_dir) if r["x_min"] is not None]
+            names = [r["tile_name"] for r in rows]
+            bounds = [(r["x_min"], r["y_min"], r["x_max"], r["y_max"]) for r in rows]
+            first = catalog_metadata(os.path.join(tiles_dir, names[0])) if names else None
+        else:
+            names, bounds, first = [], [], None
+            for tile_dir in sorted(glob.glob(os.path.join(tiles_dir, "*", ""))):
+                metadata = read_metadata_json(tile_dir)
+                local = (metadata or {}).get("bounds", {}).get("local")
+                if not local:
+                    continue
+                names.append(os.path.basename(os.path.normpath(tile_dir)))
+                bounds.append((local["x_min"], local["y_min"], local["x_max"], local["y_max"]))
+                first = first or metadata
+
+        offset = None
+        if first and "offset_values" in first:
+            offset = (first["offset_values"]["x"], first["offset_values"]["y"])
+        return cls(tiles_dir, names, bounds, offset)
+
+    def __len__(self):
+        return len(self.tile_names)
+
+    def to_local(self, region):
+        """
+        Global (orijinal CRS) koordinatlarda verilmiş bölgeyi yerel koordinata çevirir.
+        """
+        if self.offset is None:
+            raise ValueError("Karo metadata'sında offset_values yok; global bölge çevrilemez")
+        return region.shifted(-self.offset[0], -self.offset[1])
+
+    def query(self, region):
+        """
+        Bölgeye değen karoların klasörleri.
+        """
+        mask = region.intersects(self.bounds)
+        return [os.path.join(self.tiles_dir, self.tile_names[k]) for k in np.flatnonzero(mask)]
+
+
+def _first_existing(tile_dir, file_names):
+    for name in file_names:
+        path = os.path.join(tile_dir, name)
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def tile_files(tiles_dir, file_name, region=None, index=None):
+    """
+    Karolardaki 'file_name' dosyalarının yolları. region verilirse yalnızca
+    bölgeye değen karolarınkiler (indeks verilmezse oluşturulur).
+    file_name bir demet ise (ör. ("ground.columns", "ground.pcd")) her karo
+    için ilk var olan ad seçilir.
+    """
+    file_names = (file_name,) if isinstance(file_name, str) else tuple(file_name)
+    if region is None:
+        tile_dirs = sorted(glob.glob(os.path.join(tiles_dir, "*", "")))
+    else:
+        index = index or TileIndex.from_tiles_dir(tiles_dir)
+        tile_dirs = index.query(region)
+    paths = (_first_existing(os.path.normpath(tile_dir), file_names) for tile_dir in tile_dirs)
+    return [p for p in paths if p is not None]
+
+
+def add_region_arguments(parser):
+    """
+    Görselleştirici CLI'larına bölge seçeneklerini ekler.
+    """
+    parser.add_argument("--bbox", type=float, nargs=4, metavar=("X_MIN", "Y_MIN", "X_MAX", "Y_MAX"),
+                        help="Yalnızca bu dikdörtgene değen karoları oku ve noktaları kırp.")
+    parser.add_argument("--center", type=float, nargs=2, metavar=("X", "Y"),
+                        help="--radius ile birlikte: bu noktanın çevresini göster.")
+    parser.add_argument("--radius", type=float, default=None, help="--center çevresindeki yarıçap (m).")
+    parser.add_argument("--global_coords", action="store_true",
+                        help="--bbox / --center orijinal (global) koordinatlarda verilmiştir.")
+
+
+def region_from_args(args, tiles_dir):
+    """
+    CLI seçeneklerinden (yerel koordinatlı) Region ve TileIndex üretir.
+    Bölge verilmemişse (None, None) döner.
+    """
+    if args.bbox is None and args.center is None:
+        return None, None
+    if args.center is not None and args.radius is None:
+        raise ValueError("--center için --radius da verilmeli")
+    region = Region(bbox=args.bbox) if args.bbox is not None else Region(center=args.center, radius=args.radius)
+    index = TileIndex.from_tiles_dir(tiles_dir)
+    if args.global_coords:
+        region = index.to_local(region)
+    return region, index
@@ -0,0 +1,165 @@
+# src/common/tile_loader.py
+
+import os
+import json
+import threading
+import numpy as np
+import laspy
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from tqdm import tqdm
+
+from common.incremental import load_tile_metadata
+from common.point_cache import CACHE_SUFFIX, INDEX_FILENAME, load_xyz
+
+# ----------------------------------------------------------------------
+# Görselleştiriciler için ortak karo yükleyici. Dosyalar bir thread havuzunda
+# eşzamanlı okunur (LAZ çözme, memmap sayfa okuması ve numpy kopyaları GIL'i
+# bırakır; ağ diskinde gecikmeler üst üste biner). Çıktı dizisi baştan,
+# başlıklardaki nokta sayılarından ayrılır ve her karo bittiği anda kendi
+# dilimine yazılır: list.append + np.vstack'in ikinci tam kopyası olmaz,
+# tepe bellek ~1x veri boyutudur. Bölge kırpması başlık sayısını bilinemez
+# kılar; dizi çoğunlukla boş kalırsa sonunda dolu kısım kopyalanıp büyük
+# ayırma bırakılır (hiç yazılmayan sayfalar zaten belleğe alınmaz).
+# ----------------------------------------------------------------------
+
+# --- AYARLAR ---
+LOADER_THREADS = 16     # G/Ç beklemesi ağırlıklı; çekirdek sayısından fazla olabilir
+TRIM_FRACTION = 0.5     # Dolu kısım kapasitenin bu oranından azsa kopyalanarak kırpılır
+
+
+def _pcd_point_count(path):
+    # PCD başlığı metindir; 'POINTS n' satırı veriden önce gelir
+    with open(path, "rb") as f:
+        for line in f:
+            if line.startswith(b"POINTS"):
+                return int(line.split()[1])
+            if line.startswith(b"DATA"):
+                break
+    return None
+
+
+def _metadata_point_count(path):
+    # raw.* -> point_count, ground.* / non_ground.* -> point_counts[ad]
+    metadata = load_tile_metadata(os.path.dirname(os.path.normpath(path)))
+    if not metadata:
+        return None
+    stem = os.path.splitext(os.path.basename(os.path.normpath(path)))[0]
+    count = metadata.get("point_counts", {}).get(stem)
+    if count is None and stem == "raw":
+        count = metadata.get("point_count")
+    return count
+
+
+def point_count(path):
+    """
+    Dosyayı çözmeden nokta sayısı: .columns dizini, LAS/LAZ veya PCD başlığından;
+    okunamazsa karo metadata'sından. Bilinmiyorsa None.
+    """
+    try:
+        if path.rstrip(os.sep).endswith(CACHE_SUFFIX):
+            with open(os.path.join(path, INDEX_FILENAME), "r") as f:
+                return int(json.load(f)["count"])
+        ext = os.path.splitext(path)[1].lower()
+        if ext in (".las", ".laz"):
+            with laspy.open(path) as reader:
+                return int(reader.header.point_count)
+        if ext == ".pcd":
+            return _pcd_point_count(path)
+    except (OSError, ValueError, KeyError, laspy.errors.LaspyException):
+        pass
+    return _metadata_point_count(path)
+
+
+def _load_points(path, region, max_points_per_tile):
+    # Karonun XYZ'si; bölgeye kırpılmış ve gerekirse alt örneklenmiş
+    pts = load_xyz(path)
+    if region is not None:
+        pts = pts[region.mask(pts)]
+    if max_points_per_tile is not None and len(pts) > max_points_per_tile:
+        idx = np.random.default_rng().choice(len(pts), max_points_per_tile, replace=False)
+        pts = pts[np.sort(idx)]
+    return pts
+
+
+def load_tiles(paths, region=None, max_points_per_tile=None, workers=LOADER_THREADS, desc=None):
+    """
+    Karo dosyalarının (N, 3) XYZ'sini tek dizide birleştirir.
+
+    region (common.spatial_index.Region) verilirse noktalar bölgeye kırpılır,
+    max_points_per_tile verilirse karo başına rastgele alt örnekleme yapılır
+    (ikisi de kopyalamadan önce, karo başına). Okunamayan dosyalar uyarıyla atlanır.
+
+    Dönüş: (N, 3) float64 dizi veya hiç nokta yoksa None. Karoların dizideki
+    sırası tamamlanma sırasıdır.
+    """
+    paths = list(paths)
+    if not paths:
+        return None
+
+    def probe(path):
+        # Üst sınır: başlık sayısı (alt örneklemede en fazla max_points_per_tile).
+        # Sayısı bilinmeyen karo burada okunur; taşma kopyası gerekmez
+        count = point_count(path)
+        if count is None:
+            pts = _load_points(path, region, max_points_per_tile)
+            return len(pts), pts
+        if max_points_per_tile is not None:
+            count = min(count, max_points_per_tile)
+        return count, None
+
+    bounds, preloaded = [], {}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(probe, path): path for path in paths}
+        for future in as_completed(futures):
+            try:
+                count, pts = future.result()
+            except Exception as e:
+                print(f"Uyarı: {futures[future]} okunurken hata oluştu: {e}")
+                paths.remove(futures[future])
+                continue
+            bounds.append(count)
+            if pts is not None:
+                preloaded[futures[future]] = pts
+    capacity = sum(bounds)
+    out = np.empty((capacity, 3), dtype=np.float64)
+
+    lock = threading.Lock()
+    filled = 0
+    overflow = []   # başlığından fazla nokta çıkan (tutarsız) karolar
+
+    def load_one(path):
+        nonlocal filled
+        pts = preloaded.pop(path, None)
+        if pts is None:
+            pts = _load_points(path, region, max_points_per_tile)
+        n = len(pts)
+        if n == 0:
+            return 0
+        with lock:
+            start = filled
+            fits = start + n <= capacity
+            if fits:
+                filled += n
+            else:
+                overflow.append(np.array(pts, dtype=np.float64))
+        if fits:
+            out[start:start + n] = pts
+        return n
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(load_one, path): path for path in paths}
+        for future in tqdm(as_completed(futures), total=len(futures), desc=desc or "Karolar yükleniyor"):
+            try:
+                future.result()
+            except Exception as e:
+                print(f"Uyarı: {futures[future]} okunurken hata oluştu: {e}")
+
+    if overflow:
+        out = np.concatenate([out[:filled], *overflow])
+    elif filled < capacity * TRIM_FRACTION:
+        # Bölge kırpması diziyi çoğunlukla boş bıraktı: görünüm tüm ayırmayı
+        # canlı tutardı, dolu kısım kopyalanır
+        out = out[:filled].copy()
+    elif filled < capacity:
+        out = out[:filled]
+    return out if len(out) else None
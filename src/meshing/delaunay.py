@@ -1,103 +1,330 @@
 # src/meshing/delaunay_mesh.py
 
 import os
+import sys
 import glob
+import time
+import argparse
+from functools import partial
 import open3d as o3d
 import numpy as np
-import laspy
 from scipy.spatial import Delaunay
-from tqdm import tqdm
-import json
 
-def create_mesh_from_las(tile_directory, meshes_output_dir):
+# src/ klasörünü import yoluna ekle (ortak modüller için)
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from common.parallel import run_parallel, print_summary
+from common.instrumentation import (
+    StageTimer, record_timings, profiled, enable_profiling,
+    report_from_summary, print_run_report, write_run_report
+)
+from common.incremental import load_tile_metadata, stage_is_current, record_stage
+from common.catalog import update_tile_metadata, tile_directories
+from common.point_cache import load_xyz
+from meshing.mesh_io import (
+    MESH_FORMATS, COORDINATE_CONVENTIONS, AXIS_LABELS,
+    apply_coordinate_convention, axis_frame, convert_axes, compute_vertex_normals, write_mesh
+)
+from meshing.seamless import neighbor_ground_files, triangulate_seamless
+
+# --- AYARLAR ---
+# "numpy": normaller NumPy ile hesaplanır ve OBJ doğrudan yazılır (Open3D'ye gidiş-dönüş yok)
+# "open3d": eski yol (TriangleMesh + compute_vertex_normals + write_triangle_mesh)
+NORMALS_BACKEND = "numpy"
+
+# Çıktı formatı: "obj" (metin, eski varsayılan) | "ply" (binary) | "glb" (binary glTF)
+MESH_FORMAT = "obj"
+# GLB için 16-bit kuantalanmış pozisyonlar (KHR_mesh_quantization)
+QUANTIZE_POSITIONS = False
+# Çıktı eksen düzeni; Unity için eksen değişimi yazmadan önce bellekte yapılır
+# (ayrı swapAxis.py geçişine gerek kalmaz)
+COORDINATE_CONVENTION = "y_up_unity"
+# Bindirme farkındalıklı mod: komşu karoların noktalarıyla üçgenle, çekirdek hücreye kırp
+# (bindirme bantlarında çift üçgen ve karo sınırlarında çatlak oluşmaz)
+SEAMLESS = False
+
+
+def build_mesh_arrays(points_3d):
+    """
+    Z-Up nokta dizisinden 2.5D Delaunay mesh dizilerini üretir (XY düzleminde
+    üçgenleme). Dönüş: (vertices, triangles, normals)
+    """
+    triangles = Delaunay(points_3d[:, :2]).simplices
+    normals = compute_vertex_normals(points_3d, triangles)
+    return points_3d, triangles, normals
+
+
+def mesh_params(normals_backend=NORMALS_BACKEND, mesh_format=MESH_FORMAT, quantize=QUANTIZE_POSITIONS,
+                convention=COORDINATE_CONVENTION, seamless=SEAMLESS):
+    """
+    Mesh çıktısını belirleyen parametreler (artımlı mod bunları karşılaştırır).
+    """
+    return {
+        "normals_backend": normals_backend,
+        "mesh_format": mesh_format,
+        "quantize": bool(quantize and mesh_format == "glb"),
+        "convention": convention,
+        "frame": axis_frame(convention, mesh_format),
+        "seamless": seamless
+    }
+
+
+def tile_origin(metadata):
+    """
+    Karonun yerel başlangıç noktası (bounds.local x_min, y_min, 0).
+    GLB pozisyonları bu noktaya göre saklanır; metadata yoksa None.
+    """
+    bounds = (metadata or {}).get("bounds", {}).get("local")
+    if not bounds:
+        return None
+    return (bounds["x_min"], bounds["y_min"], 0.0)
+
+
+def _mesh_result(tile_name, output_path, start_time, success, message,
+                 vertex_count=0, triangle_count=0, skipped=False, timings=None):
+    return {
+        "tile_name": tile_name,
+        "success": success,
+        "message": message,
+        "vertex_count": vertex_count,
+        "triangle_count": triangle_count,
+        "wall_time_sec": time.perf_counter() - start_time,
+        "output_path": output_path,
+        "skipped": skipped,
+        "timings": timings
+    }
+
+
+def create_mesh_from_las(tile_directory, meshes_output_dir,
+                         normals_backend=NORMALS_BACKEND, raise_errors=False,
+                         incremental=False, mesh_format=MESH_FORMAT,
+                         quantize=QUANTIZE_POSITIONS, convention=COORDINATE_CONVENTION,
+                         seamless=SEAMLESS):
     """
     Tile klasöründeki ground.las dosyasını okur, Delaunay uygular
     ve sonucu 'data/processed/meshes' altına kaydeder.
+
+    Dönüş: karo adı, başarı durumu, mesaj, vertex/üçgen sayıları ve
+    süre (sn) içeren dict. raise_errors=True ise hatalar yukarı fırlatılır.
+    incremental=True ise ground.las ve parametreler değişmediyse ve mesh
+    dosyası duruyorsa karo atlanır.
+    mesh_format: "obj" | "ply" | "glb"; quantize yalnızca GLB'de kullanılır
+    (karo başlangıcına göre 16-bit pozisyonlar).
+    convention: "z_up" | "y_up_unity" (eksen değişimi yazmadan önce; GLB'de sağ el
+    glTF düzeni, diğerlerinde Y/Z değişimi + sarım yönü, bkz. mesh_io.py).
+    seamless=True ise komşu karoların ground.las'ları bağlam olarak okunur ve
+    yalnızca karonun çekirdek hücresine düşen üçgenler yazılır (bkz. seamless.py).
     """
+    start_time = time.perf_counter()
+    timer = StageTimer()
+
     # Girdi: Tile içindeki ground.las
     input_las_path = os.path.join(tile_directory, "ground.las")
-    
+
     # Tile ismini klasör yolundan al (Örn: tile_0_0)
     tile_name = os.path.basename(os.path.normpath(tile_directory))
-    
+
     # Çıktı: Merkezi meshes klasörüne kaydet
-    output_obj_filename = f"{tile_name}.obj"
-    output_obj_path = os.path.join(meshes_output_dir, output_obj_filename)
-    
+    output_mesh_filename = f"{tile_name}.{mesh_format}"
+    output_mesh_path = os.path.join(meshes_output_dir, output_mesh_filename)
+    params = mesh_params(normals_backend, mesh_format, quantize, convention, seamless)
+
     if not os.path.exists(input_las_path):
-        return False, "ground.las bulunamadı"
+        return _mesh_result(tile_name, output_mesh_path, start_time, False, "ground.las bulunamadı")
+
+    metadata = load_tile_metadata(tile_directory)
+    inputs = {"ground": input_las_path}
+    if seamless:
+        if not metadata:
+            return _mesh_result(tile_name, output_mesh_path, start_time, False,
+                                "Kesintisiz mod için metadata.json gerekli")
+        inputs.update(neighbor_ground_files(tile_directory, metadata))
+
+    if incremental:
+        if stage_is_current(metadata, "mesh", inputs, [output_mesh_path], params):
+            mesh_info = metadata.get("mesh_info", {})
+            return _mesh_result(tile_name, output_mesh_path, start_time, True, "Güncel, atlandı",
+                                mesh_info.get("vertex_count", 0), mesh_info.get("triangle_count", 0),
+                                skipped=True)
 
     try:
         # 1. LAS Dosyasını Oku
-        las = laspy.read(input_las_path)
-        
-        if len(las.points) < 3:
-            return False, "Yetersiz nokta sayısı (<3)"
+        with timer.step("read"):
+            # Sütunlu önbellek varsa kopyasız memmap görünümü, yoksa LAS çözülür
+            points_3d = load_xyz(input_las_path)
 
-        # 2. Noktaları Al (Koordinatları DEĞİŞTİRME - Offset zaten yapıldı)
+        if len(points_3d) < 3:
+            return _mesh_result(tile_name, output_mesh_path, start_time, False, "Yetersiz nokta sayısı (<3)")
+
+        # 2. Noktalar (Koordinatları DEĞİŞTİRME - Offset zaten yapıldı)
         # points_3d: [x, y, z] (Z-Up sisteminde)
-        points_3d = np.vstack((las.x, las.y, las.z)).transpose()
-        
+        timer.count("points_in", len(points_3d))
+
         # 3. Delaunay Üçgenlemesi (XY düzleminde - 2.5D)
-        points_2d = points_3d[:, :2] 
-        tri = Delaunay(points_2d)
-        
-        # 4. Open3D Mesh Oluşturma
-        mesh = o3d.geometry.TriangleMesh()
-        mesh.vertices = o3d.utility.Vector3dVector(points_3d)
-        mesh.triangles = o3d.utility.Vector3iVector(tri.simplices)
-        
-        # 5. Mesh Optimizasyonu
-        mesh.compute_vertex_normals()
-        
-        # 6. OBJ Olarak Kaydet
-        o3d.io.write_triangle_mesh(output_obj_path, mesh)
-        
-        # 7. Metadata Güncelleme (Tile klasöründeki json güncellenir)
-        metadata_path = os.path.join(tile_directory, "metadata.json")
-        if os.path.exists(metadata_path):
-            with open(metadata_path, 'r+') as f:
-                metadata = json.load(f)
-                metadata['processing_status'] = 'meshed'
-                # Mesh dosyasının yolunu relative (göreceli) veya tam yol olarak kaydedebiliriz
-                # Burada dosya adını ve bulunduğu klasörü belirtiyoruz
-                metadata['files']['mesh_obj'] = {
-                    "filename": output_obj_filename,
-                    "path": f"../../meshes/{output_obj_filename}" # Tile klasöründen çıkıp meshes'a git
-                }
-                metadata['mesh_info'] = {
-                    "vertex_count": len(mesh.vertices),
-                    "triangle_count": len(mesh.triangles)
-                }
-                f.seek(0)
-                json.dump(metadata, f, indent=4)
-                f.truncate()
-                
-        return True, f"Mesh oluşturuldu: {output_obj_filename}"
-                
+        with timer.step("triangulate"):
+            if seamless:
+                # Komşu bağlamıyla üçgenle, yalnızca çekirdek hücre kalsın
+                points_3d, triangles = triangulate_seamless(tile_directory, metadata, points_3d)
+            else:
+                points_2d = points_3d[:, :2]
+                tri = Delaunay(points_2d)
+                triangles = tri.simplices
+
+        if normals_backend == "open3d" and mesh_format != "glb":
+            # 4. Open3D Mesh Oluşturma
+            mesh = o3d.geometry.TriangleMesh()
+            vertices, faces, _ = apply_coordinate_convention(points_3d, triangles, convention=convention,
+                                                             mesh_format=mesh_format)
+            mesh.vertices = o3d.utility.Vector3dVector(vertices)
+            mesh.triangles = o3d.utility.Vector3iVector(faces)
+
+            # 5. Mesh Optimizasyonu
+            with timer.step("normals"):
+                mesh.compute_vertex_normals()
+
+            # 6. OBJ/PLY Olarak Kaydet
+            with timer.step("write"):
+                o3d.io.write_triangle_mesh(output_mesh_path, mesh)
+        else:
+            # 4-6. Normaller NumPy ile, mesh doğrudan diziden yazılır
+            with timer.step("normals"):
+                normals = compute_vertex_normals(points_3d, triangles)
+            vertices, faces, normals = apply_coordinate_convention(points_3d, triangles, normals,
+                                                                   convention, mesh_format)
+            origin = tile_origin(metadata)
+            if origin is not None:
+                origin = convert_axes([origin], convention, mesh_format)[0]
+            with timer.step("write"):
+                write_mesh(output_mesh_path, mesh_format, vertices, faces, normals,
+                           quantize=quantize, origin=origin)
+
+        vertex_count = len(points_3d)
+        triangle_count = len(triangles)
+        timer.count("vertices", vertex_count)
+        timer.count("triangles", triangle_count)
+        timer.count("bytes_written", os.path.getsize(output_mesh_path))
+
+        # 7. Metadata Güncelleme (katalog + tile klasöründeki json)
+        def update(metadata):
+            metadata['processing_status'] = 'meshed'
+            metadata['coordinate_system']['axis'] = AXIS_LABELS[convention]
+            # Mesh dosyasının yolunu relative (göreceli) veya tam yol olarak kaydedebiliriz
+            # Burada dosya adını ve bulunduğu klasörü belirtiyoruz
+            metadata['files'][f'mesh_{mesh_format}'] = {
+                "filename": output_mesh_filename,
+                "path": f"../../meshes/{output_mesh_filename}" # Tile klasöründen çıkıp meshes'a git
+            }
+            metadata['mesh_info'] = {
+                "vertex_count": vertex_count,
+                "triangle_count": triangle_count
+            }
+            record_stage(metadata, "mesh", inputs, params)
+            record_timings(metadata, "mesh", timer)
+
+        update_tile_metadata(tile_directory, update)
+
+        return _mesh_result(tile_name, output_mesh_path, start_time, True,
+                            f"Mesh oluşturuldu: {output_mesh_filename}",
+                            vertex_count, triangle_count, timings=timer.as_dict())
+
     except Exception as e:
-        return False, str(e)
+        if raise_errors:
+            raise
+        return _mesh_result(tile_name, output_mesh_path, start_time, False, str(e))
+
+
+def create_meshes_parallel(tile_folders, meshes_output_dir, workers=None,
+                           normals_backend=NORMALS_BACKEND, incremental=False,
+                           mesh_format=MESH_FORMAT, quantize=QUANTIZE_POSITIONS,
+                           convention=COORDINATE_CONVENTION, seamless=SEAMLESS):
+    """
+    create_mesh_from_las'ı karolar üzerinde süreç havuzuyla çalıştırır.
+    Her karo için yapılandırılmış sonuç dict'i özetin "succeeded" listesinde döner.
+    """
+    return run_parallel(
+        profiled(partial(create_mesh_from_las, meshes_output_dir=meshes_output_dir,
+                normals_backend=normals_backend, raise_errors=True,
+                incremental=incremental, mesh_format=mesh_format, quantize=quantize,
+                convention=convention, seamless=seamless), "mesh"),
+        tile_folders,
+        workers=workers,
+        desc="Mesh Oluşturuluyor"
+    )
+
+
+def print_mesh_summary(summary):
+    """
+    Mesh sonuçlarını toplu olarak raporlar (atlanan karolar, toplam üçgen, en yavaş karolar).
+    """
+    results = [result for _, result in summary["succeeded"]]
+    meshed = [r for r in results if r["success"]]
+    not_meshed = [r for r in results if not r["success"]]
+
+    print_summary(summary, label="Mesh oluşturma")
+    up_to_date = sum(1 for r in meshed if r["skipped"])
+    print(f"Mesh üretilen: {len(meshed) - up_to_date}, güncel (atlanan): {up_to_date}, "
+          f"başarısız/atlanan: {len(not_meshed)}")
+    if meshed:
+        total_vertices = sum(r["vertex_count"] for r in meshed)
+        total_triangles = sum(r["triangle_count"] for r in meshed)
+        print(f"Toplam vertex: {total_vertices}, toplam üçgen: {total_triangles}")
+        slowest = sorted(meshed, key=lambda r: r["wall_time_sec"], reverse=True)[:5]
+        print("En yavaş karolar: " + ", ".join(f"{r['tile_name']} ({r['wall_time_sec']:.2f} sn)" for r in slowest))
+    for r in not_meshed:
+        print(f"  Atlandı ({r['tile_name']}): {r['message']}")
 
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Karoların ground.las dosyalarından Delaunay mesh üretir.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="Paralel süreç sayısı (1 = sıralı çalıştır).")
+    parser.add_argument("--normals", choices=["numpy", "open3d"], default=NORMALS_BACKEND,
+                        help="Normal hesaplama / OBJ yazma yolu.")
+    parser.add_argument("--format", choices=MESH_FORMATS, default=MESH_FORMAT,
+                        help="Mesh çıktı formatı (ply/glb binary yazılır).")
+    parser.add_argument("--quantize", action="store_true",
+                        help="GLB pozisyonlarını karo başlangıcına göre 16-bit kuantala.")
+    parser.add_argument("--convention", choices=COORDINATE_CONVENTIONS, default=COORDINATE_CONVENTION,
+                        help="Çıktı eksen düzeni (y_up_unity: OBJ/PLY için Y/Z değişimi + sarım yönü, GLB için sağ el glTF Y-Up).")
+    parser.add_argument("--seamless", action="store_true",
+                        help="Komşu karolarla bağlamlı üçgenle ve çekirdek hücreye kırp (çift üçgen/çatlak yok).")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Girdisi ve parametreleri değişmeyen karoları atla.")
+    parser.add_argument("--pending", action="store_true",
+                        help="Yalnızca henüz mesh'lenmemiş karoları işle (katalogdaki duruma göre).")
+    parser.add_argument("--profile", metavar="DIR", default=None,
+                        help="Her karoyu cProfile ile çalıştır, .prof dosyalarını DIR'e yaz.")
+    args = parser.parse_args()
+
+    if args.profile:
+        enable_profiling(args.profile)
+
     # Klasör Yolları
     processed_tiles_dir = os.path.join("data", "processed", "tiles")
     meshes_output_dir = os.path.join("data", "processed", "meshes")
-    
+
     # Çıktı klasörünü oluştur
     os.makedirs(meshes_output_dir, exist_ok=True)
-    
+
     # Tile klasörlerini bul
-    tile_folders = [f.path for f in os.scandir(processed_tiles_dir) if f.is_dir()]
+    tile_folders = tile_directories(processed_tiles_dir, pending="meshed" if args.pending else None)
 
     if not tile_folders:
         print(f"Hata: '{processed_tiles_dir}' içinde işlenecek karo klasörü bulunamadı.")
     else:
         print(f"Toplam {len(tile_folders)} karo işlenecek. Çıktılar '{meshes_output_dir}' klasörüne kaydedilecek.")
-        
-        with tqdm(total=len(tile_folders), desc="Mesh Oluşturuluyor") as pbar:
-            for tile_path in tile_folders:
-                success, msg = create_mesh_from_las(tile_path, meshes_output_dir)
-                pbar.update(1)
-        
+
+        summary = create_meshes_parallel(tile_folders, meshes_output_dir,
+                                         workers=args.workers, normals_backend=args.normals,
+                                         incremental=args.incremental,
+                                         mesh_format=args.format, quantize=args.quantize,
+                                         convention=args.convention, seamless=args.seamless)
+        print_mesh_summary(summary)
+
+        report = report_from_summary("mesh", summary)
+        print_run_report(report)
+        print(f"Rapor: {write_run_report(report)}")
+
         print(f"\nİşlem tamamlandı. Lütfen '{meshes_output_dir}' klasörünü kontrol edin.")
@@ -0,0 +1,305 @@
+# src/meshing/heightmap.py
+
+import os
+import sys
+import time
+import argparse
+from functools import partial
+import numpy as np
+from scipy.spatial import Delaunay
+from scipy.ndimage import distance_transform_edt
+
+# src/ klasörünü import yoluna ekle (ortak modüller için)
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from common.parallel import run_parallel, print_summary
+from common.incremental import load_tile_metadata, stage_is_current, record_stage
+from common.catalog import update_tile_metadata, tile_directories
+from common.point_cache import load_xyz
+
+# --- AYARLAR ---
+# Kenar başına düğüm sayısı. Düğümler karo sınırlarına oturur (x_min, x_min + c, ..., x_max),
+# böylece komşu karoların kenar örnekleri aynı konumdadır. Düğüm aralığı karo
+# boyutundan türetilir: 100 m / 128 -> 0.78125 m, 129 x 129.
+# Unity Terrain yalnızca (2^n + 1) kare çözünürlükleri kabul eder.
+DEM_RESOLUTION = 129
+# Sabit düğüm aralığı (m); None ise DEM_RESOLUTION'dan türetilir
+DEM_CELL_SIZE = None
+# Hücre değeri: "min" (en alçak nokta), "mean", "idw" (düğüme uzaklıkla ağırlıklı ortalama)
+DEM_METHOD = "mean"
+DEM_METHODS = ("min", "mean", "idw")
+IDW_POWER = 2.0
+# Çıktı: "raw16" (Unity Terrain için 16-bit little endian RAW) | "npy" (float32 yükseklik dizisi)
+DEM_FORMAT = "raw16"
+DEM_FORMATS = ("raw16", "npy")
+DEM_EXTENSIONS = {"raw16": "raw", "npy": "npy"}
+
+
+def heightmap_params(cell_size=DEM_CELL_SIZE, method=DEM_METHOD, raster_format=DEM_FORMAT,
+                     resolution=DEM_RESOLUTION):
+    return {"cell_size": cell_size, "resolution": resolution, "method": method, "format": raster_format}
+
+
+def is_terrain_resolution(n):
+    """
+    Unity Terrain çözünürlüğü mü: 2^k + 1 (33, 65, 129, 257, ...).
+    """
+    return n >= 3 and (n - 1) & (n - 2) == 0
+
+
+def tile_cell_size(bounds, resolution=DEM_RESOLUTION):
+    """
+    Karonun uzun kenarını (resolution - 1) aralığa bölen düğüm aralığı.
+    """
+    extent = max(bounds["x_max"] - bounds["x_min"], bounds["y_max"] - bounds["y_min"])
+    return extent / (resolution - 1)
+
+
+def check_terrain_shape(shape, raster_format=DEM_FORMAT):
+    """
+    raw16 çıktısı Unity Terrain'e aktarılır: ızgara kare ve (2^n + 1) olmalı.
+    """
+    height, width = shape
+    if raster_format == "raw16" and (height != width or not is_terrain_resolution(width)):
+        raise ValueError(f"Izgara {height}x{width}: raw16 (Unity Terrain) kare ve 2^n+1 "
+                         f"çözünürlük ister (ör. 129x129); --resolution kullanın veya --format npy seçin")
+
+
+def grid_shape(bounds, cell_size):
+    """
+    Karo sınırlarını kapsayan düğüm ızgarasının (satır, sütun) boyutu.
+    """
+    width = int(np.ceil((bounds["x_max"] - bounds["x_min"]) / cell_size - 1e-9)) + 1
+    height = int(np.ceil((bounds["y_max"] - bounds["y_min"]) / cell_size - 1e-9)) + 1
+    return height, width
+
+
+def bin_points(points_3d, bounds, cell_size, method=DEM_METHOD):
+    """
+    Noktaları en yakın ızgara düğümüne atar ve düğüm başına tek yükseklik üretir.
+    Boş düğümler NaN kalır. Satır 0 = y_min (güneyden kuzeye).
+    """
+    height, width = grid_shape(bounds, cell_size)
+    cols = np.rint((points_3d[:, 0] - bounds["x_min"]) / cell_size).astype(np.int64)
+    rows = np.rint((points_3d[:, 1] - bounds["y_min"]) / cell_size).astype(np.int64)
+    valid = (cols >= 0) & (cols < width) & (rows >= 0) & (rows < height)
+    cols, rows, z = cols[valid], rows[valid], points_3d[valid, 2]
+    keys = rows * width + cols
+    size = height * width
+
+    grid = np.full(size, np.nan)
+    if method == "min":
+        order = np.lexsort((z, keys))
+        sorted_keys = keys[order]
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = sorted_keys[1:] != sorted_keys[:-1]
+        grid[sorted_keys[first]] = z[order][first]
+    elif method in ("mean", "idw"):
+        if method == "mean":
+            weights = np.ones(len(z))
+        else:
+            dx = points_3d[valid, 0] - (bounds["x_min"] + cols * cell_size)
+            dy = points_3d[valid, 1] - (bounds["y_min"] + rows * cell_size)
+            weights = 1.0 / (np.hypot(dx, dy) ** IDW_POWER + 1e-6)
+        total = np.bincount(keys, weights=weights, minlength=size)
+        filled = total > 0
+        grid[filled] = np.bincount(keys, weights=weights * z, minlength=size)[filled] / total[filled]
+    else:
+        raise ValueError(f"Desteklenmeyen yöntem: {method}")
+
+    return grid.reshape(height, width)
+
+
+def fill_holes(grid, points_3d, bounds, cell_size):
+    """
+    Boş düğümleri ground noktalarının Delaunay üçgenlemesi üzerinde doğrusal
+    enterpolasyonla doldurur (mesh ile aynı yüzey). Konveks kabuk dışında kalanlar
+    en yakın dolu düğümün değerini alır.
+
+    Dönüş: (grid, doldurulan düğüm sayısı)
+    """
+    holes = np.isnan(grid)
+    hole_count = int(holes.sum())
+    if hole_count == 0:
+        return grid, 0
+
+    rows, cols = np.nonzero(holes)
+    xy = np.column_stack((bounds["x_min"] + cols * cell_size, bounds["y_min"] + rows * cell_size))
+
+    tri = Delaunay(points_3d[:, :2])
+    simplex = tri.find_simplex(xy)
+    inside = simplex >= 0
+    if inside.any():
+        transform = tri.transform[simplex[inside]]
+        bary = np.einsum("ijk,ik->ij", transform[:, :2], xy[inside] - transform[:, 2])
+        weights = np.column_stack((bary, 1.0 - bary.sum(axis=1)))
+        corner_z = points_3d[tri.simplices[simplex[inside]], 2]
+        grid[rows[inside], cols[inside]] = np.einsum("ij,ij->i", weights, corner_z)
+
+    remaining = np.isnan(grid)
+    if remaining.any() and not remaining.all():
+        _, (near_rows, near_cols) = distance_transform_edt(remaining, return_indices=True)
+        grid = grid[near_rows, near_cols]
+    return grid, hole_count
+
+
+def write_heightmap(path, grid, raster_format=DEM_FORMAT):
+    """
+    Yükseklik ızgarasını yazar. raw16: [z_min, z_max] aralığı 0..65535'e
+    ölçeklenir (Unity Terrain yüksekliği = z_max - z_min). npy: float32.
+    Dönüş: metadata'ya yazılacak ölçek bilgisi.
+    """
+    z_min, z_max = float(np.nanmin(grid)), float(np.nanmax(grid))
+    if raster_format == "raw16":
+        z_range = z_max - z_min
+        scaled = (grid - z_min) / z_range * 65535.0 if z_range > 0 else np.zeros_like(grid)
+        np.rint(scaled).astype("<u2").tofile(path)
+    elif raster_format == "npy":
+        np.save(path, grid.astype(np.float32))
+    else:
+        raise ValueError(f"Desteklenmeyen raster formatı: {raster_format}")
+    return {"z_min": z_min, "z_max": z_max}
+
+
+def _raster_result(tile_name, output_path, start_time, success, message,
+                   shape=None, filled=0, skipped=False):
+    return {
+        "tile_name": tile_name,
+        "success": success,
+        "message": message,
+        "shape": shape,
+        "filled_cells": filled,
+        "wall_time_sec": time.perf_counter() - start_time,
+        "output_path": output_path,
+        "skipped": skipped
+    }
+
+
+def create_heightmap_from_las(tile_directory, output_dir, cell_size=DEM_CELL_SIZE,
+                              method=DEM_METHOD, raster_format=DEM_FORMAT,
+                              raise_errors=False, incremental=False, resolution=DEM_RESOLUTION):
+    """
+    Karonun ground.las dosyasından düzenli ızgaralı yükseklik haritası üretir.
+    Izgara sınırları metadata.json'daki bounds.local'dan alınır; sonuç
+    '<output_dir>/tile_i_j.<raw|npy>' olarak yazılır ve ızgara tanımı
+    (origin, hücre boyutu, boyut, yükseklik ölçeği) metadata'ya eklenir.
+    cell_size verilmezse kenar başına resolution düğüm olacak şekilde türetilir.
+    raw16 için ızgara (2^n + 1) değilse ValueError (Unity Terrain içe aktaramaz).
+    """
+    start_time = time.perf_counter()
+    input_las_path = os.path.join(tile_directory, "ground.las")
+    tile_name = os.path.basename(os.path.normpath(tile_directory))
+    output_filename = f"{tile_name}.{DEM_EXTENSIONS[raster_format]}"
+    output_path = os.path.join(output_dir, output_filename)
+    params = heightmap_params(cell_size, method, raster_format, resolution)
+
+    if not os.path.exists(input_las_path):
+        return _raster_result(tile_name, output_path, start_time, False, "ground.las bulunamadı")
+
+    metadata = load_tile_metadata(tile_directory)
+    if not metadata:
+        return _raster_result(tile_name, output_path, start_time, False, "metadata.json bulunamadı")
+    if incremental and stage_is_current(metadata, "heightmap", {"ground": input_las_path},
+                                        [output_path], params):
+        info = metadata.get("heightmap", {})
+        return _raster_result(tile_name, output_path, start_time, True, "Güncel, atlandı",
+                              info.get("shape"), skipped=True)
+
+    try:
+        points_3d = load_xyz(input_las_path)
+        if len(points_3d) < 3:
+            return _raster_result(tile_name, output_path, start_time, False, "Yetersiz nokta sayısı (<3)")
+
+        bounds = metadata["bounds"]["local"]
+        cell_size = cell_size or tile_cell_size(bounds, resolution)
+        check_terrain_shape(grid_shape(bounds, cell_size), raster_format)
+        grid = bin_points(points_3d, bounds, cell_size, method)
+        grid, filled = fill_holes(grid, points_3d, bounds, cell_size)
+        scale_info = write_heightmap(output_path, grid, raster_format)
+
+        heightmap_info = {
+            "filename": output_filename,
+            "path": f"../../heightmaps/{output_filename}",
+            "format": raster_format,
+            "dtype": "uint16_le" if raster_format == "raw16" else "float32",
+            "shape": list(grid.shape),
+            "origin": [bounds["x_min"], bounds["y_min"]],
+            "cell_size": cell_size,
+            "registration": "node",
+            "row_order": "south_to_north",
+            "method": method,
+            "filled_cells": filled,
+            **scale_info
+        }
+        def update(metadata):
+            metadata['files']['heightmap'] = {
+                "filename": output_filename,
+                "path": heightmap_info["path"]
+            }
+            metadata['heightmap'] = heightmap_info
+            record_stage(metadata, "heightmap", {"ground": input_las_path}, params)
+
+        update_tile_metadata(tile_directory, update)
+
+        return _raster_result(tile_name, output_path, start_time, True,
+                              f"Yükseklik haritası oluşturuldu: {output_filename}",
+                              list(grid.shape), filled)
+
+    except Exception as e:
+        if raise_errors:
+            raise
+        return _raster_result(tile_name, output_path, start_time, False, str(e))
+
+
+def create_heightmaps_parallel(tile_folders, output_dir, workers=None, cell_size=DEM_CELL_SIZE,
+                               method=DEM_METHOD, raster_format=DEM_FORMAT, incremental=False,
+                               resolution=DEM_RESOLUTION):
+    """
+    create_heightmap_from_las'ı karolar üzerinde süreç havuzuyla çalıştırır.
+    """
+    return run_parallel(
+        partial(create_heightmap_from_las, output_dir=output_dir, cell_size=cell_size,
+                method=method, raster_format=raster_format, raise_errors=True,
+                incremental=incremental, resolution=resolution),
+        tile_folders,
+        workers=workers,
+        desc="Yükseklik Haritası"
+    )
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Karoların ground.las dosyalarından DEM / yükseklik haritası üretir.")
+    parser.add_argument("--resolution", type=int, default=DEM_RESOLUTION,
+                        help="Kenar başına düğüm sayısı (raw16 için 2^n+1: 33, 65, 129, 257...).")
+    parser.add_argument("--cell_size", type=float, default=DEM_CELL_SIZE,
+                        help="Sabit düğüm aralığı (m); verilirse --resolution yerine kullanılır.")
+    parser.add_argument("--method", choices=DEM_METHODS, default=DEM_METHOD)
+    parser.add_argument("--format", choices=DEM_FORMATS, default=DEM_FORMAT)
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="Paralel süreç sayısı (1 = sıralı çalıştır).")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Girdisi ve parametreleri değişmeyen karoları atla.")
+    args = parser.parse_args()
+    if args.cell_size is None and args.format == "raw16" and not is_terrain_resolution(args.resolution):
+        parser.error("--resolution raw16 (Unity Terrain) için 2^n+1 olmalı (ör. 129, 257).")
+
+    processed_tiles_dir = os.path.join("data", "processed", "tiles")
+    heightmaps_output_dir = os.path.join("data", "processed", "heightmaps")
+    os.makedirs(heightmaps_output_dir, exist_ok=True)
+
+    tile_folders = tile_directories(processed_tiles_dir)
+
+    if not tile_folders:
+        print(f"Hata: '{processed_tiles_dir}' içinde işlenecek karo klasörü bulunamadı.")
+    else:
+        print(f"Toplam {len(tile_folders)} karo rasterlaştırılacak. Çıktılar '{heightmaps_output_dir}' klasörüne kaydedilecek.")
+        summary = create_heightmaps_parallel(tile_folders, heightmaps_output_dir, workers=args.workers,
+                                             cell_size=args.cell_size, method=args.method,
+                                             raster_format=args.format, incremental=args.incremental,
+                                             resolution=args.resolution)
+        print_summary(summary, label="Yükseklik haritası")
+        for _, r in summary["succeeded"]:
+            if not r["success"]:
+                print(f"  Atlandı ({r['tile_name']}): {r['message']}")
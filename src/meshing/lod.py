@@ -0,0 +1,289 @@
+# src/meshing/lod.py
+
+import os
+import sys
+import time
+import argparse
+from functools import partial
+import numpy as np
+from scipy.spatial import Delaunay, QhullError
+
+# src/ klasörünü import yoluna ekle (ortak modüller için)
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from common.parallel import run_parallel
+from common.incremental import load_tile_metadata, stage_is_current, record_stage
+from common.catalog import update_tile_metadata, tile_directories
+from common.point_cache import load_xyz
+from meshing.mesh_io import (
+    MESH_FORMATS, COORDINATE_CONVENTIONS, AXIS_LABELS,
+    apply_coordinate_convention, axis_frame, convert_axes, compute_vertex_normals, write_mesh
+)
+from meshing.delaunay import (
+    MESH_FORMAT, COORDINATE_CONVENTION, tile_origin,
+    _mesh_result, print_mesh_summary
+)
+
+# --- AYARLAR ---
+# LOD sayısı: lod0 tam çözünürlük, lodK ground.las'ın (LOD_BASE_CELL * 2^(K-1)) m'lik
+# XY ızgarasına seyreltilmiş hali (hücre başına merkeze en yakın nokta + kenar noktaları)
+LOD_LEVELS = 4
+LOD_BASE_CELL = 1.0
+
+# Ekran uzayı hatası (SSE) için referans kamera: geometrik hata (m) bu mesafeden
+# bu çözünürlük/FOV ile bakıldığında kaç piksele denk gelir
+SSE_REFERENCE_DISTANCE = 100.0
+SSE_SCREEN_HEIGHT = 1080
+SSE_FOV_DEG = 60.0
+# Streamer'ın LOD geçiş mesafesi: hata bu pikselin altına indiği mesafe
+SSE_THRESHOLD_PX = 2.0
+
+
+def lod_params(levels=LOD_LEVELS, base_cell=LOD_BASE_CELL, mesh_format=MESH_FORMAT,
+               convention=COORDINATE_CONVENTION):
+    return {
+        "levels": levels,
+        "base_cell": base_cell,
+        "mesh_format": mesh_format,
+        "convention": convention,
+        "frame": axis_frame(convention, mesh_format)
+    }
+
+
+def lod_cell_size(level, base_cell=LOD_BASE_CELL):
+    """
+    LOD seviyesinin ızgara hücre boyutu (m); lod0 için None (seyreltme yok).
+    """
+    return None if level == 0 else base_cell * 2 ** (level - 1)
+
+
+def _argmin_per_key(keys, score):
+    """
+    Her anahtar (hücre) için score'u en küçük elemanın indeksi (döngüsüz:
+    anahtar + skora göre lexsort, anahtar başına ilk eleman).
+    """
+    order = np.lexsort((score, keys))
+    sorted_keys = keys[order]
+    first = np.ones(len(order), dtype=bool)
+    first[1:] = sorted_keys[1:] != sorted_keys[:-1]
+    return order[first]
+
+
+def grid_decimate(points_3d, cell_size):
+    """
+    Noktaları XY ızgarasına göre seyreltir: her dolu hücreden hücre merkezine
+    en yakın gerçek nokta tutulur (yükseklikler ortalanmaz).
+    Kenar hücrelerinde ayrıca karo kenarına en yakın nokta da tutulur; aksi halde
+    seyreltilmiş kümenin sınırı içe çekilir ve kenar boyunca uzun, ince üçgenler oluşur.
+    """
+    xy = points_3d[:, :2]
+    origin = xy.min(axis=0)
+    cells = np.floor((xy - origin) / cell_size).astype(np.int64)
+    centers = origin + (cells + 0.5) * cell_size
+    dist = np.einsum("ij,ij->i", xy - centers, xy - centers)
+
+    cell_keys = cells[:, 0] * (cells[:, 1].max() + 1) + cells[:, 1]
+    keep = [_argmin_per_key(cell_keys, dist)]
+
+    for axis in (0, 1):
+        for edge, sign in ((0, 1.0), (cells[:, axis].max(), -1.0)):
+            on_edge = np.flatnonzero(cells[:, axis] == edge)
+            keep.append(on_edge[_argmin_per_key(cells[on_edge, 1 - axis], sign * xy[on_edge, axis])])
+
+    return points_3d[np.unique(np.concatenate(keep))]
+
+
+def vertical_error(tri, lod_points, full_points):
+    """
+    Tam çözünürlüklü noktaların LOD yüzeyine (üçgenler üzerinde doğrusal
+    enterpolasyon) göre en büyük dikey sapması (m). Konveks kabuk dışında
+    kalan noktalar yok sayılır.
+    """
+    xy = full_points[:, :2]
+    simplex = tri.find_simplex(xy)
+    inside = simplex >= 0
+    if not inside.any():
+        return 0.0
+    simplex, xy, z = simplex[inside], xy[inside], full_points[inside, 2]
+
+    transform = tri.transform[simplex]
+    bary = np.einsum("ijk,ik->ij", transform[:, :2], xy - transform[:, 2])
+    weights = np.column_stack((bary, 1.0 - bary.sum(axis=1)))
+    z_lod = np.einsum("ij,ij->i", weights, lod_points[tri.simplices[simplex], 2])
+    return float(np.abs(z_lod - z).max())
+
+
+def screen_space_error(geometric_error, distance=SSE_REFERENCE_DISTANCE,
+                       screen_height=SSE_SCREEN_HEIGHT, fov_deg=SSE_FOV_DEG):
+    """
+    Geometrik hatanın (m) verilen mesafeden ekranda kapladığı piksel sayısı.
+    """
+    return geometric_error * screen_height / (2.0 * distance * np.tan(np.radians(fov_deg) / 2.0))
+
+
+def switch_distance(geometric_error, threshold_px=SSE_THRESHOLD_PX,
+                    screen_height=SSE_SCREEN_HEIGHT, fov_deg=SSE_FOV_DEG):
+    """
+    Ekran uzayı hatasının threshold_px'e indiği kamera mesafesi (m).
+    """
+    return geometric_error * screen_height / (2.0 * threshold_px * np.tan(np.radians(fov_deg) / 2.0))
+
+
+def create_lods_from_las(tile_directory, meshes_output_dir, levels=LOD_LEVELS,
+                         base_cell=LOD_BASE_CELL, mesh_format=MESH_FORMAT,
+                         convention=COORDINATE_CONVENTION, raise_errors=False,
+                         incremental=False):
+    """
+    Karonun ground.las dosyasından LOD piramidi üretir:
+    <meshes>/tile_i_j_lod0..N.<format>. Her seviye için vertex/üçgen sayısı,
+    geometrik hata ve ekran uzayı hatası metadata.json'daki 'lods' listesine yazılır.
+
+    Dönüş: delaunay.create_mesh_from_las ile aynı yapıda sonuç dict'i
+    (vertex/üçgen sayıları tüm seviyelerin toplamıdır).
+    """
+    start_time = time.perf_counter()
+    input_las_path = os.path.join(tile_directory, "ground.las")
+    tile_name = os.path.basename(os.path.normpath(tile_directory))
+    filenames = [f"{tile_name}_lod{level}.{mesh_format}" for level in range(levels)]
+    output_paths = [os.path.join(meshes_output_dir, name) for name in filenames]
+    params = lod_params(levels, base_cell, mesh_format, convention)
+
+    if not os.path.exists(input_las_path):
+        return _mesh_result(tile_name, output_paths[0], start_time, False, "ground.las bulunamadı")
+
+    metadata = load_tile_metadata(tile_directory)
+    # Dejenere seviyeler yazılmaz; güncellik yalnızca kayıtlı seviyelerin dosyalarıyla ölçülür
+    lods = (metadata or {}).get("lods", [])
+    recorded_paths = [os.path.join(meshes_output_dir, l["filename"]) for l in lods]
+    if incremental and lods and stage_is_current(metadata, "lod", {"ground": input_las_path},
+                                                 recorded_paths, params):
+        return _mesh_result(tile_name, output_paths[0], start_time, True, "Güncel, atlandı",
+                            sum(l["vertex_count"] for l in lods),
+                            sum(l["triangle_count"] for l in lods), skipped=True)
+
+    try:
+        full_points = load_xyz(input_las_path)
+        if len(full_points) < 3:
+            return _mesh_result(tile_name, output_paths[0], start_time, False, "Yetersiz nokta sayısı (<3)")
+
+        origin = tile_origin(metadata)
+        if origin is not None:
+            origin = convert_axes([origin], convention, mesh_format)[0]
+
+        lods = []
+        written = []
+        for level, (filename, output_path) in enumerate(zip(filenames, output_paths)):
+            cell_size = lod_cell_size(level, base_cell)
+            points_3d = full_points if cell_size is None else grid_decimate(full_points, cell_size)
+            if len(points_3d) < 3:
+                continue
+            try:
+                tri = Delaunay(points_3d[:, :2])
+            except QhullError:
+                # Seyreltme sonrası doğrusal kalan seviye: atla, karoyu düşürme
+                continue
+
+            triangles = tri.simplices
+            normals = compute_vertex_normals(points_3d, triangles)
+            geometric_error = 0.0 if cell_size is None else vertical_error(tri, points_3d, full_points)
+
+            write_mesh(output_path, mesh_format,
+                       *apply_coordinate_convention(points_3d, triangles, normals, convention, mesh_format),
+                       origin=origin)
+            lods.append({
+                "level": level,
+                "filename": filename,
+                "path": f"../../meshes/{filename}",
+                "cell_size": cell_size,
+                "vertex_count": len(points_3d),
+                "triangle_count": len(triangles),
+                "geometric_error_m": geometric_error,
+                "screen_space_error_px": float(screen_space_error(geometric_error)),
+                "switch_distance_m": float(switch_distance(geometric_error))
+            })
+            written.append(output_path)
+
+        # Önceki çalıştırmadan kalan, bu sefer yazılmayan seviyeler streamer'ı yanıltmasın
+        for output_path in set(output_paths) | set(recorded_paths):
+            if output_path not in written and os.path.exists(output_path):
+                os.remove(output_path)
+
+        if not lods:
+            def clear(metadata):
+                metadata.pop('lods', None)
+
+            update_tile_metadata(tile_directory, clear)
+            return _mesh_result(tile_name, output_paths[0], start_time, False,
+                                "Hiçbir LOD seviyesi üçgenlenemedi")
+
+        def update(metadata):
+            metadata['coordinate_system']['axis'] = AXIS_LABELS[convention]
+            metadata['lods'] = lods
+            metadata['lod_reference_camera'] = {
+                "distance_m": SSE_REFERENCE_DISTANCE,
+                "screen_height_px": SSE_SCREEN_HEIGHT,
+                "fov_deg": SSE_FOV_DEG,
+                "threshold_px": SSE_THRESHOLD_PX
+            }
+            record_stage(metadata, "lod", {"ground": input_las_path}, params)
+
+        update_tile_metadata(tile_directory, update)
+
+        return _mesh_result(tile_name, written[0], start_time, True,
+                            f"{len(lods)} LOD oluşturuldu",
+                            sum(l["vertex_count"] for l in lods),
+                            sum(l["triangle_count"] for l in lods))
+
+    except Exception as e:
+        if raise_errors:
+            raise
+        return _mesh_result(tile_name, output_paths[0], start_time, False, str(e))
+
+
+def create_lods_parallel(tile_folders, meshes_output_dir, workers=None, levels=LOD_LEVELS,
+                         base_cell=LOD_BASE_CELL, mesh_format=MESH_FORMAT,
+                         convention=COORDINATE_CONVENTION, incremental=False):
+    """
+    create_lods_from_las'ı karolar üzerinde süreç havuzuyla çalıştırır.
+    """
+    return run_parallel(
+        partial(create_lods_from_las, meshes_output_dir=meshes_output_dir, levels=levels,
+                base_cell=base_cell, mesh_format=mesh_format, convention=convention,
+                raise_errors=True, incremental=incremental),
+        tile_folders,
+        workers=workers,
+        desc="LOD Oluşturuluyor"
+    )
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Karoların ground.las dosyalarından LOD mesh piramidi üretir.")
+    parser.add_argument("--levels", type=int, default=LOD_LEVELS,
+                        help="LOD sayısı (lod0 tam çözünürlük).")
+    parser.add_argument("--base_cell", type=float, default=LOD_BASE_CELL,
+                        help="lod1 ızgara hücre boyutu (m); her seviyede iki katına çıkar.")
+    parser.add_argument("--format", choices=MESH_FORMATS, default=MESH_FORMAT)
+    parser.add_argument("--convention", choices=COORDINATE_CONVENTIONS, default=COORDINATE_CONVENTION)
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="Paralel süreç sayısı (1 = sıralı çalıştır).")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Girdisi ve parametreleri değişmeyen karoları atla.")
+    args = parser.parse_args()
+
+    processed_tiles_dir = os.path.join("data", "processed", "tiles")
+    meshes_output_dir = os.path.join("data", "processed", "meshes")
+    os.makedirs(meshes_output_dir, exist_ok=True)
+
+    tile_folders = tile_directories(processed_tiles_dir)
+
+    if not tile_folders:
+        print(f"Hata: '{processed_tiles_dir}' içinde işlenecek karo klasörü bulunamadı.")
+    else:
+        print(f"Toplam {len(tile_folders)} karo için {args.levels} seviyeli LOD üretilecek.")
+        summary = create_lods_parallel(tile_folders, meshes_output_dir, workers=args.workers,
+                                       levels=args.levels, base_cell=args.base_cell,
+                                       mesh_format=args.format, convention=args.convention,
+                                       incremental=args.incremental)
+        print_mesh_summary(summary)
@@ -0,0 +1,345 @@
+# src/meshing/mesh_io.py
+
+import os
+import re
+import json
+import struct
+import numpy as np
+
+# Büyük mesh'lerde bellek kullanımını sınırlamak için satırlar bu boyutta bloklar halinde yazılır
+WRITE_BLOCK_ROWS = 200_000
+
+# Mesh çıktısının eksen düzeni:
+#   "z_up": LAS ile aynı (sağ el, Z yukarı)
+#   "y_up_unity": Unity (Y yukarı). OBJ/PLY'de [X, Z, Y] (sol el, Unity'nin kendi
+#   düzeni; yansıma olduğundan sarım yönü de çevrilir). GLB'de glTF'in istediği
+#   sağ el Y-Up [X, Z, -Y] yazılır (dönme, sarım korunur); Unity glTF içe
+#   aktarıcıları sol ele kendisi çevirir
+COORDINATE_CONVENTIONS = ("z_up", "y_up_unity")
+# metadata.json 'coordinate_system.axis' değerleri
+AXIS_LABELS = {"z_up": "z_up", "y_up_unity": "y_up (unity_ready)"}
+
+
+def zup_to_yup(array):
+    """
+    (N, 3) dizide Z-Up -> Y-Up eksen değişimi: [X, Y, Z] -> [X, Z, Y].
+    Vertex ve normal dizileri için aynıdır.
+    """
+    # [:, [0, 2, 1]] ifadesi 0. sütunu korur, 1. ve 2. sütunu yer değiştirir.
+    return np.asarray(array)[:, [0, 2, 1]]
+
+
+def zup_to_gltf(array):
+    """
+    (N, 3) dizide Z-Up -> glTF (sağ el, Y-Up) eksen değişimi: [X, Y, Z] -> [X, Z, -Y].
+    X ekseni etrafında -90° dönmedir (yansıma değil); vertex, normal ve
+    düğüm başlangıcı için aynıdır.
+    """
+    array = np.asarray(array)
+    return np.column_stack((array[:, 0], array[:, 2], -array[:, 1]))
+
+
+def convert_axes(array, convention="z_up", mesh_format=None):
+    """
+    (N, 3) Z-Up diziyi (vertex, normal veya karo başlangıcı) hedef eksen
+    düzenine çevirir; sarım yönüne dokunmaz (bkz. apply_coordinate_convention).
+    """
+    if convention == "z_up":
+        return np.asarray(array)
+    if convention != "y_up_unity":
+        raise ValueError(f"Desteklenmeyen eksen düzeni: {convention}")
+    return zup_to_gltf(array) if mesh_format == "glb" else zup_to_yup(array)
+
+
+def axis_frame(convention="z_up", mesh_format=None):
+    """
+    Dosyaya yazılan eksen çerçevesinin adı (artımlı mod parametrelerine girer).
+    """
+    if convention == "y_up_unity":
+        return "y_up_right_handed" if mesh_format == "glb" else "y_up_left_handed"
+    return "z_up_right_handed"
+
+
+def apply_coordinate_convention(vertices, triangles, normals=None, convention="z_up", mesh_format=None):
+    """
+    Z-Up mesh dizilerini yazmadan önce bellekte hedef eksen düzenine çevirir.
+    "y_up_unity" için OBJ/PLY'de Y ve Z yer değiştirir; bu bir yansıma olduğundan
+    (el yönü değişir) üçgenlerin sarım yönü de ters çevrilir, böylece yüzler
+    normallerle tutarlı şekilde yukarı bakmaya devam eder. mesh_format="glb"
+    ise glTF'in sağ el Y-Up düzenine döndürülür ve sarım korunur.
+
+    Dönüş: (vertices, triangles, normals)
+    """
+    if convention == "z_up":
+        return vertices, triangles, normals
+
+    vertices = convert_axes(vertices, convention, mesh_format)
+    if normals is not None:
+        normals = convert_axes(normals, convention, mesh_format)
+    if mesh_format != "glb":
+        triangles = np.asarray(triangles)[:, [0, 2, 1]]
+    return vertices, triangles, normals
+
+
+def compute_vertex_normals(vertices, triangles):
+    """
+    Open3D'nin compute_vertex_normals davranışının vektörel NumPy karşılığı:
+    her üçgenin normalize edilmemiş normali (çapraz çarpım, uzunluğu alanın
+    iki katı) köşelerine eklenir ve sonuç normalize edilir; yani alan
+    ağırlıklıdır. Dış kabuktaki ince şerit üçgenler köşe normalini bozmaz.
+    """
+    vertices = np.asarray(vertices, dtype=np.float64)
+    triangles = np.asarray(triangles)
+    v0 = vertices[triangles[:, 0]]
+    v1 = vertices[triangles[:, 1]]
+    v2 = vertices[triangles[:, 2]]
+
+    tri_normals = np.cross(v1 - v0, v2 - v0)
+
+    # np.add.at yerine bileşen başına bincount (çok daha hızlı)
+    flat_idx = triangles.ravel()
+    vertex_normals = np.empty_like(vertices, dtype=np.float64)
+    for c in range(3):
+        vertex_normals[:, c] = np.bincount(
+            flat_idx, weights=np.repeat(tri_normals[:, c], 3), minlength=len(vertices)
+        )
+
+    lengths = np.linalg.norm(vertex_normals, axis=1, keepdims=True)
+    return np.divide(vertex_normals, lengths, out=np.zeros_like(vertex_normals), where=lengths > 0)
+
+
+def _write_rows(f, fmt, array):
+    """
+    (N, k) diziyi her satır için 'fmt' kalıbıyla bloklar halinde yazar.
+    Biçimlendirme tek bir '%' işlemiyle C tarafında yapılır (satır başına Python döngüsü yok).
+    """
+    for start in range(0, len(array), WRITE_BLOCK_ROWS):
+        block = array[start:start + WRITE_BLOCK_ROWS]
+        f.write((fmt * len(block)) % tuple(block.ravel()))
+
+
+def write_obj(obj_path, vertices, triangles, normals=None):
+    """
+    Vertex, üçgen ve (opsiyonel) normal dizilerini Open3D'ye gerek kalmadan
+    ASCII OBJ olarak yazar. Yüz indeksleri OBJ standardına göre 1'den başlar.
+    """
+    vertices = np.asarray(vertices, dtype=np.float64)
+    triangles = np.asarray(triangles, dtype=np.int64) + 1
+
+    with open(obj_path, "w") as f:
+        f.write(f"# object name: {os.path.splitext(os.path.basename(obj_path))[0]}\n")
+        f.write(f"# number of vertices: {len(vertices)}\n")
+        f.write(f"# number of triangles: {len(triangles)}\n")
+
+        _write_rows(f, "v %.6f %.6f %.6f\n", vertices)
+
+        if normals is not None:
+            _write_rows(f, "vn %.6f %.6f %.6f\n", np.asarray(normals, dtype=np.float64))
+            # Her vertex kendi normaline sahip: f v//vn
+            faces = np.repeat(triangles, 2, axis=1)
+            _write_rows(f, "f %d//%d %d//%d %d//%d\n", faces)
+        else:
+            _write_rows(f, "f %d %d %d\n", triangles)
+
+
+def read_obj(obj_path):
+    """
+    write_obj'un yazdığı (veya Open3D'nin ürettiği) üçgen OBJ'yi Open3D'siz okur.
+    Satırlar önekine göre ayrılır ve her grup tek seferde NumPy'a çevrilir.
+
+    Dönüş: (vertices, triangles, normals) -- normal yoksa normals None
+    """
+    with open(obj_path, "r") as f:
+        lines = f.read().splitlines()
+
+    vertex_text = " ".join(line[2:] for line in lines if line.startswith("v "))
+    normal_text = " ".join(line[3:] for line in lines if line.startswith("vn "))
+    # "a//a", "a/t/n" gibi yüz öğelerinde yalnızca vertex indeksi kalır
+    face_text = re.sub(r"/\S*", "", " ".join(line[2:] for line in lines if line.startswith("f ")))
+
+    vertices = np.array(vertex_text.split(), dtype=np.float64).reshape(-1, 3)
+    triangles = np.array(face_text.split(), dtype=np.int64).reshape(-1, 3) - 1
+    normals = np.array(normal_text.split(), dtype=np.float64).reshape(-1, 3) if normal_text else None
+    return vertices, triangles, normals
+
+
+def write_ply(ply_path, vertices, triangles, normals=None):
+    """
+    Binary (little endian) PLY yazar. Vertex'ler float32 (yerel, merkezlenmiş
+    koordinatlarda hassasiyet yeterli), yüzler 'uchar count + 3 x int32'.
+    Tüm gövde NumPy yapılandırılmış dizileriyle tek seferde yazılır.
+    """
+    vertices = np.asarray(vertices)
+    triangles = np.asarray(triangles)
+
+    vertex_fields = [("x", "<f4"), ("y", "<f4"), ("z", "<f4")]
+    if normals is not None:
+        vertex_fields += [("nx", "<f4"), ("ny", "<f4"), ("nz", "<f4")]
+    vertex_data = np.empty(len(vertices), dtype=vertex_fields)
+    vertex_data["x"], vertex_data["y"], vertex_data["z"] = vertices.T
+    if normals is not None:
+        normals = np.asarray(normals)
+        vertex_data["nx"], vertex_data["ny"], vertex_data["nz"] = normals.T
+
+    face_data = np.empty(len(triangles), dtype=[("count", "u1"), ("indices", "<i4", (3,))])
+    face_data["count"] = 3
+    face_data["indices"] = triangles
+
+    header = ["ply", "format binary_little_endian 1.0", f"element vertex {len(vertices)}"]
+    header += [f"property float {name}" for name, _ in vertex_fields]
+    header += [f"element face {len(triangles)}", "property list uchar int vertex_indices", "end_header"]
+
+    with open(ply_path, "wb") as f:
+        f.write(("\n".join(header) + "\n").encode("ascii"))
+        f.write(vertex_data.tobytes())
+        f.write(face_data.tobytes())
+
+
+# glTF sabitleri
+_GLTF_ARRAY_BUFFER = 34962
+_GLTF_ELEMENT_ARRAY_BUFFER = 34963
+_GLTF_BYTE = 5120
+_GLTF_UNSIGNED_SHORT = 5123
+_GLTF_UNSIGNED_INT = 5125
+_GLTF_FLOAT = 5126
+
+
+def _pad4(data, fill=b"\x00"):
+    return data + fill * (-len(data) % 4)
+
+
+def write_glb(glb_path, vertices, triangles, normals=None, quantize=False, origin=None):
+    """
+    Tek mesh'li binary glTF (GLB) yazar.
+
+    - Pozisyonlar origin'e (karo başlangıcı) göre yerel saklanır; origin
+      düğümün translation değerine yazılır.
+    - quantize=True ise pozisyonlar 16-bit (UNSIGNED_SHORT), normaller 8-bit
+      (normalized BYTE) saklanır (KHR_mesh_quantization). Kuantalama adımı
+      düğümün scale değeriyle geri alınır; vertex başına 24 yerine 12 bayt.
+    """
+    vertices = np.asarray(vertices, dtype=np.float64)
+    triangles = np.asarray(triangles)
+    origin = np.zeros(3) if origin is None else np.asarray(origin, dtype=np.float64)
+    local = vertices - origin
+
+    binary = bytearray()
+    buffer_views = []
+    accessors = []
+
+    def add_accessor(data, target, component_type, count, byte_stride=None,
+                     normalized=False, min_max=None, accessor_type="VEC3"):
+        binary.extend(b"\x00" * (-len(binary) % 4))
+        view = {"buffer": 0, "byteOffset": len(binary), "byteLength": len(data), "target": target}
+        if byte_stride:
+            view["byteStride"] = byte_stride
+        binary.extend(data)
+        buffer_views.append(view)
+
+        accessor = {
+            "bufferView": len(buffer_views) - 1,
+            "componentType": component_type,
+            "count": count,
+            "type": accessor_type
+        }
+        if normalized:
+            accessor["normalized"] = True
+        if min_max is not None:
+            accessor["min"], accessor["max"] = min_max
+        accessors.append(accessor)
+        return len(accessors) - 1
+
+    node = {"mesh": 0}
+    attributes = {}
+    if quantize:
+        lo = local.min(axis=0)
+        extent = local.max(axis=0) - lo
+        step = np.where(extent > 0, extent, 1.0) / 65535.0
+        quantized = np.round((local - lo) / step).astype(np.uint16)
+
+        # Vertex öznitelikleri 4 bayta hizalı olmalı: ushort3 -> 8 baytlık adım
+        packed = np.zeros((len(quantized), 4), dtype="<u2")
+        packed[:, :3] = quantized
+        attributes["POSITION"] = add_accessor(
+            packed.tobytes(), _GLTF_ARRAY_BUFFER, _GLTF_UNSIGNED_SHORT, len(quantized),
+            byte_stride=8,
+            min_max=(quantized.min(axis=0).tolist(), quantized.max(axis=0).tolist())
+        )
+        node["translation"] = (origin + lo).tolist()
+        node["scale"] = step.tolist()
+    else:
+        positions = local.astype("<f4")
+        attributes["POSITION"] = add_accessor(
+            positions.tobytes(), _GLTF_ARRAY_BUFFER, _GLTF_FLOAT, len(positions),
+            min_max=(positions.min(axis=0).tolist(), positions.max(axis=0).tolist())
+        )
+        node["translation"] = origin.tolist()
+
+    if normals is not None:
+        normals = np.asarray(normals, dtype=np.float64)
+        if quantize:
+            # Düğüm ölçeği normalleri diag(1/scale) ile çarpar; önceden telafi et
+            normals = normals * step
+            lengths = np.linalg.norm(normals, axis=1, keepdims=True)
+            normals = np.divide(normals, lengths, out=np.zeros_like(normals), where=lengths > 0)
+            packed = np.zeros((len(normals), 4), dtype="i1")
+            packed[:, :3] = np.round(normals * 127.0)
+            attributes["NORMAL"] = add_accessor(
+                packed.tobytes(), _GLTF_ARRAY_BUFFER, _GLTF_BYTE, len(normals),
+                byte_stride=4, normalized=True
+            )
+        else:
+            attributes["NORMAL"] = add_accessor(
+                normals.astype("<f4").tobytes(), _GLTF_ARRAY_BUFFER, _GLTF_FLOAT, len(normals)
+            )
+
+    if len(vertices) <= 65535:
+        index_data, index_type = triangles.astype("<u2").ravel(), _GLTF_UNSIGNED_SHORT
+    else:
+        index_data, index_type = triangles.astype("<u4").ravel(), _GLTF_UNSIGNED_INT
+    indices = add_accessor(index_data.tobytes(), _GLTF_ELEMENT_ARRAY_BUFFER, index_type,
+                           len(index_data), accessor_type="SCALAR")
+
+    gltf = {
+        "asset": {"version": "2.0", "generator": "disasterAreaProject_preprocessing"},
+        "scene": 0,
+        "scenes": [{"nodes": [0]}],
+        "nodes": [node],
+        "meshes": [{"primitives": [{"attributes": attributes, "indices": indices, "mode": 4}]}],
+        "buffers": [{"byteLength": len(_pad4(bytes(binary)))}],
+        "bufferViews": buffer_views,
+        "accessors": accessors
+    }
+    if quantize:
+        gltf["extensionsUsed"] = ["KHR_mesh_quantization"]
+        gltf["extensionsRequired"] = ["KHR_mesh_quantization"]
+
+    json_chunk = _pad4(json.dumps(gltf, separators=(",", ":")).encode("utf-8"), b" ")
+    bin_chunk = _pad4(bytes(binary))
+    total_length = 12 + 8 + len(json_chunk) + 8 + len(bin_chunk)
+
+    with open(glb_path, "wb") as f:
+        f.write(struct.pack("<III", 0x46546C67, 2, total_length))
+        f.write(struct.pack("<II", len(json_chunk), 0x4E4F534A))
+        f.write(json_chunk)
+        f.write(struct.pack("<II", len(bin_chunk), 0x004E4942))
+        f.write(bin_chunk)
+
+
+# Desteklenen mesh formatları ve dosya uzantıları
+MESH_FORMATS = ("obj", "ply", "glb")
+
+
+def write_mesh(path, mesh_format, vertices, triangles, normals=None, quantize=False, origin=None):
+    """
+    Seçilen formatta mesh yazar ("obj" | "ply" | "glb").
+    quantize/origin yalnızca GLB için geçerlidir.
+    """
+    if mesh_format == "obj":
+        write_obj(path, vertices, triangles, normals)
+    elif mesh_format == "ply":
+        write_ply(path, vertices, triangles, normals)
+    elif mesh_format == "glb":
+        write_glb(path, vertices, triangles, normals, quantize=quantize, origin=origin)
+    else:
+        raise ValueError(f"Desteklenmeyen mesh formatı: {mesh_format}")
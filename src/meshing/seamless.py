@@ -0,0 +1,275 @@
+# src/meshing/seamless.py
+
+import os
+import sys
+import numpy as np
+from scipy.spatial import Delaunay
+
+# src/ klasörünü import yoluna ekle (ortak modüller için)
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from common.incremental import load_tile_metadata
+from common.point_cache import load_xyz
+from preprocessing.tiling import TILE_SIZE, OVERLAP
+
+# ----------------------------------------------------------------------
+# Bindirme (overlap) farkındalıklı mesh:
+#   Komşu karolar OVERLAP kadar üst üste biner. Her karonun "çekirdek" hücresi,
+#   komşusuyla paylaştığı bindirme bandının ortasından kesilir; böylece her nokta
+#   ve her üçgen tam olarak bir karoya aittir.
+#
+#   - Çekirdek dışındaki bağlam noktaları, ait oldukları komşunun ground.las'ından
+#     alınır (CSF karo başına çalıştığı için bant içindeki sınıflandırma karolar
+#     arasında farklı olabilir; sahibin sınıflandırması esas alınır).
+#   - Pencere içindeki bir Delaunay üçgeninin çevrel çemberi (veri alanında)
+#     tamamen pencerenin içindeyse çember tüm veriye göre de boştur: üçgen,
+#     bütün bulutun Delaunay üçgenlemesindeki üçgenin aynısıdır. Çekirdeğe
+#     değen her çember pencereye sığana kadar pencere büyütülür; böylece
+#     zeminde pencereden geniş boşluk olsa da dikişi kesen üçgenler iki
+#     tarafta aynıdır. (Sınır: verinin dümdüz dış kenarındaki neredeyse doğrusal
+#     noktaların cm'lik şerit üçgenleri pencerenin dışbükey örtüsüne göre
+#     değişebilir; iç dikişleri etkilemez.)
+#   - Üçgen, ağırlık merkezi hangi çekirdekteyse o karoya yazılır: çift üçgen
+#     yok, çatlak yok, kenar vertex'leri iki karoda birebir aynı koordinatlara sahip.
+# ----------------------------------------------------------------------
+
+# Çekirdek hücre etrafında üçgenlemeye katılacak ilk bağlam bandı (m)
+SEAM_MARGIN = 10.0
+# Bandın büyüyebileceği üst sınır: komşu çekirdeklerin garanti genişliği
+# (daha ötesi ikinci halka karolardadır ve okunmaz)
+SEAM_MAX_MARGIN = TILE_SIZE - OVERLAP
+
+NEIGHBOR_OFFSETS = [(di, dj) for di in (-1, 0, 1) for dj in (-1, 0, 1) if (di, dj) != (0, 0)]
+
+
+def _tile_dir(tiles_root, i, j):
+    return os.path.join(tiles_root, f"tile_{i}_{j}")
+
+
+def core_bounds(metadata, tiles_root, overlap=OVERLAP):
+    """
+    Karonun çekirdek hücresi (x_lo, y_lo, x_hi, y_hi), yarı açık [lo, hi).
+    Bir yönde komşu karo yoksa o kenar sonsuza uzatılır (kenar karoları kendi
+    bindirme bantlarının tamamına sahip olur).
+    """
+    i, j = metadata["grid_index"]["i"], metadata["grid_index"]["j"]
+    local = metadata["bounds"]["local"]
+    half = overlap / 2.0
+
+    def has(di, dj):
+        return os.path.isdir(_tile_dir(tiles_root, i + di, j + dj))
+
+    return (
+        local["x_min"] + half if has(-1, 0) else -np.inf,
+        local["y_min"] + half if has(0, -1) else -np.inf,
+        local["x_max"] - half if has(1, 0) else np.inf,
+        local["y_max"] - half if has(0, 1) else np.inf
+    )
+
+
+def data_bounds(metadata, tiles_root, overlap=OVERLAP):
+    """
+    Verinin bulunabileceği alan: her yönde o eksendeki son karonun yerel
+    sınırı (iki karo ötede de karo varsa sınırsız; bant en fazla bir komşu
+    çekirdeği kadar büyüdüğünden daha ötesi gerekmez).
+    """
+    i, j = metadata["grid_index"]["i"], metadata["grid_index"]["j"]
+    local = metadata["bounds"]["local"]
+    step = TILE_SIZE - overlap
+
+    def reach(di, dj):
+        # Bu yönde kaç karo var (0, 1) veya sınırsız (inf)
+        for k in (1, 2):
+            if not os.path.isdir(_tile_dir(tiles_root, i + k * di, j + k * dj)):
+                return k - 1
+        return np.inf
+
+    return (
+        local["x_min"] - reach(-1, 0) * step,
+        local["y_min"] - reach(0, -1) * step,
+        local["x_max"] + reach(1, 0) * step,
+        local["y_max"] + reach(0, 1) * step
+    )
+
+
+def in_bounds(xy, bounds):
+    """
+    xy (N, 2) için [x_lo, x_hi) x [y_lo, y_hi) maskesi.
+    """
+    x_lo, y_lo, x_hi, y_hi = bounds
+    return (xy[:, 0] >= x_lo) & (xy[:, 0] < x_hi) & (xy[:, 1] >= y_lo) & (xy[:, 1] < y_hi)
+
+
+def neighbor_ground_files(tile_directory, metadata):
+    """
+    Bağlam için okunacak komşu ground.las dosyaları: {"ground_tile_i_j": yol}.
+    Artımlı modda mesh aşamasının girdileri arasına eklenir.
+    """
+    tiles_root = os.path.dirname(os.path.normpath(tile_directory))
+    i, j = metadata["grid_index"]["i"], metadata["grid_index"]["j"]
+    files = {}
+    for di, dj in NEIGHBOR_OFFSETS:
+        path = os.path.join(_tile_dir(tiles_root, i + di, j + dj), "ground.las")
+        if os.path.exists(path):
+            files[f"ground_tile_{i + di}_{j + dj}"] = path
+    return files
+
+
+def gather_seamless_points(tile_directory, metadata, own_points, margin=SEAM_MARGIN):
+    """
+    Karonun üçgenlenecek nokta kümesi: kendi noktaları, ancak ground.las'ı olan
+    komşuların çekirdeğine düşenler o komşunun noktalarıyla değiştirilir
+    (yalnızca kendi çekirdeğinin margin kadar genişletilmiş penceresi içindekiler).
+
+    Dönüş: (points_3d, core)
+    """
+    tiles_root = os.path.dirname(os.path.normpath(tile_directory))
+    core = core_bounds(metadata, tiles_root)
+    x_lo, y_lo, x_hi, y_hi = core
+    window = (x_lo - margin, y_lo - margin, x_hi + margin, y_hi + margin)
+
+    parts = []
+    keep_own = np.ones(len(own_points), dtype=bool)
+    for name, path in neighbor_ground_files(tile_directory, metadata).items():
+        neighbor_dir = os.path.dirname(path)
+        neighbor_meta = load_tile_metadata(neighbor_dir)
+        if not neighbor_meta:
+            continue
+        neighbor_core = core_bounds(neighbor_meta, tiles_root)
+        keep_own &= ~in_bounds(own_points[:, :2], neighbor_core)
+
+        neighbor_points = load_xyz(path)
+        mask = in_bounds(neighbor_points[:, :2], neighbor_core) & in_bounds(neighbor_points[:, :2], window)
+        parts.append(neighbor_points[mask])
+
+    own = own_points[keep_own]
+    parts.insert(0, own[in_bounds(own[:, :2], window)])
+    return np.vstack(parts), core
+
+
+def clip_to_core(points_3d, triangles, core):
+    """
+    Ağırlık merkezi çekirdek hücrede olan üçgenleri tutar ve kullanılmayan
+    vertex'leri atarak indeksleri sıkıştırır.
+
+    Dönüş: (vertices, triangles)
+    """
+    centroids = points_3d[triangles, :2].mean(axis=1)
+    triangles = triangles[in_bounds(centroids, core)]
+
+    used = np.unique(triangles)
+    remap = np.full(len(points_3d), -1, dtype=np.int64)
+    remap[used] = np.arange(len(used))
+    return points_3d[used], remap[triangles]
+
+
+def circumcircles(points_2d, triangles):
+    """
+    Üçgenlerin çevrel çember merkezleri (M, 2) ve yarıçapları (M,).
+    Doğrusal (dejenere) üçgenlerin yarıçapı sonsuzdur.
+    """
+    a = points_2d[triangles[:, 0]]
+    ab = points_2d[triangles[:, 1]] - a
+    ac = points_2d[triangles[:, 2]] - a
+    d = 2.0 * (ab[:, 0] * ac[:, 1] - ab[:, 1] * ac[:, 0])
+    ab2 = np.einsum("ij,ij->i", ab, ab)
+    ac2 = np.einsum("ij,ij->i", ac, ac)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ux = (ac[:, 1] * ab2 - ab[:, 1] * ac2) / d
+        uy = (ab[:, 0] * ac2 - ac[:, 0] * ab2) / d
+    radius = np.hypot(ux, uy)
+    degenerate = ~np.isfinite(radius)
+    ux[degenerate] = 0.0
+    uy[degenerate] = 0.0
+    radius[degenerate] = np.inf
+    return a + np.column_stack((ux, uy)), radius
+
+
+def required_margin(points_2d, triangles, core, domain):
+    """
+    Çemberi çekirdeğe değen üçgenlerin hepsinin bütün Delaunay üçgenlemesiyle
+    aynı olması için gereken bağlam bandı (m), kenar başına (x_lo, y_lo, x_hi,
+    y_hi): bu çemberlerin veri alanına düşen kısımlarının çekirdek kenarından
+    en fazla ne kadar taştığı. Sonsuz çekirdek kenarlarında 0.
+    """
+    need = np.zeros(4)
+    if len(triangles) == 0:
+        return need
+    center, radius = circumcircles(points_2d, triangles)
+    cx, cy = center[:, 0], center[:, 1]
+    x_lo, y_lo, x_hi, y_hi = core
+    d_lo, e_lo, d_hi, e_hi = domain
+
+    # Çember - (çekirdek ∩ veri alanı) dikdörtgeni uzaklığı
+    gap_x = np.maximum(np.maximum(max(x_lo, d_lo) - cx, cx - min(x_hi, d_hi)), 0.0)
+    gap_y = np.maximum(np.maximum(max(y_lo, e_lo) - cy, cy - min(y_hi, e_hi)), 0.0)
+    touches = gap_x ** 2 + gap_y ** 2 < radius ** 2
+    if not touches.any():
+        return need
+    cx, cy, radius = cx[touches], cy[touches], radius[touches]
+
+    # Çemberin veri alanındaki kısmının kapsayan kutusu: veri yalnızca bir
+    # şeritte ise çember o şeridi ancak bir kiriş boyunca keser
+    off_x = np.maximum(np.maximum(d_lo - cx, cx - d_hi), 0.0)
+    off_y = np.maximum(np.maximum(e_lo - cy, cy - e_hi), 0.0)
+    with np.errstate(invalid="ignore"):
+        half_x = np.sqrt(np.maximum(radius ** 2 - off_y ** 2, 0.0))
+        half_y = np.sqrt(np.maximum(radius ** 2 - off_x ** 2, 0.0))
+    half_x = np.where(np.isnan(half_x), np.inf, half_x)
+    half_y = np.where(np.isnan(half_y), np.inf, half_y)
+
+    reaches = (
+        x_lo - np.maximum(cx - half_x, d_lo),
+        y_lo - np.maximum(cy - half_y, e_lo),
+        np.minimum(cx + half_x, d_hi) - x_hi,
+        np.minimum(cy + half_y, e_hi) - y_hi
+    )
+    for k, (core_edge, reach) in enumerate(zip(core, reaches)):
+        if np.isfinite(core_edge):
+            need[k] = max(float(np.max(reach)), 0.0)
+    return need
+
+
+def margin_limits(core, domain, max_margin=SEAM_MAX_MARGIN):
+    """
+    Kenar başına bandın anlamlı üst sınırı: ötesinde karo yoksa veri alanının
+    sınırı, varsa max_margin (yalnızca birinci halka komşular okunur).
+    """
+    limits = np.zeros(4)
+    for k, (core_edge, data_edge) in enumerate(zip(core, domain)):
+        if np.isfinite(core_edge):
+            limits[k] = abs(data_edge - core_edge) if np.isfinite(data_edge) else max_margin
+    return limits
+
+
+def triangulate_seamless(tile_directory, metadata, own_points,
+                         margin=SEAM_MARGIN, max_margin=SEAM_MAX_MARGIN):
+    """
+    Karoyu komşu bağlamıyla üçgenler ve çekirdeğe kırpar. Çekirdeğe değen
+    çevrel çemberler pencereye sığmıyorsa (dikişte bandan geniş zemin boşluğu)
+    bant büyütülüp üçgenleme tekrarlanır; bant, okunan komşuların kapsadığı
+    alanla (margin_limits) sınırlıdır.
+
+    Dönüş: (vertices, triangles)
+    """
+    tiles_root = os.path.dirname(os.path.normpath(tile_directory))
+    domain = data_bounds(metadata, tiles_root)
+    limits = margin_limits(core_bounds(metadata, tiles_root), domain, max_margin)
+    while True:
+        points_3d, core = gather_seamless_points(tile_directory, metadata, own_points, margin)
+        triangles = Delaunay(points_3d[:, :2]).simplices
+        need = required_margin(points_3d[:, :2], triangles, core, domain)
+        # Veri alanının sınırına ulaşan kenarda daha fazla bağlam yoktur
+        short = (need > margin) & (margin < limits)
+        if not short.any():
+            break
+        margin = min(max(float(need[short].max()), 2.0 * margin), float(limits.max()))
+
+    if (need > limits).any():
+        tile_name = os.path.basename(os.path.normpath(tile_directory))
+        print(f"Uyarı: {tile_name} dikişi {need.max():.1f} m bağlam istiyor, "
+              f"{limits.max():.1f} m ile sınırlı; dikiş komşuyla uyuşmayabilir.")
+    return clip_to_core(points_3d, triangles, core)
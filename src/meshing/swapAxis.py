@@ -1,82 +1,116 @@
 import os
+import sys
 import glob
-import numpy as np
-import open3d as o3d
-from tqdm import tqdm
-import json
+import argparse
+from functools import partial
 
-def convert_mesh_to_unity_coords(obj_path):
+# src/ klasörünü import yoluna ekle (ortak modüller için)
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from common.parallel import run_parallel, print_summary
+from common.incremental import load_tile_metadata, stage_is_current, record_stage
+from common.catalog import update_tile_metadata
+from meshing.mesh_io import (
+    AXIS_LABELS, apply_coordinate_convention, compute_vertex_normals, read_obj, write_obj
+)
+
+# Not: Yeni mesh'ler delaunay.py'de doğrudan Y-Up yazılır (--convention y_up_unity).
+# Bu betik, Z-Up üretilmiş eski OBJ dosyalarını toplu çevirmek içindir.
+TILES_DIR = os.path.join("data", "processed", "tiles")
+MESHES_DIR = os.path.join("data", "processed", "meshes")
+
+
+def convert_mesh_to_unity_coords(obj_path, tiles_dir=TILES_DIR, incremental=False):
+    """
+    Bir .obj dosyasını okur, Z-Up sisteminden Unity Y-Up sistemine çevirir.
+    İşlem: (x, y, z) -> (x, z, y); yansıma olduğu için üçgen sarım yönü de
+    çevrilir (delaunay.py'nin y_up_unity çıktısıyla aynı sonuç).
+
+    Dönüşüm dosyanın üzerine yazıldığı için iki kez uygulanırsa eksenler geri döner.
+    Metadata'daki eksen zaten Y-Up ise dosyaya dokunulmaz.
+    Dönüşümden sonraki dosyanın parmak izi metadata'ya kaydedilir; incremental=True
+    ise dosya o zamandan beri değişmediyse (yani zaten çevrilmişse) atlanır.
+    """
+    # Tile klasörünü bul (obj path: <meshes>/tile_x_y.obj -> <tiles_dir>/tile_x_y)
+    tile_name = os.path.splitext(os.path.basename(obj_path))[0]
+    tile_dir = os.path.join(tiles_dir, tile_name)
+    metadata = load_tile_metadata(tile_dir)
+
+    # Eksen etiketi mesh'i Y-Up yazan her yolda güncellenir (delaunay.py,
+    # pipeline.py, bu betik); pipeline.py mesh aşaması kaydı tutmaz
+    axis = (metadata or {}).get("coordinate_system", {}).get("axis")
+    if axis == AXIS_LABELS["y_up_unity"]:
+        return True, "Mesh zaten Y-Up, atlandı"
+
+    if incremental and stage_is_current(metadata, "axis_swap",
+                                        {"mesh": obj_path}, [obj_path], {"axis": "y_up"}):
+        return True, "Güncel, atlandı"
+
+    # 1. Mesh'i Oku (Open3D'siz, vektörel)
+    vertices, triangles, normals = read_obj(obj_path)
+    if len(vertices) == 0:
+        return False, "Mesh boş."
+
+    # 2. Eksen Değişimi + sarım yönü (normaller de çevrilir; ışıklandırma için şart)
+    if normals is not None and len(normals) != len(vertices):
+        normals = None
+    vertices, triangles, normals = apply_coordinate_convention(vertices, triangles, normals, "y_up_unity")
+    if normals is None:
+        normals = compute_vertex_normals(vertices, triangles)
+
+    # 3. Dosyayı Üzerine Yaz
+    # Unity direkt bu klasörden okuyacaksa üzerine yazmak en temizidir.
+    write_obj(obj_path, vertices, triangles, normals)
+
+    # 4. Metadata Güncelleme
+    def update(metadata):
+        metadata['coordinate_system']['axis'] = AXIS_LABELS["y_up_unity"]
+        # Çevrilmiş dosyanın parmak izi: mesh yeniden üretilirse değişir
+        record_stage(metadata, "axis_swap", {"mesh": obj_path}, {"axis": "y_up"})
+
+    update_tile_metadata(tile_dir, update)
+
+    return True, "Dönüştürüldü"
+
+
+def convert_meshes_parallel(mesh_files, tiles_dir=TILES_DIR, workers=None, incremental=False):
     """
-    Bir .obj dosyasını okur, Z-Up sisteminden Y-Up sistemine çevirir.
-    İşlem: (x, y, z) -> (x, z, y)
+    convert_mesh_to_unity_coords'u dosyalar üzerinde süreç havuzuyla çalıştırır.
     """
-    try:
-        # 1. Mesh'i Oku
-        mesh = o3d.io.read_triangle_mesh(obj_path)
-        
-        if not mesh.has_vertices():
-            return False, "Mesh boş."
-
-        # 2. Vertexleri (Noktaları) Al
-        vertices = np.asarray(mesh.vertices)
-        
-        # 3. Eksen Değişimi (Swapping)
-        # NumPy ile sütunların yerini değiştiriyoruz.
-        # Eski: [X, Y, Z] -> Yeni: [X, Z, Y]
-        # vertices[:, [0, 2, 1]] ifadesi 0. sütunu korur, 1. ve 2. sütunu yer değiştirir.
-        vertices_unity = vertices[:, [0, 2, 1]]
-        
-        # Değişikliği uygula
-        mesh.vertices = o3d.utility.Vector3dVector(vertices_unity)
-        
-        # 4. Normalleri de Çevir (Işıklandırma için şart)
-        if mesh.has_vertex_normals():
-            normals = np.asarray(mesh.vertex_normals)
-            normals_unity = normals[:, [0, 2, 1]]
-            mesh.vertex_normals = o3d.utility.Vector3dVector(normals_unity)
-        else:
-            mesh.compute_vertex_normals()
-
-        # 5. Dosyayı Üzerine Yaz (veya yeni bir isimle kaydet)
-        # Unity direkt bu klasörden okuyacaksa üzerine yazmak en temizidir.
-        o3d.io.write_triangle_mesh(obj_path, mesh)
-        
-        # 6. Metadata Güncelleme (Opsiyonel ama iyi pratik)
-        # Tile klasörünü bul (obj path: data/processed/meshes/tile_x_y.obj)
-        # Metadata path: data/processed/tiles/tile_x_y/metadata.json
-        tile_name = os.path.splitext(os.path.basename(obj_path))[0]
-        tile_dir = os.path.join("data", "processed", "tiles", tile_name)
-        metadata_path = os.path.join(tile_dir, "metadata.json")
-        
-        if os.path.exists(metadata_path):
-            with open(metadata_path, 'r+') as f:
-                metadata = json.load(f)
-                metadata['coordinate_system']['axis'] = 'y_up (unity_ready)'
-                f.seek(0)
-                json.dump(metadata, f, indent=4)
-                f.truncate()
-
-        return True, "Dönüştürüldü"
-
-    except Exception as e:
-        return False, str(e)
+    return run_parallel(
+        partial(convert_mesh_to_unity_coords, tiles_dir=tiles_dir, incremental=incremental),
+        mesh_files,
+        workers=workers,
+        desc="Eksen Değişimi"
+    )
+
 
 if __name__ == '__main__':
-    meshes_dir = os.path.join("data", "processed", "meshes")
-    
+    parser = argparse.ArgumentParser(description="Eski (Z-Up) OBJ mesh'leri Unity Y-Up sistemine toplu çevirir.")
+    parser.add_argument("--meshes_dir", default=MESHES_DIR)
+    parser.add_argument("--tiles_dir", default=TILES_DIR,
+                        help="Karo metadata.json dosyalarının bulunduğu klasör.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="Paralel süreç sayısı (1 = sıralı çalıştır).")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Zaten çevrilmiş ve değişmemiş mesh'leri atla.")
+    args = parser.parse_args()
+
     # Tüm .obj dosyalarını bul
-    mesh_files = glob.glob(os.path.join(meshes_dir, "*.obj"))
-    
+    mesh_files = glob.glob(os.path.join(args.meshes_dir, "*.obj"))
+
     if not mesh_files:
         print("Hata: Dönüştürülecek .obj dosyası bulunamadı.")
     else:
         print(f"Toplam {len(mesh_files)} mesh Unity koordinat sistemine (Y-Up) çevriliyor...")
-        
-        with tqdm(total=len(mesh_files), desc="Eksen Değişimi") as pbar:
-            for mesh_path in mesh_files:
-                success, msg = convert_mesh_to_unity_coords(mesh_path)
-                if not success:
-                    print(f"Hata ({os.path.basename(mesh_path)}): {msg}")
-                pbar.update(1)
-                
+
+        summary = convert_meshes_parallel(mesh_files, args.tiles_dir,
+                                          workers=args.workers, incremental=args.incremental)
+        print_summary(summary, label="Eksen değişimi")
+        for mesh_path, (success, msg) in summary["succeeded"]:
+            if not success:
+                print(f"Hata ({os.path.basename(mesh_path)}): {msg}")
+
         print("\nİşlem tamamlandı. Dosyalar Unity için hazır.")
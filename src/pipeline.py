@@ -0,0 +1,470 @@
+# src/pipeline.py
+
+import os
+import sys
+import argparse
+import tempfile
+from contextlib import ExitStack, nullcontext
+import numpy as np
+import laspy
+
+# src/ klasörünü import yoluna ekle (ortak modüller için)
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from common.parallel import run_parallel, print_summary
+from common.manifest import record_dataset_transform
+from common.catalog import init_catalog
+from common.point_cache import las_columns, write_point_cache, cache_path, drop_point_cache
+from common.instrumentation import (
+    StageTimer, record_timings, profiled, enable_profiling,
+    report_from_summary, print_run_report, write_run_report
+)
+from preprocessing.transform import INPUT_PATH, FTUS_TO_M, compute_origin
+from preprocessing.scaling import OUTPUT as SCALED_OUTPUT_PATH
+from preprocessing.tiling import (
+    TILE_SIZE, OVERLAP, TILE_FILENAMES, STREAM_CHUNK_SIZE, STREAM_FLUSH_POINTS,
+    compute_tile_assignments, iter_tile_slices, build_tile_metadata,
+    write_tile_metadata, write_pcd_from_points
+)
+from segmentation.csf_filter import (
+    CSF_ENGINE, CSF_ENGINES, csf_params, las_points_to_pdal_array, run_csf_on_array
+)
+from meshing.delaunay import (
+    MESH_FORMAT, QUANTIZE_POSITIONS, COORDINATE_CONVENTION, SEAMLESS,
+    build_mesh_arrays, tile_origin, create_meshes_parallel, print_mesh_summary
+)
+from meshing.mesh_io import (
+    MESH_FORMATS, COORDINATE_CONVENTIONS, AXIS_LABELS,
+    apply_coordinate_convention, convert_axes, write_mesh
+)
+
+# ----------------------------------------------------------------------
+# Birleşik (fused) pipeline:
+#   ölçekleme (ftUS -> m) -> merkezleme (offset) -> tiling -> CSF -> mesh -> Y-Up
+#
+# Ara dosyalar (scaled LAZ, raw/ground/non_ground LAS) yalnızca istenirse yazılır.
+# Girdi parça parça okunur: önce karo başına nokta sayıları çıkarılır, ikinci
+# geçişte son noktası okunan karo hemen süreç havuzuna akar; worker'lar N.
+# karoyu filtreleyip mesh'lerken ana süreç okumaya devam eder. Tepe bellek
+# STREAM_CHUNK_SIZE + STREAM_FLUSH_POINTS + uçuştaki işlerle sınırlıdır.
+# ----------------------------------------------------------------------
+TILES_DIR = os.path.join("data", "processed", "tiles")
+MESHES_DIR = os.path.join("data", "processed", "meshes")
+
+# İstenirse yazılabilecek ara çıktılar
+# "columns": raw/ground/non_ground için sütunlu npy önbelleği (common/point_cache.py)
+INTERMEDIATES = ("scaled", "raw", "pcd", "ground", "non_ground", "columns")
+
+# Ara LAS dosyaları için çıktı başlığı (PDAL writers.las varsayılanlarıyla aynı)
+OUTPUT_POINT_FORMAT = 6
+OUTPUT_SCALE = 0.01
+
+
+def _output_header():
+    header = laspy.LasHeader(point_format=OUTPUT_POINT_FORMAT, version="1.4")
+    header.scales = np.array([OUTPUT_SCALE] * 3)
+    header.offsets = np.zeros(3)
+    return header
+
+
+def dataset_origin(reader_header):
+    """
+    Global origin = bbox merkezi (metre cinsinden), transform.py ile aynı hesap.
+    """
+    mins, maxs = reader_header.mins, reader_header.maxs
+    return np.asarray(compute_origin({
+        "minx": mins[0], "maxx": maxs[0],
+        "miny": mins[1], "maxy": maxs[1],
+        "minz": mins[2], "maxz": maxs[2]
+    }, FTUS_TO_M))
+
+
+def _transform_record(x, y, z, origin, header, count, source=None, copy_dims=()):
+    # ftUS -> m ve merkezleme; çıktı kaydının ölçeğine yuvarlanmış yerel koordinatlar
+    record = laspy.ScaleAwarePointRecord.zeros(count, header=header)
+    for name in copy_dims:
+        record[name] = source[name]
+    record.x = x * FTUS_TO_M - origin[0]
+    record.y = y * FTUS_TO_M - origin[1]
+    record.z = z * FTUS_TO_M - origin[2]
+    return record
+
+
+def iter_transformed_chunks(reader, origin, chunk_size=STREAM_CHUNK_SIZE, attributes=True, timer=None):
+    """
+    Açık laspy okuyucusundan chunk_size'lık parçaları metre/yerel koordinatlı
+    ScaleAwarePointRecord olarak üretir (transform.py + scaling.py'nin yaptığı,
+    parça parça). attributes=False ise yalnızca XYZ doldurulur (sayım geçişi için).
+    """
+    header = _output_header()
+    target_dims = set(header.point_format.dimension_names)
+    copy_dims = [name for name in reader.header.point_format.dimension_names
+                 if name in target_dims and name not in ("X", "Y", "Z")] if attributes else []
+
+    chunks = reader.chunk_iterator(chunk_size)
+    while True:
+        with timer.step("read") if timer else nullcontext():
+            chunk = next(chunks, None)
+            if chunk is None:
+                return
+            record = _transform_record(chunk.x, chunk.y, chunk.z, origin, header, len(chunk),
+                                       chunk, copy_dims)
+        yield record
+
+
+def plan_tiles(input_path, origin, chunk_size=STREAM_CHUNK_SIZE, timer=None):
+    """
+    Sayım geçişi: karo ızgarasını başlıktaki sınırlardan kurar ve girdiyi parça
+    parça okuyup karo başına nokta sayılarını çıkarır. iter_tile_jobs bu
+    sayılarla bir karonun tamamlandığını (son noktasının okunduğunu) bilir.
+
+    Dönüş: {"x_steps", "y_steps", "counts"} -- counts[tile_id], tile_id = i * len(y_steps) + j
+    """
+    with laspy.open(input_path) as reader:
+        # Sınırlar noktalarla aynı dönüşüm ve yuvarlamadan geçer: ızgara, tüm bulut
+        # bellekteyken min/max'tan kurulanla aynıdır
+        mins, maxs = reader.header.mins, reader.header.maxs
+        corners = _transform_record(np.array([mins[0], maxs[0]]), np.array([mins[1], maxs[1]]),
+                                    np.array([mins[2], maxs[2]]), origin, _output_header(), 2)
+        step = TILE_SIZE - OVERLAP
+        x_steps = np.arange(float(corners.x[0]), float(corners.x[1]), step)
+        y_steps = np.arange(float(corners.y[0]), float(corners.y[1]), step)
+
+        counts = np.zeros(len(x_steps) * len(y_steps), dtype=np.int64)
+        for record in iter_transformed_chunks(reader, origin, chunk_size, attributes=False, timer=timer):
+            with timer.step("assign") if timer else nullcontext():
+                tile_ids, _ = compute_tile_assignments(record.x, record.y, x_steps, y_steps, TILE_SIZE)
+                counts += np.bincount(tile_ids, minlength=len(counts))
+    return {"x_steps": x_steps, "y_steps": y_steps, "counts": counts}
+
+
+def _header_for(points):
+    header = laspy.LasHeader(point_format=points.point_format.id, version="1.4")
+    header.scales = points.scales
+    header.offsets = points.offsets
+    return header
+
+
+def _write_las(path, points):
+    drop_point_cache(path)
+    las = laspy.LasData(_header_for(points))
+    las.points = points
+    las.write(path)
+
+
+def iter_tile_jobs(input_path, plan, origin, tiles_dir, job_options, chunk_size=STREAM_CHUNK_SIZE,
+                   flush_points=STREAM_FLUSH_POINTS, scaled_path=None, timer=None):
+    """
+    Girdiyi ikinci kez parça parça okur, noktaları karo tamponlarında toplar ve
+    bir karonun son noktası okunduğu anda (plan["counts"]) o karonun işini üretir.
+    run_parallel üreteci kuyrukta yer açıldıkça ilerlettiği için worker'lar
+    tamamlanan karoları filtreleyip mesh'lerken okuma sürer.
+
+    Tamponlardaki nokta sayısı flush_points'i aşarsa tamponlar tiles_dir
+    altındaki geçici bir klasöre dökülür; tepe bellek tüm buluta değil
+    chunk_size + flush_points + uçuştaki işlere bağlıdır. Girdi mekânsal olarak
+    sıralıysa (uçuş şeritleri) karolar okuma boyunca tamamlanır; tamamen
+    karışık sırada karolar ancak son parçada tamamlanır (örtüşme olmaz,
+    bellek yine sınırlıdır).
+
+    scaled_path verilirse dönüştürülmüş bulut aynı geçişte LAS olarak yazılır.
+    Nokta verisi işlerde yapılandırılmış NumPy dizisi olarak taşınır (pickle edilebilir).
+    """
+    x_steps, y_steps, counts = plan["x_steps"], plan["y_steps"], plan["counts"]
+    n_y = len(y_steps)
+    received = np.zeros_like(counts)
+    buffers = {}       # tile_id -> [dizi, ...] (okuma sırasıyla)
+    buffered = 0
+    spilled = set()
+
+    def spool_path(spool_dir, tile_id):
+        return os.path.join(spool_dir, f"{tile_id}.bin")
+
+    def take(spool_dir, tile_id, dtype):
+        # Diske dökülen kısım önce gelir (daha önce okunan parçalar): nokta sırası korunur
+        nonlocal buffered
+        parts = buffers.pop(tile_id, [])
+        buffered -= sum(len(part) for part in parts)
+        if tile_id in spilled:
+            spilled.discard(tile_id)
+            path = spool_path(spool_dir, tile_id)
+            parts.insert(0, np.fromfile(path, dtype=dtype))
+            os.remove(path)
+        return np.concatenate(parts) if len(parts) > 1 else parts[0]
+
+    def make_job(tile_id, array, record):
+        i, j = divmod(tile_id, n_y)
+        tile_name = f"tile_{i}_{j}"
+        return {
+            **job_options,
+            "tile_name": tile_name,
+            "tile_dir": os.path.join(tiles_dir, tile_name),
+            "grid_index": (i, j),
+            "tile_min": (float(x_steps[i]), float(y_steps[j])),
+            "origin": tuple(float(v) for v in origin),
+            "point_format": record.point_format.id,
+            "scales": np.asarray(record.scales),
+            "offsets": np.asarray(record.offsets),
+            "array": array
+        }
+
+    os.makedirs(tiles_dir, exist_ok=True)
+    with ExitStack() as stack:
+        spool_dir = stack.enter_context(tempfile.TemporaryDirectory(prefix=".spool_", dir=tiles_dir))
+        reader = stack.enter_context(laspy.open(input_path))
+        scaled_writer = None
+        if scaled_path:
+            drop_point_cache(scaled_path)
+            scaled_writer = stack.enter_context(laspy.open(scaled_path, mode="w", header=_output_header()))
+
+        record = None
+        for record in iter_transformed_chunks(reader, origin, chunk_size, timer=timer):
+            if scaled_writer is not None:
+                with timer.step("scaled_write") if timer else nullcontext():
+                    scaled_writer.write_points(record)
+
+            with timer.step("assign") if timer else nullcontext():
+                tile_ids, point_indices = compute_tile_assignments(record.x, record.y, x_steps, y_steps, TILE_SIZE)
+                complete = []
+                for tile_id, start, end in iter_tile_slices(tile_ids):
+                    buffers.setdefault(tile_id, []).append(record.array[point_indices[start:end]])
+                    received[tile_id] += end - start
+                    buffered += end - start
+                    if received[tile_id] >= counts[tile_id]:
+                        complete.append(tile_id)
+
+            for tile_id in complete:
+                yield make_job(tile_id, take(spool_dir, tile_id, record.array.dtype), record)
+
+            if buffered >= flush_points:
+                with timer.step("spill") if timer else nullcontext():
+                    for tile_id, parts in buffers.items():
+                        with open(spool_path(spool_dir, tile_id), "ab") as f:
+                            for part in parts:
+                                part.tofile(f)
+                        spilled.add(tile_id)
+                    buffers.clear()
+                    buffered = 0
+
+        # Sayım geçişiyle uyuşmayan (ör. girdi arada değişti) karolar da işlensin
+        for tile_id in sorted(set(buffers) | spilled):
+            yield make_job(tile_id, take(spool_dir, tile_id, record.array.dtype), record)
+
+
+def process_tile_job(job):
+    """
+    Tek karo için CSF -> mesh -> eksen düzeni zincirini bellekte çalıştırır ve yalnızca
+    mesh'i (ve istenen ara dosyaları) yazar. Worker süreçlerinde çalışır.
+    """
+    timer = StageTimer()
+
+    point_format = laspy.PointFormat(job["point_format"])
+    points = laspy.ScaleAwarePointRecord(job["array"], point_format, job["scales"], job["offsets"])
+    tile_dir = job["tile_dir"]
+    intermediates = job["intermediates"]
+    os.makedirs(tile_dir, exist_ok=True)
+
+    files = {}
+    with timer.step("tile_write"):
+        if "raw" in intermediates:
+            _write_las(os.path.join(tile_dir, TILE_FILENAMES["las"]), points)
+            files["las"] = TILE_FILENAMES["las"]
+        xyz = np.column_stack((points.x, points.y, points.z))
+        if "pcd" in intermediates:
+            write_pcd_from_points(xyz, os.path.join(tile_dir, TILE_FILENAMES["pcd"]))
+            files["pcd"] = TILE_FILENAMES["pcd"]
+
+    # 1. CSF (diske yazmadan)
+    with timer.step("csf"):
+        ground_mask = run_csf_on_array(las_points_to_pdal_array(points), engine=job["csf_engine"])
+
+    ground_count = int(ground_mask.sum())
+    timer.count("points_in", len(points))
+    timer.count("ground_points", ground_count)
+    with timer.step("ground_write"):
+        if "ground" in intermediates:
+            _write_las(os.path.join(tile_dir, "ground.las"), points[ground_mask])
+            files["ground_data"] = "ground.las"
+        if "non_ground" in intermediates:
+            _write_las(os.path.join(tile_dir, "non_ground.las"), points[~ground_mask])
+            files["non_ground_data"] = "non_ground.las"
+        if "columns" in intermediates:
+            # Bellekteki dizilerden; ilgili LAS yazıldıysa parmak izi kaydedilir
+            _, columns = las_columns(points)
+            for name, mask in (("raw", None), ("ground", ground_mask), ("non_ground", ~ground_mask)):
+                subset = xyz if mask is None else xyz[mask]
+                subset_columns = columns if mask is None else {k: v[mask] for k, v in columns.items()}
+                las_path = os.path.join(tile_dir, f"{name}.las")
+                write_point_cache(cache_path(las_path), subset, subset_columns,
+                                  las_path if name in intermediates else None)
+            files["npy"] = TILE_FILENAMES["npy"]
+
+    # 2. Metadata (diğer aşamaların yazdığı alanlarla uyumlu)
+    i, j = job["grid_index"]
+    metadata = build_tile_metadata(
+        job["tile_name"], i, j, job["source_file"], len(points),
+        job["tile_min"][0], job["tile_min"][1], files, job["origin"]
+    )
+
+    # 3. Mesh + eksen düzeni tek yazımda (delaunay.py ile aynı format seçenekleri).
+    # Kesintisiz modda mesh komşu ground.las'lar hazır olunca ayrıca üretilir
+    mesh_info = None
+    if job["mesh"] and ground_count >= 3:
+        with timer.step("mesh"):
+            vertices, triangles, normals = build_mesh_arrays(xyz[ground_mask])
+
+        mesh_format = job["mesh_format"]
+        mesh_filename = f"{job['tile_name']}.{mesh_format}"
+        mesh_path = os.path.join(job["meshes_dir"], mesh_filename)
+        origin = convert_axes([tile_origin(metadata)], job["convention"], mesh_format)[0]
+        with timer.step("mesh_write"):
+            write_mesh(mesh_path, mesh_format,
+                       *apply_coordinate_convention(vertices, triangles, normals, job["convention"], mesh_format),
+                       quantize=job["quantize"], origin=origin)
+        timer.count("triangles", len(triangles))
+        timer.count("bytes_written", os.path.getsize(mesh_path))
+
+        metadata["files"][f"mesh_{mesh_format}"] = {
+            "filename": mesh_filename,
+            "path": f"../../meshes/{mesh_filename}"
+        }
+        mesh_info = {"vertex_count": len(vertices), "triangle_count": len(triangles)}
+    metadata["point_counts"] = {
+        "raw": len(points),
+        "ground": ground_count,
+        "non_ground": len(points) - ground_count
+    }
+    metadata["segmentation_params"] = {**csf_params(), "engine": job["csf_engine"]}
+    if mesh_info:
+        metadata["processing_status"] = "meshed"
+        metadata["mesh_info"] = mesh_info
+        metadata["coordinate_system"]["axis"] = AXIS_LABELS[job["convention"]]
+    else:
+        metadata["processing_status"] = "segmented"
+    record_timings(metadata, "pipeline", timer)
+    write_tile_metadata(tile_dir, metadata)
+
+    return {
+        "tile_name": job["tile_name"],
+        "point_counts": metadata["point_counts"],
+        "mesh_info": mesh_info,
+        "timings": metadata["timings"]["pipeline"]
+    }
+
+
+def run_fused_pipeline(input_path=INPUT_PATH, tiles_dir=TILES_DIR, meshes_dir=MESHES_DIR,
+                       intermediates=(), workers=None, convention=COORDINATE_CONVENTION, csf_engine=CSF_ENGINE,
+                       mesh_format=MESH_FORMAT, quantize=QUANTIZE_POSITIONS, seamless=SEAMLESS,
+                       chunk_size=STREAM_CHUNK_SIZE, flush_points=STREAM_FLUSH_POINTS):
+    """
+    Ham LAZ'dan Unity'ye hazır mesh'lere kadar tüm aşamaları tek seferde çalıştırır.
+    Girdi iki kez parça parça okunur (sayım + karolama); bulutun tamamı belleğe
+    alınmaz (bkz. iter_tile_jobs).
+
+    seamless=True ise mesh komşu karolara ihtiyaç duyduğu için zincirden çıkar:
+    ground.las ara çıktısı yazılır ve tüm karolar filtrelendikten sonra
+    delaunay.create_meshes_parallel(seamless=True) çalışır.
+
+    Dönüş: run_parallel özeti; çalıştırma raporu "report" anahtarında (dosyaya
+    yazmak çağıranda).
+    """
+    intermediates = tuple(intermediates)
+    if seamless and "ground" not in intermediates:
+        print("Kesintisiz mod komşu ground.las dosyalarını okur; ground ara çıktısı yazılacak.")
+        intermediates += ("ground",)
+
+    os.makedirs(tiles_dir, exist_ok=True)
+    init_catalog(tiles_dir)
+    os.makedirs(meshes_dir, exist_ok=True)
+    stage_timer = StageTimer()
+
+    with laspy.open(input_path) as reader:
+        origin = dataset_origin(reader.header)
+        point_count = reader.header.point_count
+    print(f"Nokta sayısı: {point_count}, origin: {origin}")
+
+    print(f"'{input_path}' karo sayımı için okunuyor (ftUS -> m, merkezleme)...")
+    with stage_timer.step("plan"):
+        plan = plan_tiles(input_path, origin, chunk_size)
+    n_tiles = int(np.count_nonzero(plan["counts"]))
+
+    scaled_path = None
+    if "scaled" in intermediates:
+        scaled_path = str(SCALED_OUTPUT_PATH)
+        print(f"Ara çıktı yazılıyor: {scaled_path}")
+        os.makedirs(os.path.dirname(scaled_path), exist_ok=True)
+
+    job_options = {
+        "meshes_dir": meshes_dir,
+        "source_file": os.path.basename(str(input_path)),
+        "intermediates": intermediates,
+        "convention": convention,
+        "csf_engine": csf_engine,
+        "mesh": not seamless,
+        "mesh_format": mesh_format,
+        "quantize": quantize
+    }
+    jobs = iter_tile_jobs(input_path, plan, origin, tiles_dir, job_options, chunk_size, flush_points,
+                          scaled_path, timer=stage_timer)
+    summary = run_parallel(profiled(process_tile_job, "pipeline"), jobs, workers=workers,
+                           desc="Karo zinciri (tile -> CSF -> mesh)", total=n_tiles,
+                           key=lambda job: job["tile_dir"])
+    if scaled_path:
+        record_dataset_transform(scaled_path, input_path, FTUS_TO_M, origin)
+    print_summary(summary, label="Birleşik pipeline")
+
+    if seamless:
+        tile_folders = sorted(tile_dir for tile_dir, _ in summary["succeeded"])
+        mesh_summary = create_meshes_parallel(tile_folders, meshes_dir, workers=workers,
+                                              mesh_format=mesh_format, quantize=quantize,
+                                              convention=convention, seamless=True)
+        print_mesh_summary(mesh_summary)
+        summary["mesh_summary"] = mesh_summary
+
+    stage_steps = stage_timer.as_dict()
+    report = report_from_summary("pipeline", summary)
+    report["stage_steps"] = stage_steps["steps"]
+    print_run_report(report)
+    summary["report"] = report
+    return summary
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Ölçekleme -> ofset -> tiling -> CSF -> mesh -> Y-Up zincirini bellekte çalıştırır.")
+    parser.add_argument("--input", default=str(INPUT_PATH), help="Ham (ftUS) LAZ dosyası.")
+    parser.add_argument("--tiles_dir", default=TILES_DIR)
+    parser.add_argument("--meshes_dir", default=MESHES_DIR)
+    parser.add_argument("--write", nargs="*", choices=INTERMEDIATES, default=[],
+                        help="Diske yazılacak ara çıktılar (varsayılan: yalnızca mesh + metadata).")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="Paralel süreç sayısı (1 = sıralı çalıştır).")
+    parser.add_argument("--chunk_size", type=int, default=STREAM_CHUNK_SIZE,
+                        help="Girdiden her seferde okunacak nokta sayısı.")
+    parser.add_argument("--format", choices=MESH_FORMATS, default=MESH_FORMAT,
+                        help="Mesh çıktı formatı (ply/glb binary yazılır).")
+    parser.add_argument("--quantize", action="store_true", default=QUANTIZE_POSITIONS,
+                        help="GLB pozisyonlarını karo başlangıcına göre 16-bit kuantala.")
+    parser.add_argument("--convention", choices=COORDINATE_CONVENTIONS, default=COORDINATE_CONVENTION,
+                        help="Mesh çıktısının eksen düzeni.")
+    parser.add_argument("--seamless", action="store_true", default=SEAMLESS,
+                        help="Komşu karolarla bağlamlı üçgenle (mesh, CSF bittikten sonra ayrı geçişte).")
+    parser.add_argument("--csf_engine", choices=CSF_ENGINES, default=CSF_ENGINE,
+                        help="CSF motoru: PDAL filters.csf veya NumPy (csf_native.py).")
+    parser.add_argument("--profile", metavar="DIR", default=None,
+                        help="Her karoyu cProfile ile çalıştır, .prof dosyalarını DIR'e yaz.")
+    args = parser.parse_args()
+
+    if args.profile:
+        enable_profiling(args.profile)
+
+    if not os.path.exists(args.input):
+        print(f"Hata: Girdi dosyası bulunamadı -> {args.input}")
+    else:
+        summary = run_fused_pipeline(args.input, args.tiles_dir, args.meshes_dir,
+                                     intermediates=args.write, workers=args.workers,
+                                     convention=args.convention, csf_engine=args.csf_engine,
+                                     mesh_format=args.format, quantize=args.quantize,
+                                     seamless=args.seamless, chunk_size=args.chunk_size)
+        print(f"Rapor: {write_run_report(summary['report'])}")
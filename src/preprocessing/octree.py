@@ -0,0 +1,368 @@
+# src/preprocessing/octree.py
+
+import os
+import sys
+import json
+import heapq
+import argparse
+import numpy as np
+import laspy
+from tqdm import tqdm
+
+# src/ klasörünü import yoluna ekle (ortak modüller için)
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from common.incremental import load_tile_metadata
+from common.spatial_index import Region, TileIndex
+from common.instrumentation import StageTimer
+from common.point_cache import load_xyz, load_columns
+from meshing.seamless import core_bounds, in_bounds
+
+# ----------------------------------------------------------------------
+# Görüntüleme için çok çözünürlüklü nokta octree'si (Potree / COPC benzeri):
+#   - Tüm saha tek bir küpe oturtulur; kök düğüm kaba, her alt seviye 2 kat sık.
+#   - Her düğüm GRID_SIZE^3'lük bir ızgara üzerinde hücre başına en fazla bir
+#     nokta tutar (eklemeli / "additive": bir nokta yalnızca bir düğümde bulunur,
+#     alt düğümler üst düğümün üstüne detay ekler). MAX_NODE_POINTS'ten az
+#     noktası kalan düğüm yapraktır ve kalanların hepsini tutar.
+#   - Çıktı: 'octree.bin' (düğüm parçaları art arda, nokta başına 13 bayt:
+#     int32 x/y/z + sınıf) ve 'hierarchy.json' (düğüm -> [ofset, sayı] aralıkları,
+#     toplam nokta sayısı).
+#   - Bellek: site bütün olarak yüklenmez. Izgara hücreleri üst seviyelerde de
+#     CHUNK seviyesindeki düğümlerin içine tam oturduğu için (GRID_SIZE = 2^7)
+#     her XY sütunu bağımsız işlenir; sonuç tek geçişli global örneklemeyle aynıdır.
+#     Sütun seviyesinin üstündeki düğümler birçok sütundan beslenir: her sütunun
+#     payı hemen diske yazılır ve düğümün aralık listesine eklenir (bellekte
+#     biriktirilmez).
+#   - Bindirme bantlarındaki çift noktalar, her noktayı sahibi olan karonun
+#     çekirdek hücresinden alarak ayıklanır (meshing/seamless.py ile aynı kural).
+# Görüntüleyici: visualize_combined.py --octree
+# ----------------------------------------------------------------------
+OCTREE_DIR = os.path.join("data", "processed", "octree")
+HIERARCHY_FILENAME = "hierarchy.json"
+DATA_FILENAME = "octree.bin"
+
+GRID_SIZE = 128
+GRID_BITS = 7
+MAX_NODE_POINTS = 20_000
+# 3 * (MAX_DEPTH + GRID_BITS) <= 63: hücre anahtarı tek int64'e sığar
+MAX_DEPTH = 14
+# Düğüm boyu bu değerin altına inen ilk seviye (en fazla GRID_BITS) sütun olarak işlenir
+CHUNK_TARGET_SIZE = 200.0
+POSITION_SCALE = 0.001
+
+POINT_DTYPE = np.dtype([("x", "<i4"), ("y", "<i4"), ("z", "<i4"), ("classification", "u1")])
+
+# Sınıflar (LAS): 2 = zemin, 1 = sınıflandırılmamış (non-ground)
+GROUND_CLASS = 2
+NON_GROUND_CLASS = 1
+
+# Görüntüleyici: düğümün nokta aralığı ekranda bu pikselden büyükse alt düğümler yüklenir
+SPACING_THRESHOLD_PX = 2.0
+POINT_BUDGET = 3_000_000
+
+
+def node_name(level, index):
+    """
+    Potree adlandırması: kök "r", her seviyede çocuk indeksi (x<<2 | y<<1 | z) eklenir.
+    """
+    ix, iy, iz = index
+    digits = [str(((ix >> b) & 1) << 2 | ((iy >> b) & 1) << 1 | ((iz >> b) & 1))
+              for b in range(level - 1, -1, -1)]
+    return "r" + "".join(digits)
+
+
+def chunk_level(cube_size, target=CHUNK_TARGET_SIZE):
+    level = 0
+    while cube_size / 2 ** level > target and level < min(GRID_BITS, MAX_DEPTH):
+        level += 1
+    return level
+
+
+def assign_nodes(rel, cube_size, min_leaf_level, max_node_points=MAX_NODE_POINTS, max_depth=MAX_DEPTH):
+    """
+    Küp göreli koordinatlardaki (N, 3) noktaları düğümlere dağıtır.
+    Her seviyede henüz yerleşmemiş noktalardan ızgara hücresi başına ilki alınır
+    (girdi önceden karıştırılmışsa rastgele temsilci). min_leaf_level'dan itibaren
+    az noktası kalan düğümler yaprak olur.
+
+    Dönüş: (level (N,), node_index (N, 3))
+    """
+    n = len(rel)
+    levels = np.full(n, -1, dtype=np.int8)
+    nodes = np.zeros((n, 3), dtype=np.int64)
+    remaining = np.arange(n)
+
+    for level in range(max_depth + 1):
+        if len(remaining) == 0:
+            break
+        cells_per_axis = GRID_SIZE << level
+        bits = level + GRID_BITS
+        cell = np.clip((rel[remaining] * (cells_per_axis / cube_size)).astype(np.int64),
+                       0, cells_per_axis - 1)
+        node = cell >> GRID_BITS
+
+        take = np.zeros(len(remaining), dtype=bool)
+        if level == max_depth:
+            take[:] = True
+        elif level >= min_leaf_level:
+            node_key = (node[:, 0] << (2 * level)) | (node[:, 1] << level) | node[:, 2]
+            _, inverse, counts = np.unique(node_key, return_inverse=True, return_counts=True)
+            take = counts[inverse] <= max_node_points
+
+        rest = np.flatnonzero(~take)
+        cell_key = (cell[rest, 0] << (2 * bits)) | (cell[rest, 1] << bits) | cell[rest, 2]
+        _, first = np.unique(cell_key, return_index=True)
+        take[rest[first]] = True
+
+        placed = remaining[take]
+        levels[placed] = level
+        nodes[placed] = node[take]
+        remaining = remaining[~take]
+
+    return levels, nodes
+
+
+def _tile_points(tile_dir):
+    """
+    Karonun noktaları ve sınıfları: CSF çıktısı varsa ground/non_ground, yoksa raw.las.
+    """
+    parts = []
+    sources = [("ground.las", GROUND_CLASS), ("non_ground.las", NON_GROUND_CLASS)]
+    if not all(os.path.exists(os.path.join(tile_dir, name)) for name, _ in sources):
+        sources = [("raw.las", None)]
+    for name, cls in sources:
+        path = os.path.join(tile_dir, name)
+        if not os.path.exists(path):
+            continue
+        if cls is not None:
+            xyz = load_xyz(path)
+            classes = np.full(len(xyz), cls, dtype=np.uint8)
+        else:
+            columns = load_columns(path, ("classification",))
+            xyz, classes = columns["xyz"], np.asarray(columns["classification"], dtype=np.uint8)
+        parts.append((xyz, classes))
+    if not parts:
+        return np.empty((0, 3)), np.empty(0, dtype=np.uint8)
+    return np.vstack([p[0] for p in parts]), np.concatenate([p[1] for p in parts])
+
+
+def _z_range(tile_dirs):
+    # Yalnızca LAS başlıkları okunur
+    z_min, z_max = np.inf, -np.inf
+    for tile_dir in tile_dirs:
+        for name in ("raw.las", "ground.las", "non_ground.las"):
+            path = os.path.join(tile_dir, name)
+            if os.path.exists(path):
+                with laspy.open(path) as reader:
+                    z_min = min(z_min, reader.header.mins[2])
+                    z_max = max(z_max, reader.header.maxs[2])
+    return float(z_min), float(z_max)
+
+
+def build_octree(tiles_dir, output_dir=OCTREE_DIR, max_node_points=MAX_NODE_POINTS, seed=0):
+    """
+    Karolardan octree'yi üretir. Dönüş: hiyerarşi dict'i (hierarchy.json içeriği).
+    """
+    timer = StageTimer()
+    index = TileIndex.from_tiles_dir(tiles_dir)
+    if len(index) == 0:
+        raise FileNotFoundError(f"'{tiles_dir}' içinde karo bulunamadı")
+
+    with timer.step("bounds"):
+        z_min, z_max = _z_range([os.path.join(tiles_dir, name) for name in index.tile_names])
+        x_min, y_min = index.bounds[:, 0].min(), index.bounds[:, 1].min()
+        x_max, y_max = index.bounds[:, 2].max(), index.bounds[:, 3].max()
+        cube_min = np.array([x_min, y_min, z_min])
+        cube_size = float(max(x_max - x_min, y_max - y_min, z_max - z_min)) * (1.0 + 1e-9)
+        level_c = chunk_level(cube_size)
+        columns = 1 << level_c
+        column_size = cube_size / columns
+    print(f"Küp: {cube_size:.1f} m, sütun seviyesi {level_c} ({column_size:.1f} m), {len(index)} karo")
+
+    core_cache = {}
+
+    def tile_core(tile_dir):
+        if tile_dir not in core_cache:
+            metadata = load_tile_metadata(tile_dir)
+            core_cache[tile_dir] = core_bounds(metadata, tiles_dir) if metadata else None
+        return core_cache[tile_dir]
+
+    os.makedirs(output_dir, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    hierarchy_nodes = {}
+    offset = 0
+    total_points = 0
+
+    def write_node(f, name, level, node_index, records):
+        # Düğümün bu sütundaki payı; üst seviye düğümleri birden çok aralık toplar
+        nonlocal offset
+        f.write(records.tobytes())
+        node = hierarchy_nodes.setdefault(name, {
+            "level": level, "index": [int(v) for v in node_index],
+            "count": 0, "ranges": []
+        })
+        node["ranges"].append([offset, len(records)])
+        node["count"] += len(records)
+        offset += len(records)
+
+    data_path = os.path.join(output_dir, DATA_FILENAME)
+    with open(data_path, "wb") as f:
+        cells = [(cx, cy) for cx in range(columns) for cy in range(columns)]
+        for cx, cy in tqdm(cells, desc="Octree sütunları"):
+            col_lo = cube_min[:2] + np.array([cx, cy]) * column_size
+            col_box = (col_lo[0], col_lo[1], col_lo[0] + column_size, col_lo[1] + column_size)
+            tile_dirs = index.query(Region(bbox=col_box))
+            if not tile_dirs:
+                continue
+
+            with timer.step("read"):
+                xyz_parts, cls_parts = [], []
+                for tile_dir in tile_dirs:
+                    core = tile_core(tile_dir)
+                    if core is None:
+                        continue
+                    xyz, classes = _tile_points(tile_dir)
+                    col = np.clip(((xyz[:, :2] - cube_min[:2]) / column_size).astype(np.int64), 0, columns - 1)
+                    mask = in_bounds(xyz[:, :2], core) & (col[:, 0] == cx) & (col[:, 1] == cy)
+                    xyz_parts.append(xyz[mask])
+                    cls_parts.append(classes[mask])
+                if not xyz_parts:
+                    continue
+                xyz = np.vstack(xyz_parts)
+                classes = np.concatenate(cls_parts)
+            if len(xyz) == 0:
+                continue
+
+            with timer.step("assign"):
+                order = rng.permutation(len(xyz))
+                xyz, classes = xyz[order], classes[order]
+                rel = xyz - cube_min
+                levels, nodes = assign_nodes(rel, cube_size, level_c, max_node_points)
+
+                records = np.empty(len(xyz), dtype=POINT_DTYPE)
+                quantized = np.rint(rel / POSITION_SCALE).astype(np.int32)
+                records["x"], records["y"], records["z"] = quantized[:, 0], quantized[:, 1], quantized[:, 2]
+                records["classification"] = classes
+
+                # (seviye, düğüm) tek anahtarda: 4 + 3 x 14 bit
+                keys = ((levels.astype(np.int64) << 42) | (nodes[:, 0] << 28)
+                        | (nodes[:, 1] << 14) | nodes[:, 2])
+                order = np.argsort(keys, kind="stable")
+                unique_keys, starts = np.unique(keys[order], return_index=True)
+                ends = np.append(starts[1:], len(keys))
+
+            with timer.step("write"):
+                for key, start, end in zip(unique_keys.tolist(), starts, ends):
+                    level = key >> 42
+                    node_index = ((key >> 28) & 0x3FFF, (key >> 14) & 0x3FFF, key & 0x3FFF)
+                    write_node(f, node_name(level, node_index), level, node_index,
+                               records[order[start:end]])
+            total_points += len(xyz)
+
+    hierarchy = {
+        "version": 2,
+        "cube_min": cube_min.tolist(),
+        "cube_size": cube_size,
+        "z_range": [z_min, z_max],
+        "grid_size": GRID_SIZE,
+        "scale": POSITION_SCALE,
+        "point_dtype": [[name, POINT_DTYPE[name].str] for name in POINT_DTYPE.names],
+        "point_count": total_points,
+        "data_file": DATA_FILENAME,
+        "chunk_level": level_c,
+        "max_node_points": max_node_points,
+        "depth": max((n["level"] for n in hierarchy_nodes.values()), default=0),
+        "nodes": hierarchy_nodes,
+        "timings": timer.as_dict()
+    }
+    with open(os.path.join(output_dir, HIERARCHY_FILENAME), "w") as f:
+        json.dump(hierarchy, f)
+    return hierarchy
+
+
+class OctreeReader:
+    """
+    Octree'den düğüm okuma ve kameraya göre düğüm seçimi. Veri dosyası
+    np.memmap ile açılır; yalnızca istenen düğümlerin noktaları belleğe alınır.
+    """
+
+    def __init__(self, octree_dir=OCTREE_DIR):
+        with open(os.path.join(octree_dir, HIERARCHY_FILENAME), "r") as f:
+            self.hierarchy = json.load(f)
+        self.nodes = self.hierarchy["nodes"]
+        self.cube_min = np.asarray(self.hierarchy["cube_min"])
+        self.cube_size = self.hierarchy["cube_size"]
+        self.scale = self.hierarchy["scale"]
+        self._data = np.memmap(os.path.join(octree_dir, self.hierarchy["data_file"]),
+                               dtype=POINT_DTYPE, mode="r")
+
+    def read_node(self, name):
+        """
+        Dönüş: (points (N, 3) float64, yerel koordinat; classification (N,))
+        """
+        node = self.nodes[name]
+        # Sürüm 1 hiyerarşilerinde düğüm tek parçadır (offset, count)
+        ranges = node.get("ranges") or [[node["offset"], node["count"]]]
+        records = np.concatenate([self._data[start:start + count] for start, count in ranges])
+        points = np.column_stack((records["x"], records["y"], records["z"])) * self.scale + self.cube_min
+        return points, records["classification"]
+
+    def node_box(self, name):
+        node = self.nodes[name]
+        size = self.cube_size / 2 ** node["level"]
+        lo = self.cube_min + np.asarray(node["index"]) * size
+        return lo, size
+
+    def children(self, name):
+        return [name + str(d) for d in range(8) if name + str(d) in self.nodes]
+
+    def select_nodes(self, camera_position, point_budget=POINT_BUDGET, focal_px=1000.0,
+                     spacing_px=SPACING_THRESHOLD_PX):
+        """
+        Kameraya göre yüklenecek düğümler. Kökten başlayarak nokta aralığının
+        ekrandaki boyutu en büyük olan düğüm önce açılır; aralığı spacing_px'in
+        altına inen düğümün çocuklarına inilmez. Toplam nokta point_budget'ı aşmaz.
+        """
+        camera_position = np.asarray(camera_position, dtype=np.float64)
+
+        def priority(name):
+            lo, size = self.node_box(name)
+            nearest = np.clip(camera_position, lo, lo + size)
+            distance = max(float(np.linalg.norm(nearest - camera_position)), 1e-6)
+            return (size / GRID_SIZE) / distance * focal_px
+
+        selected, total = [], 0
+        heap = [(-priority("r"), "r")] if "r" in self.nodes else []
+        while heap:
+            neg_priority, name = heapq.heappop(heap)
+            count = self.nodes[name]["count"]
+            if total + count > point_budget:
+                continue
+            selected.append(name)
+            total += count
+            if -neg_priority > spacing_px:
+                for child in self.children(name):
+                    heapq.heappush(heap, (-priority(child), child))
+        return selected
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Karolardan görüntüleme için çok çözünürlüklü nokta octree'si üretir.")
+    parser.add_argument("--tiles_dir", default=os.path.join("data", "processed", "tiles"))
+    parser.add_argument("--output", default=OCTREE_DIR)
+    parser.add_argument("--max_node_points", type=int, default=MAX_NODE_POINTS,
+                        help="Bu sayıdan az noktası kalan düğüm yaprak olur.")
+    args = parser.parse_args()
+
+    try:
+        hierarchy = build_octree(args.tiles_dir, args.output, args.max_node_points)
+    except FileNotFoundError as e:
+        print(f"Hata: {e}")
+        sys.exit(1)
+
+    print(f"Octree yazıldı: {args.output} ({hierarchy['point_count']} nokta, "
+          f"{len(hierarchy['nodes'])} düğüm, derinlik {hierarchy['depth']})")
+    print("Adımlar: " + ", ".join(f"{k}={v:.2f} sn" for k, v in hierarchy["timings"]["steps"].items()))
@@ -1,8 +1,16 @@
+import os
+import sys
 import json
-import pdal
 import subprocess
 from pathlib import Path
 
+# src/ klasörünü import yoluna ekle (ortak modüller için)
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from common.manifest import cached_bbox, load_manifest, record_dataset_transform
+
 # ---------------------------
 # Yapılandırma
 # ---------------------------
@@ -12,15 +20,12 @@ OUTPUT = Path("data/processed_data/RS000016_unity_scaled.laz")
 # Unity için ölçek (offset zorunlu, scale opsiyonel)
 SCALE = 1.0  # 1.0 sadece offset yapar
 
-def main():
-    if not INPUT.exists():
-        raise FileNotFoundError(f"Girdi dosyası yok: {INPUT}")
-
-    # ---------------------------
-    # 1) PDAL info --stats ile bbox bilgisi al
-    # ---------------------------
+def pdal_stats_bbox(input_path):
+    """
+    'pdal info --stats' ile bbox bilgisi alır (tüm dosyayı tarar, pahalı).
+    """
     meta_raw = subprocess.check_output(
-        ["pdal", "info", "--stats", str(INPUT)],
+        ["pdal", "info", "--stats", str(input_path)],
         text=True
     )
     meta = json.loads(meta_raw)
@@ -30,6 +35,16 @@ def main():
         raise KeyError("meta['stats'] bulunamadı")
 
     bbox = meta["stats"]["bbox"]["native"]["bbox"]
+    return {key: bbox[key] for key in ("minx", "maxx", "miny", "maxy", "minz", "maxz")}
+
+def main():
+    if not INPUT.exists():
+        raise FileNotFoundError(f"Girdi dosyası yok: {INPUT}")
+
+    # ---------------------------
+    # 1) PDAL info --stats ile bbox bilgisi al (girdi değişmediyse manifest'ten)
+    # ---------------------------
+    bbox = cached_bbox(INPUT, pdal_stats_bbox)
 
     minx, maxx = bbox["minx"], bbox["maxx"]
     miny, maxy = bbox["miny"], bbox["maxy"]
@@ -56,9 +71,9 @@ def main():
     oz = -origin_z * SCALE
 
     matrix = (
-        f"{SCALE} 0 0 {ox}, "
-        f"0 {SCALE} 0 {oy}, "
-        f"0 0 {SCALE} {oz}, "
+        f"{SCALE} 0 0 {ox} "
+        f"0 {SCALE} 0 {oy} "
+        f"0 0 {SCALE} {oz} "
         "0 0 0 1"
     )
 
@@ -73,8 +88,7 @@ def main():
             str(INPUT),
             {
                 "type": "filters.transformation",
-                "matrix": "1.0 0 0 -1835920.03  0 1.0 0 -613050.27  0 0 1.0 -83.71  0 0 0 1.0"
-
+                "matrix": matrix
             },
             {
                 "type": "writers.las",
@@ -85,9 +99,16 @@ def main():
         ]
     }
 
+    import pdal  # pipeline.py bu modülü PDAL'sız da içe aktarır
     pipeline = pdal.Pipeline(json.dumps(pipeline_json))
     count = pipeline.execute()
 
+    # ---------------------------
+    # 5) Manifest: tiling.py ofseti buradan okur (kodda sabit değer gerekmez)
+    # ---------------------------
+    input_scale = (load_manifest(INPUT) or {}).get("scale", 1.0)
+    record_dataset_transform(OUTPUT, INPUT, input_scale * SCALE, (origin_x, origin_y, origin_z), bbox)
+
     print("\nİşlenen nokta sayısı:", count)
     print("Yeni ölçeklendirilmiş LAZ dosyası kaydedildi:")
     print(OUTPUT)
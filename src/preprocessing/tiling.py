@@ -1,20 +1,80 @@
 import os
-import json
+import sys
+import argparse
 import laspy 
 import numpy as np 
 import open3d as o3d
 from tqdm import tqdm
 
+# src/ klasörünü import yoluna ekle (ortak modüller için)
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from common.incremental import (
+    file_fingerprint, fingerprint_matches, load_tile_metadata, record_stage
+)
+from common.manifest import dataset_origin
+from common.catalog import save_tile_metadata, load_all_metadata
+from common.point_cache import las_columns, write_point_cache, build_point_cache, drop_point_cache
+from common.instrumentation import (
+    StageTimer, record_timings, build_run_report, print_run_report, write_run_report
+)
+
 # --- AYARLAR VE SABİTLER ---
 TILE_SIZE = 100.0
 OVERLAP = 10.0
 
+# Akış (streaming) modu: bellek kullanımı dosya boyutuna değil bu değerlere bağlıdır.
+STREAM_CHUNK_SIZE = 5_000_000     # Her seferde okunacak nokta sayısı
+STREAM_FLUSH_POINTS = 20_000_000  # Karo tamponları bu sayıya ulaşınca diske yazılır
+
 # PDAL aşamasında kullandığımız OFFSET değerleri (Bunları çıkarmıştık)
 # Bu değerler, Local -> Global dönüşümü için metadata'ya eklenecek.
+# Normalde ofset girdi dosyasının manifest'inden (scaling.py / transform.py --center)
+# okunur; bu sabitler yalnızca manifest'i olmayan eski çıktılar için yedektir.
 GLOBAL_OFFSET_X = 1835920.03
 GLOBAL_OFFSET_Y = 613050.27
 GLOBAL_OFFSET_Z = 83.71
 
+# Karo başına yazılacak formatlar ve dosya adları ("las", "pcd")
+TILE_FORMATS = ("las", "pcd")
+# İsteğe bağlı: "npy" = sütunlu, np.memmap ile açılan sıkıştırılmamış önbellek
+# (common/point_cache.py); sonraki aşamalar LAZ çözmeden okur.
+TILE_FORMAT_CHOICES = ("las", "pcd", "npy")
+TILE_FILENAMES = {
+    "las": "raw.las",
+    "pcd": "raw.pcd",
+    "npy": "raw.columns"
+}
+
+def dataset_offset(input_las_path):
+    """
+    Girdi dosyasının Local -> Global ofsetini manifest'ten okur.
+    Manifest yoksa GLOBAL_OFFSET_* sabitlerine döner.
+    """
+    origin = dataset_origin(input_las_path)
+    if origin is None:
+        print(f"Uyarı: {input_las_path} için manifest bulunamadı, sabit GLOBAL_OFFSET değerleri kullanılıyor.")
+        return (GLOBAL_OFFSET_X, GLOBAL_OFFSET_Y, GLOBAL_OFFSET_Z)
+    return origin
+
+
+def write_pcd_from_points(points, pcd_path):
+    """
+    (N, 3) XYZ dizisini Open3D ile doğrudan PCD olarak yazar (diskten tekrar okuma yok).
+    Open3D hata fırlatmak yerine False döndürür; yazılamazsa yarım dosya
+    silinir ve OSError fırlatılır.
+    """
+    drop_point_cache(pcd_path)
+    pcd = o3d.geometry.PointCloud()
+    pcd.points = o3d.utility.Vector3dVector(points)
+    if not o3d.io.write_point_cloud(pcd_path, pcd, write_ascii=False):
+        if os.path.exists(pcd_path):
+            os.remove(pcd_path)
+        raise OSError(f"{pcd_path} yazılamadı")
+
+
 def convert_las_to_pcd(las_path, pcd_path):
     """
     Bir LAS dosyasını okur ve Open3D kullanarak PCD formatına dönüştürür.
@@ -23,22 +83,279 @@ def convert_las_to_pcd(las_path, pcd_path):
         las = laspy.read(las_path)
         # Noktaların sadece X, Y, Z koordinatlarını bir NumPy dizisine al
         points = np.vstack((las.x, las.y, las.z)).transpose()
-        
-        pcd = o3d.geometry.PointCloud()
-        pcd.points = o3d.utility.Vector3dVector(points)
-        
-        o3d.io.write_point_cloud(pcd_path, pcd, write_ascii=False)
+        write_pcd_from_points(points, pcd_path)
         return True
         
     except Exception as e:
         print(f"Hata: {las_path} dosyası PCD'ye dönüştürülürken hata oluştu: {e}")
         return False
+
+
+def export_tile(tile_dir, header, points_data, formats=TILE_FORMATS):
+    """
+    Filtrelenmiş karo noktalarını bellekteki dizilerden istenen formatlara yazar.
+    PCD, yazılan raw.las tekrar okunarak değil doğrudan points_data'dan üretilir.
+
+    Dönüş: metadata 'files' bölümü için {format: dosya adı}
+    """
+    files = {}
+    if "las" in formats:
+        las_path = os.path.join(tile_dir, TILE_FILENAMES["las"])
+        drop_point_cache(las_path)
+        new_las = laspy.LasData(header)
+        new_las.points = points_data
+        new_las.write(las_path)
+        files["las"] = TILE_FILENAMES["las"]
+
+    if "pcd" in formats:
+        pcd_path = os.path.join(tile_dir, TILE_FILENAMES["pcd"])
+        try:
+            points = np.column_stack((points_data.x, points_data.y, points_data.z))
+            write_pcd_from_points(points, pcd_path)
+            files["pcd"] = TILE_FILENAMES["pcd"]
+        except Exception as e:
+            print(f"Hata: {pcd_path} yazılırken hata oluştu: {e}")
+
+    if "npy" in formats:
+        xyz, columns = las_columns(points_data)
+        las_path = os.path.join(tile_dir, TILE_FILENAMES["las"])
+        write_point_cache(os.path.join(tile_dir, TILE_FILENAMES["npy"]), xyz, columns,
+                          source_path=las_path if "las" in formats else None)
+        files["npy"] = TILE_FILENAMES["npy"]
+
+    return files
             
-def create_files_from_las(input_las_path, output_dir):
+def _axis_candidates(values, steps, tile_size):
+    """
+    Tek eksen için her noktanın düşebileceği karo indekslerini ve geçerlilik
+    maskelerini döndürür. Overlap nedeniyle bir nokta en fazla
+    ceil(TILE_SIZE / step) karoya girebilir; kayan nokta hatalarına karşı
+    tahminin bir fazlası ve bir eksiği de kontrol edilir.
+    """
+    n_steps = len(steps)
+    step = steps[1] - steps[0] if n_steps > 1 else tile_size
+    # Noktanın başlangıç sınırını geçtiği son karo (yaklaşık)
+    base = np.floor((values - steps[0]) / step).astype(np.int64)
+    span = int(np.ceil(tile_size / step))
+
+    candidates = []
+    for m in range(-1, span + 1):
+        idx = base - m
+        in_range = (idx >= 0) & (idx < n_steps)
+        safe_idx = np.clip(idx, 0, n_steps - 1)
+        # Sınır testi, eski maske ile birebir aynı: start <= v < start + TILE_SIZE
+        start = steps[safe_idx]
+        valid = in_range & (values >= start) & (values < start + tile_size)
+        candidates.append((safe_idx, valid))
+    return candidates
+
+
+def compute_tile_assignments(x, y, x_steps, y_steps, tile_size=TILE_SIZE):
+    """
+    Her noktanın karo indeksini tek seferde, vektörel olarak hesaplar.
+    Overlap bandındaki noktalar düştükleri tüm karolara atanır.
+
+    Dönüş: (tile_ids, point_indices) -- tile_id = i * len(y_steps) + j.
+    Diziler önce tile_id, sonra nokta indeksine göre sıralıdır; böylece her
+    karonun noktaları bitişik bir dilimdir ve orijinal sırayı korur.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n_y = len(y_steps)
+    if len(x) == 0 or len(x_steps) == 0 or n_y == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+
+    x_candidates = _axis_candidates(x, x_steps, tile_size)
+    y_candidates = _axis_candidates(y, y_steps, tile_size)
+
+    tile_id_parts = []
+    point_idx_parts = []
+    for xi, x_valid in x_candidates:
+        if not x_valid.any():
+            continue
+        for yj, y_valid in y_candidates:
+            point_idx = np.flatnonzero(x_valid & y_valid)
+            if len(point_idx) == 0:
+                continue
+            tile_id_parts.append(xi[point_idx] * n_y + yj[point_idx])
+            point_idx_parts.append(point_idx)
+
+    if not tile_id_parts:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+
+    tile_ids = np.concatenate(tile_id_parts)
+    point_indices = np.concatenate(point_idx_parts)
+
+    # Aynı nokta aynı karoya iki kez atanamaz (aday indeksler farklı),
+    # ama sıralama yine de (tile_id, nokta) çiftine göre yapılır.
+    order = np.lexsort((point_indices, tile_ids))
+    return tile_ids[order], point_indices[order]
+
+
+def iter_tile_slices(tile_ids):
+    """
+    Sıralı tile_ids dizisi için (tile_id, start, end) üçlülerini döndürür.
+    """
+    if len(tile_ids) == 0:
+        return
+    unique_ids, starts, counts = np.unique(tile_ids, return_index=True, return_counts=True)
+    for tile_id, start, count in zip(unique_ids, starts, counts):
+        yield int(tile_id), int(start), int(start + count)
+
+
+def build_tile_metadata(tile_name, i, j, source_file, point_count, tile_x_min, tile_y_min,
+                        files=None, offset=None):
+    """
+    Karo için metadata.json içeriğini oluşturur.
+    offset: (x, y, z) Local -> Global ofseti; verilmezse GLOBAL_OFFSET_* kullanılır.
+    """
+    offset_x, offset_y, offset_z = offset if offset is not None else (
+        GLOBAL_OFFSET_X, GLOBAL_OFFSET_Y, GLOBAL_OFFSET_Z
+    )
+    # 1. Yerel (Local) Sınırlar (Unity'nin kullanacağı)
+    tile_x_max = tile_x_min + TILE_SIZE
+    tile_y_max = tile_y_min + TILE_SIZE
+
+    # 2. Global (Orijinal) Sınırlar (Metadata için hesaplanır)
+    global_bounds = {
+        "x_min": tile_x_min + offset_x,
+        "x_max": tile_x_max + offset_x,
+        "y_min": tile_y_min + offset_y,
+        "y_max": tile_y_max + offset_y
+    }
+
+    return {
+        "tile_name": tile_name,
+        "grid_index": {"i": i, "j": j},
+        "source_file": source_file,
+        "point_count": point_count,
+        "coordinate_system": {
+            "type": "local_centered",
+            "unit": "meters",
+            "axis": "z_up" # Unity'ye atarken y_up olacak
+        },
+        "offset_values": {
+            "x": offset_x,
+            "y": offset_y,
+            "z": offset_z
+        },
+        "bounds": {
+            "local": {
+                "x_min": tile_x_min, "y_min": tile_y_min,
+                "x_max": tile_x_max, "y_max": tile_y_max
+            },
+            "global": global_bounds
+        },
+        "files": files if files is not None else dict(TILE_FILENAMES)
+    }
+
+
+def write_tile_metadata(tile_dir, metadata):
+    # Katalog yoksa oluşturulur; metadata.json da yazılır (Unity)
+    save_tile_metadata(tile_dir, metadata, create=True)
+
+
+def tiling_params(formats=TILE_FORMATS):
+    """
+    Tiling çıktısını belirleyen parametreler (artımlı mod için kaydedilir).
+    """
+    return {"tile_size": TILE_SIZE, "overlap": OVERLAP, "formats": sorted(formats)}
+
+
+def _existing_tile_metadata(output_dir):
+    if not os.path.isdir(output_dir):
+        return {}
+    # Katalog varsa tek sorgu; yoksa her karonun metadata.json'u okunur
+    all_metadata = load_all_metadata(output_dir)
+    if all_metadata is not None:
+        return {tile_dir: m for tile_dir, m in all_metadata.items() if os.path.isdir(tile_dir)}
+    return {
+        entry.path: load_tile_metadata(entry.path)
+        for entry in os.scandir(output_dir) if entry.is_dir()
+    }
+
+
+def tiling_is_current(input_las_path, output_dir, existing=None, formats=TILE_FORMATS):
+    """
+    Önceki tiling çıktısı hâlâ geçerli mi? Kaynak dosya (önce stat, gerekirse
+    içerik özeti) ve tile_size/overlap aynıysa, tüm karoların dosyaları
+    duruyorsa ve karo sayısı kayıtla tutuyorsa True döner.
+    """
+    existing = _existing_tile_metadata(output_dir) if existing is None else existing
+    if not existing:
+        return False
+
+    params = tiling_params(formats)
+    source_record = None
+    tile_count = None
+    for tile_dir, metadata in existing.items():
+        record = (metadata or {}).get("stages", {}).get("tiling")
+        if not record or record.get("params") != params:
+            return False
+        source = record.get("inputs", {}).get("source")
+        if source_record is None:
+            source_record, tile_count = source, record.get("tile_count")
+        elif source != source_record:
+            return False
+        for name in TILE_FORMAT_CHOICES:
+            filename = metadata.get("files", {}).get(name)
+            if filename and not os.path.exists(os.path.join(tile_dir, filename)):
+                return False
+
+    # Kaynak dosya yalnızca bir kez kontrol edilir
+    return tile_count == len(existing) and fingerprint_matches(input_las_path, source_record)
+
+
+def _source_fingerprint(input_las_path, existing):
+    # Önceki kayıtta aynı boyut/mtime varsa büyük kaynak dosya tekrar hash'lenmez
+    previous = None
+    for metadata in existing.values():
+        previous = (metadata or {}).get("stages", {}).get("tiling", {}).get("inputs", {}).get("source")
+        if previous:
+            break
+    return file_fingerprint(input_las_path, previous)
+
+
+def finalize_tile_metadata(tile_dir, metadata, input_las_path, source_fingerprint,
+                           tile_count, existing=None, formats=TILE_FORMATS):
+    """
+    Tiling kaydını metadata'ya ekler ve dosyaya yazar.
+    existing verilirse (artımlı mod) sonraki aşamaların kayıtları (CSF, mesh,
+    dosya referansları) korunur; raw.las içeriği değişmediyse bu aşamalar
+    yeniden çalışmaz.
+    """
+    if existing:
+        merged = dict(existing)
+        merged.update(metadata)
+        merged["files"] = {**existing.get("files", {}), **metadata["files"]}
+        merged["stages"] = dict(existing.get("stages", {}))
+        merged["timings"] = {**existing.get("timings", {}), **metadata.get("timings", {})}
+        metadata = merged
+
+    record_stage(
+        metadata, "tiling", {"source": input_las_path}, tiling_params(formats),
+        known_fingerprints={"source": source_fingerprint}, tile_count=tile_count
+    )
+    write_tile_metadata(tile_dir, metadata)
+
+
+def create_files_from_las(input_las_path, output_dir, incremental=False, formats=TILE_FORMATS):
+    """
+    Girdiyi tek seferde okuyup overlap'li karolara böler (tile_i_j/ + metadata.json).
+    Dönüş: çalıştırma raporu (dosyaya yazmak çağıranda); karolar güncelse
+    veya girdi okunamazsa None.
+    """
     print(f"'{input_las_path}' dosyası işleniyor...")
+
+    existing = _existing_tile_metadata(output_dir)
+    if incremental and tiling_is_current(input_las_path, output_dir, existing, formats):
+        print("Karolar güncel (kaynak ve parametreler değişmedi), tiling atlandı.")
+        return
     
+    stage_timer = StageTimer()
     try: 
-        las_file = laspy.read(input_las_path)
+        with stage_timer.step("read"):
+            las_file = laspy.read(input_las_path)
         header = las_file.header
     except Exception as e:
         print(f"Hata: {input_las_path} dosyası okunamadı: {e}")
@@ -56,87 +373,215 @@ def create_files_from_las(input_las_path, output_dir):
 
     total_tiles = len(x_steps) * len(y_steps)
     print(f"Toplam {total_tiles} olası karo taranacak.") 
+
+    # Tüm noktaların karo indeksleri tek geçişte hesaplanır; her karo için
+    # bütün bulut üzerinde yeni bir maske oluşturulmaz (O(nokta x karo) yerine
+    # O(nokta log nokta)).
+    with stage_timer.step("assign"):
+        tile_ids, point_indices = compute_tile_assignments(
+            las_file.x, las_file.y, x_steps, y_steps, TILE_SIZE
+        )
+        tile_slices = list(iter_tile_slices(tile_ids))
+    n_y = len(y_steps)
+    offset = dataset_offset(input_las_path)
+    source_fingerprint = _source_fingerprint(input_las_path, existing)
     
     tile_count = 0
-    with tqdm(total=total_tiles, desc="Karolar oluşturuluyor") as pbar:
-        for i, x in enumerate(x_steps):
-            for j, y in enumerate(y_steps):
-                pbar.update(1)
-                
-                # 1. Yerel (Local) Sınırlar (Unity'nin kullanacağı)
-                tile_x_min, tile_x_max = x, x + TILE_SIZE
-                tile_y_min, tile_y_max = y, y + TILE_SIZE
-
-                # 2. Global (Orijinal) Sınırlar (Metadata için hesaplanır)
-                global_bounds = {
-                    "x_min": tile_x_min + GLOBAL_OFFSET_X,
-                    "x_max": tile_x_max + GLOBAL_OFFSET_X,
-                    "y_min": tile_y_min + GLOBAL_OFFSET_Y,
-                    "y_max": tile_y_max + GLOBAL_OFFSET_Y
-                }
-
-                # 3. Nokta Filtreleme (Yerel koordinatlara göre)
-                points_in_tile_mask = (
-                    (las_file.x >= tile_x_min) & (las_file.x < tile_x_max) &
-                    (las_file.y >= tile_y_min) & (las_file.y < tile_y_max)
-                )
-                
-                points_data = las_file.points[points_in_tile_mask]
-
-                if len(points_data) == 0:
-                    continue
-                
-                tile_count += 1
-                # İsimlendirme: Hem index hem de yerel koordinat bilgisini içerse iyi olur
-                tile_name = f"tile_{i}_{j}" 
-                tile_dir = os.path.join(output_dir, tile_name)
-                os.makedirs(tile_dir, exist_ok=True)
-
-                # 4. Dosyaları Kaydetme
-                tile_las_path = os.path.join(tile_dir, "raw.las")
-                new_las = laspy.LasData(header)
-                new_las.points = points_data
-                new_las.write(tile_las_path)
-                
-                tile_pcd_path = os.path.join(tile_dir, "raw.pcd")
-                convert_las_to_pcd(tile_las_path, tile_pcd_path)
-                
-                # 5. Zenginleştirilmiş Metadata (KRİTİK BÖLÜM)
-                metadata = {
-                    "tile_name": tile_name,
-                    "grid_index": {"i": i, "j": j},
-                    "source_file": os.path.basename(input_las_path),
-                    "point_count": len(points_data),
-                    "coordinate_system": {
-                        "type": "local_centered",
-                        "unit": "meters",
-                        "axis": "z_up" # Unity'ye atarken y_up olacak
-                    },
-                    "offset_values": {
-                        "x": GLOBAL_OFFSET_X,
-                        "y": GLOBAL_OFFSET_Y,
-                        "z": GLOBAL_OFFSET_Z
-                    },
-                    "bounds": {
-                        "local": {
-                            "x_min": tile_x_min, "y_min": tile_y_min,
-                            "x_max": tile_x_max, "y_max": tile_y_max
-                        },
-                        "global": global_bounds
-                    },
-                    "files": {
-                        "las": "raw.las",
-                        "pcd": "raw.pcd"
-                    }
-                }
-                
-                metadata_path = os.path.join(tile_dir, "metadata.json")
-                with open(metadata_path, 'w') as f:
-                    json.dump(metadata, f, indent=4)
+    tile_timings = []
+    for tile_id, start, end in tqdm(tile_slices, desc="Karolar oluşturuluyor"):
+        timer = StageTimer()
+        i, j = divmod(tile_id, n_y)
+        with timer.step("gather"):
+            points_data = las_file.points[point_indices[start:end]]
+
+        tile_count += 1
+        # İsimlendirme: Hem index hem de yerel koordinat bilgisini içerse iyi olur
+        tile_name = f"tile_{i}_{j}" 
+        tile_dir = os.path.join(output_dir, tile_name)
+        os.makedirs(tile_dir, exist_ok=True)
+
+        # Dosyaları Kaydetme (bellekteki dizilerden, yeniden okuma yok)
+        with timer.step("write"):
+            files = export_tile(tile_dir, header, points_data, formats)
+        timer.count("points", len(points_data))
+        
+        # Zenginleştirilmiş Metadata (KRİTİK BÖLÜM)
+        metadata = build_tile_metadata(
+            tile_name, i, j, os.path.basename(input_las_path), len(points_data),
+            x_steps[i], y_steps[j], files, offset
+        )
+        record_timings(metadata, "tiling", timer)
+        tile_timings.append((tile_name, metadata["timings"]["tiling"]))
+        finalize_tile_metadata(
+            tile_dir, metadata, input_las_path, source_fingerprint, len(tile_slices),
+            existing.get(tile_dir) if incremental else None, formats
+        )
 
     print(f"\nİşlem tamamlandı. Toplam {tile_count} adet dolu karo oluşturuldu.")
 
+    stage_steps = stage_timer.as_dict()
+    print("Aşama adımları: " + ", ".join(f"{k}={v:.2f} sn" for k, v in stage_steps["steps"].items()))
+    report = build_run_report("tiling", tile_timings, elapsed_sec=stage_steps["total_sec"])
+    report["stage_steps"] = stage_steps["steps"]
+    print_run_report(report)
+    return report
+
+def _flush_tile_buffers(buffers, header, output_dir, n_y, created_tiles):
+    """
+    Bellekte bekleyen karo noktalarını ilgili raw.las dosyalarına yazar.
+    Karo bu çalıştırmada ilk kez görülüyorsa dosya oluşturulur (eski dosya
+    varsa üzerine yazılır), sonraki seferlerde LasAppender ile sonuna eklenir.
+    Başlıktaki nokta sayısı ve sınırlar her kapanışta güncellenir.
+    """
+    for tile_id, records in buffers.items():
+        i, j = divmod(tile_id, n_y)
+        tile_dir = os.path.join(output_dir, f"tile_{i}_{j}")
+        tile_las_path = os.path.join(tile_dir, "raw.las")
+
+        if tile_id in created_tiles:
+            with laspy.open(tile_las_path, mode="a") as appender:
+                for record in records:
+                    appender.append_points(record)
+        else:
+            os.makedirs(tile_dir, exist_ok=True)
+            drop_point_cache(tile_las_path)
+            with laspy.open(tile_las_path, mode="w", header=header) as writer:
+                for record in records:
+                    writer.write_points(record)
+            created_tiles.add(tile_id)
+    buffers.clear()
+
+
+def create_files_from_las_streaming(input_las_path, output_dir,
+                                    chunk_size=STREAM_CHUNK_SIZE,
+                                    flush_points=STREAM_FLUSH_POINTS,
+                                    incremental=False,
+                                    formats=TILE_FORMATS):
+    """
+    create_files_from_las ile aynı çıktıyı (tile_i_j/raw.las + metadata.json)
+    üretir, fakat girdiyi laspy.open(...).chunk_iterator ile parça parça okur.
+    Tepe bellek kullanımı chunk_size ve flush_points ile sınırlıdır; tüm
+    bulut hiçbir zaman RAM'e alınmaz.
+
+    Karolar parça parça biriktiği için raw.las bu modda her zaman yazılır;
+    PCD ve npy önbelleği istenirse karo tamamlandıktan sonra raw.las'tan üretilir.
+
+    Dönüş: create_files_from_las ile aynı (çalıştırma raporu veya None).
+    """
+    formats = tuple(sorted(set(formats) | {"las"}))
+    print(f"'{input_las_path}' dosyası akış (streaming) modunda işleniyor...")
+
+    existing = _existing_tile_metadata(output_dir)
+    if incremental and tiling_is_current(input_las_path, output_dir, existing, formats):
+        print("Karolar güncel (kaynak ve parametreler değişmedi), tiling atlandı.")
+        return
+
+    stage_timer = StageTimer()
+    try:
+        reader = laspy.open(input_las_path)
+    except Exception as e:
+        print(f"Hata: {input_las_path} dosyası okunamadı: {e}")
+        return
+
+    with reader:
+        header = reader.header
+
+        # Sınırlar başlıktan okunur, noktaları taramaya gerek yok
+        x_min, y_min, _ = header.min
+        x_max, y_max, _ = header.max
+        print(f"Yerel Veri Sınırları (Local): X [{x_min:.2f}, {x_max:.2f}], Y [{y_min:.2f}, {y_max:.2f}]")
+
+        step = TILE_SIZE - OVERLAP
+        x_steps = np.arange(x_min, x_max, step)
+        y_steps = np.arange(y_min, y_max, step)
+        n_y = len(y_steps)
+        print(f"Toplam {len(x_steps) * n_y} olası karo taranacak.")
+
+        tile_counts = {}
+        created_tiles = set()
+        buffers = {}
+        buffered_points = 0
+
+        total_chunks = int(np.ceil(header.point_count / chunk_size)) if chunk_size > 0 else 0
+        chunks = reader.chunk_iterator(chunk_size)
+        for _ in tqdm(range(total_chunks), desc="Parçalar karolara dağıtılıyor"):
+            with stage_timer.step("read"):
+                chunk = next(chunks, None)
+            if chunk is None:
+                break
+            with stage_timer.step("assign"):
+                tile_ids, point_indices = compute_tile_assignments(
+                    chunk.x, chunk.y, x_steps, y_steps, TILE_SIZE
+                )
+                for tile_id, start, end in iter_tile_slices(tile_ids):
+                    buffers.setdefault(tile_id, []).append(chunk[point_indices[start:end]])
+                    tile_counts[tile_id] = tile_counts.get(tile_id, 0) + (end - start)
+                    buffered_points += end - start
+
+            if buffered_points >= flush_points:
+                with stage_timer.step("flush"):
+                    _flush_tile_buffers(buffers, header, output_dir, n_y, created_tiles)
+                buffered_points = 0
+
+        with stage_timer.step("flush"):
+            _flush_tile_buffers(buffers, header, output_dir, n_y, created_tiles)
+
+    # Başlıklar kapanışta tamamlandı; PCD ve metadata son nokta sayılarıyla yazılır
+    source_fingerprint = _source_fingerprint(input_las_path, existing)
+    offset = dataset_offset(input_las_path)
+    tile_timings = []
+    for tile_id in tqdm(sorted(tile_counts), desc="Karo metadata yazılıyor"):
+        # raw.las yazımı karolar arasında paylaşılan flush adımında ölçülür;
+        # karo zamanlaması raw.las'tan türetilen çıktıları kapsar
+        timer = StageTimer()
+        i, j = divmod(tile_id, n_y)
+        tile_name = f"tile_{i}_{j}"
+        tile_dir = os.path.join(output_dir, tile_name)
+
+        files = {"las": TILE_FILENAMES["las"]}
+        if "pcd" in formats:
+            with timer.step("pcd"):
+                if convert_las_to_pcd(os.path.join(tile_dir, TILE_FILENAMES["las"]),
+                                      os.path.join(tile_dir, TILE_FILENAMES["pcd"])):
+                    files["pcd"] = TILE_FILENAMES["pcd"]
+        if "npy" in formats:
+            with timer.step("columns"):
+                build_point_cache(os.path.join(tile_dir, TILE_FILENAMES["las"]))
+            files["npy"] = TILE_FILENAMES["npy"]
+        timer.count("points", tile_counts[tile_id])
+
+        metadata = build_tile_metadata(
+            tile_name, i, j, os.path.basename(input_las_path), tile_counts[tile_id],
+            x_steps[i], y_steps[j], files, offset
+        )
+        record_timings(metadata, "tiling", timer)
+        tile_timings.append((tile_name, metadata["timings"]["tiling"]))
+        finalize_tile_metadata(
+            tile_dir, metadata, input_las_path, source_fingerprint, len(tile_counts),
+            existing.get(tile_dir) if incremental else None, formats
+        )
+
+    print(f"\nİşlem tamamlandı. Toplam {len(tile_counts)} adet dolu karo oluşturuldu.")
+
+    stage_steps = stage_timer.as_dict()
+    print("Aşama adımları: " + ", ".join(f"{k}={v:.2f} sn" for k, v in stage_steps["steps"].items()))
+    report = build_run_report("tiling", tile_timings, elapsed_sec=stage_steps["total_sec"])
+    report["stage_steps"] = stage_steps["steps"]
+    print_run_report(report)
+    return report
+
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Ölçeklenmiş LAZ dosyasını overlap'li karolara böler.")
+    parser.add_argument("--stream", action="store_true",
+                        help="Girdiyi parça parça oku (düşük bellek, büyük dosyalar için).")
+    parser.add_argument("--chunk_size", type=int, default=STREAM_CHUNK_SIZE,
+                        help="Akış modunda her seferde okunacak nokta sayısı.")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Kaynak ve parametreler değişmediyse tiling'i atla.")
+    parser.add_argument("--formats", nargs="+", choices=TILE_FORMAT_CHOICES, default=list(TILE_FORMATS),
+                        help="Karo başına yazılacak formatlar (ör. --formats las).")
+    args = parser.parse_args()
+
     # Girdi dosyasını önceki adımda oluşturduğumuz centered_zup dosyası olarak güncelledik
     input_file = "RS000016_unity_scaled.laz" 
     
@@ -145,7 +590,15 @@ if __name__ == '__main__':
 
     os.makedirs(processed_data_path, exist_ok=True)
 
-    if os.path.exists(raw_data_path):
-        create_files_from_las(raw_data_path, processed_data_path)
-    else:
+    if not os.path.exists(raw_data_path):
         print(f"Hata: Girdi dosyası bulunamadı -> {raw_data_path}")
+    else:
+        if args.stream:
+            report = create_files_from_las_streaming(raw_data_path, processed_data_path,
+                                                     chunk_size=args.chunk_size, incremental=args.incremental,
+                                                     formats=args.formats)
+        else:
+            report = create_files_from_las(raw_data_path, processed_data_path, incremental=args.incremental,
+                                           formats=args.formats)
+        if report:
+            print(f"Rapor: {write_run_report(report)}")
@@ -1,15 +1,29 @@
 import os
+import sys
 import json
-import pdal
+import laspy
+import argparse
+import subprocess
 from pathlib import Path
 
+# src/ klasörünü import yoluna ekle (ortak modüller için)
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from common.manifest import record_dataset_transform
+
 # ----------------------------------------------------------------------
 # Ayarlar
 # ----------------------------------------------------------------------
 INPUT_PATH = Path("data/raw_data/RS000016.laz")
 OUTPUT_DIR = Path("data/processed_data")
-OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 OUTPUT_PATH = OUTPUT_DIR / "RS000016_unity_meters.laz"
+# Birleşik (ölçek + merkezleme) modun çıktısı: tiling.py'nin beklediği dosya
+CENTERED_OUTPUT_PATH = OUTPUT_DIR / "RS000016_unity_scaled.laz"
+
+# PDAL stream modunda her seferde işlenecek nokta sayısı (bellek bununla sınırlı)
+STREAM_CHUNK_SIZE = 1_000_000
 
 # US survey foot -> metre çarpanı
 FTUS_TO_M = 0.3048006096012192
@@ -50,22 +64,146 @@ pipeline_json = {
     ]
 }
 
+def read_bbox(input_path):
+    """
+    Girdi dosyasının bbox'ını noktaları taramadan alır: önce LAS başlığı
+    (laspy, yalnızca başlık okunur), olmazsa 'pdal info --summary'.
+    Dönüş: {"minx", "maxx", "miny", "maxy", "minz", "maxz"} (kaynak birimde)
+    """
+    try:
+        with laspy.open(str(input_path)) as f:
+            mins, maxs = f.header.mins, f.header.maxs
+        return {
+            "minx": float(mins[0]), "maxx": float(maxs[0]),
+            "miny": float(mins[1]), "maxy": float(maxs[1]),
+            "minz": float(mins[2]), "maxz": float(maxs[2])
+        }
+    except Exception as e:
+        print(f"Uyarı: LAS başlığından bbox okunamadı ({e}), 'pdal info --summary' kullanılacak.")
+
+    meta = json.loads(subprocess.check_output(
+        ["pdal", "info", "--summary", str(input_path)],
+        text=True
+    ))
+    bounds = meta["summary"]["bounds"]
+    return {key: float(bounds[key]) for key in ("minx", "maxx", "miny", "maxy", "minz", "maxz")}
+
+
+def compute_origin(bbox, scale=FTUS_TO_M):
+    """
+    Ölçeklenmiş koordinatlarda bbox merkezi (metre): merkezleme ofseti.
+    """
+    return (
+        (bbox["minx"] + bbox["maxx"]) / 2.0 * scale,
+        (bbox["miny"] + bbox["maxy"]) / 2.0 * scale,
+        (bbox["minz"] + bbox["maxz"]) / 2.0 * scale
+    )
+
+
+def build_scale_offset_matrix(scale, origin):
+    """
+    Önce ölçek (s), sonra merkezleme (-origin) yapan tek 4x4 matris:
+
+    [ Xu ]   [  s    0    0   -ox ] [ X ]
+    [ Yu ] = [  0    s    0   -oy ] [ Y ]
+    [ Zu ]   [  0    0    s   -oz ] [ Z ]
+    [ 1  ]   [  0    0    0    1  ] [ 1 ]
+    """
+    ox, oy, oz = origin
+    return (
+        f"{scale} 0 0 {-ox} "
+        f"0 {scale} 0 {-oy} "
+        f"0 0 {scale} {-oz} "
+        "0 0 0 1"
+    )
+
+
+def run_fused_transform(input_path=INPUT_PATH, output_path=CENTERED_OUTPUT_PATH,
+                        chunk_size=STREAM_CHUNK_SIZE):
+    """
+    ftUS -> metre ölçeği ve merkezleme ofsetini tek PDAL geçişinde uygular.
+    bbox başlıktan alınır ('pdal info --stats' ile ek tam tarama yok) ve
+    pipeline stream modunda çalışır; bellek kullanımı dosya boyutundan bağımsızdır.
+    Eski akıştaki üç tam decode/encode geçişi (transform, stats, scaling) bire iner.
+    """
+    bbox = read_bbox(input_path)
+    origin = compute_origin(bbox, FTUS_TO_M)
+    matrix = build_scale_offset_matrix(FTUS_TO_M, origin)
+
+    print("Girdi dosyası :", input_path)
+    print("Çıktı dosyası :", output_path)
+    print("Global origin (metre):", origin)
+    print("Kullanılan dönüşüm matrisi:")
+    print(matrix)
+
+    Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+    fused_pipeline_json = {
+        "pipeline": [
+            str(input_path),
+            {
+                "type": "filters.transformation",
+                "matrix": matrix
+            },
+            {
+                "type": "writers.las",
+                "filename": str(output_path),
+                "minor_version": 4,
+                "dataformat_id": 6
+            }
+        ]
+    }
+
+    import pdal  # pipeline.py bu modülü PDAL'sız da içe aktarır
+    pipeline = pdal.Pipeline(json.dumps(fused_pipeline_json))
+    if pipeline.streamable:
+        count = pipeline.execute_streaming(chunk_size=chunk_size)
+    else:
+        print("Uyarı: Pipeline stream modunu desteklemiyor, standart modda çalıştırılıyor.")
+        count = pipeline.execute()
+
+    print(f"İşlenen nokta sayısı: {count}")
+    print("Ölçeklenmiş ve merkezlenmiş LAZ dosyası kaydedildi:")
+    print(output_path)
+
+    # tiling.py ofseti bu manifest'ten okur
+    record_dataset_transform(output_path, input_path, FTUS_TO_M, origin, bbox)
+    return origin
+
+
 def main():
     if not INPUT_PATH.exists():
         raise FileNotFoundError(f"Girdi dosyası bulunamadı: {INPUT_PATH}")
 
+    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+
     print("Girdi dosyası :", INPUT_PATH)
     print("Çıktı dosyası :", OUTPUT_PATH)
     print("Kullanılan dönüşüm matrisi:")
   
 
+    import pdal
     pipeline = pdal.Pipeline(json.dumps(pipeline_json))
     count = pipeline.execute()
     print(f"İşlenen nokta sayısı: {count}")
 
+    # Sadece ölçek uygulandı (ofset yok); scaling.py toplam ölçeği buradan alır
+    record_dataset_transform(OUTPUT_PATH, INPUT_PATH, FTUS_TO_M, (0.0, 0.0, 0.0))
+
     print("Dönüştürülmüş LAZ dosyası kaydedildi:")
     print(OUTPUT_PATH)
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Ham LAZ'ı metreye çevirir (opsiyonel: tek geçişte merkezleme).")
+    parser.add_argument("--center", action="store_true",
+                        help="Ölçek + merkezlemeyi tek stream PDAL geçişinde yap (scaling.py gerekmez).")
+    parser.add_argument("--chunk_size", type=int, default=STREAM_CHUNK_SIZE,
+                        help="Stream modunda her seferde işlenecek nokta sayısı.")
+    args = parser.parse_args()
+
+    if args.center:
+        if not INPUT_PATH.exists():
+            raise FileNotFoundError(f"Girdi dosyası bulunamadı: {INPUT_PATH}")
+        run_fused_transform(INPUT_PATH, CENTERED_OUTPUT_PATH, chunk_size=args.chunk_size)
+    else:
+        main()
 
@@ -1,23 +1,214 @@
 # src/segmentation/csf_filter.py
 
 import os
+import sys
+import time
 import glob
-import pdal
+import copy
 import json
 import laspy
-from tqdm import tqdm
+import argparse
+import numpy as np
+from functools import partial
+
+# src/ klasörünü import yoluna ekle (ortak modüller için)
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from common.parallel import run_parallel, print_summary
+from common.incremental import load_tile_metadata, stage_is_current, record_stage
+from common.catalog import update_tile_metadata, tile_directories
+from common.point_cache import cache_path, las_columns, write_point_cache, build_point_cache, drop_point_cache
+from segmentation.csf_native import csf_ground_mask
+from common.instrumentation import (
+    StageTimer, record_timings, profiled, enable_profiling,
+    report_from_summary, print_run_report, write_run_report
+)
 
 # --- AYARLAR ---
 # Afet alanı için optimize edilmiş değerler
 CSF_RESOLUTION = 0.5  # Kumaşın ilmek boyutu (Metre). 0.5m idealdir.
 CSF_THRESHOLD = 0.5   # Zemin toleransı. 1.0m çok fazlaydı, 0.5m'ye çektik.
 CSF_SMOOTH = False    # True yaparsan zemin çok düzleşir, detay kaybolabilir.
+CSF_RETURNS = "last, first, intermediate, only"
+
+# Gruplu modda tek PDAL pipeline'ında işlenecek karo sayısı
+CSF_BATCH_SIZE = 64
+
+# CSF motoru: "pdal" (filters.csf) veya "native" (segmentation/csf_native.py,
+# NumPy; diske ve PDAL pipeline'ına gerek yok)
+CSF_ENGINE = "pdal"
+CSF_ENGINES = ("pdal", "native")
+
+
+def csf_params():
+    """
+    CSF çıktısını belirleyen parametreler (artımlı mod bunları karşılaştırır).
+    """
+    return {
+        "resolution": CSF_RESOLUTION,
+        "threshold": CSF_THRESHOLD,
+        "smooth": CSF_SMOOTH,
+        "returns": CSF_RETURNS
+    }
+
+
+def csf_stage_params(engine=CSF_ENGINE, params=None):
+    """
+    Artımlı mod kaydı için parametreler; motor değişirse karo yeniden işlenir.
+    (PDAL için eski kayıtlarla aynı kalsın diye motor yalnızca native'de eklenir.)
+    """
+    params = dict(params or csf_params())
+    if engine != "pdal":
+        params["engine"] = engine
+    return params
+
+
+def las_points_to_pdal_array(points):
+    """
+    laspy nokta kaydını PDAL'ın okuyabileceği yapılandırılmış NumPy dizisine
+    çevirir (CSF için gereken boyutlar + orijinal sırayı tutan OriginId).
+    """
+    return columns_to_pdal_array(np.column_stack((points.x, points.y, points.z)),
+                                 points.return_number, points.number_of_returns,
+                                 points.classification)
+
+
+def columns_to_pdal_array(xyz, return_number, number_of_returns, classification):
+    """
+    las_points_to_pdal_array'in sütun dizileri (ör. point_cache memmap'leri) için olanı.
+    """
+    array = np.empty(len(xyz), dtype=[
+        ("X", np.float64), ("Y", np.float64), ("Z", np.float64),
+        ("ReturnNumber", np.uint8), ("NumberOfReturns", np.uint8),
+        ("Classification", np.uint8), ("OriginId", np.uint32)
+    ])
+    array["X"] = xyz[:, 0]
+    array["Y"] = xyz[:, 1]
+    array["Z"] = xyz[:, 2]
+    array["ReturnNumber"] = return_number
+    array["NumberOfReturns"] = number_of_returns
+    array["Classification"] = classification
+    array["OriginId"] = np.arange(len(xyz), dtype=np.uint32)
+    return array
+
+
+def run_csf_on_array(array, params=None, engine=CSF_ENGINE):
+    """
+    Diske yazmadan, bellekteki dizi üzerinde CSF çalıştırır (PDAL filters.csf
+    veya engine="native" ile NumPy motoru).
+    Dönüş: girdi sırasına göre hizalanmış zemin maskesi (Classification == 2).
+    """
+    params = params or csf_params()
+    if engine == "native":
+        xyz = np.column_stack((array["X"], array["Y"], array["Z"]))
+        return csf_ground_mask(xyz, array["ReturnNumber"], array["NumberOfReturns"], **params)
+
+    pipeline_json = {
+        "pipeline": [
+            {
+                "type": "filters.csf",
+                **params
+            }
+        ]
+    }
+    import pdal  # Modül düzeyinde değil: NumPy motoru PDAL kurulu olmadan da çalışsın
+    pipeline = pdal.Pipeline(json.dumps(pipeline_json), arrays=[array])
+    pipeline.execute()
+    result = pipeline.arrays[0]
+
+    # Filtre noktaların sırasını değiştirebilir; OriginId ile orijinal sıraya döndür
+    ground_mask = np.zeros(len(array), dtype=bool)
+    ground_mask[result["OriginId"]] = result["Classification"] == 2
+    return ground_mask
+
 
-def apply_csf_with_pdal(tile_directory):
+def update_csf_metadata(tile_directory, input_las_path, raw_count, ground_count, timer=None,
+                        engine=CSF_ENGINE, params=None):
+    """
+    CSF sonrası karo metadata'sını (durum, parametreler, nokta sayıları,
+    dosya referansları, artımlı mod kaydı ve verilirse zamanlamalar) günceller.
+    """
+    params = params or csf_params()
+
+    def update(metadata):
+        # İşlem durumu ve istatistikler
+        metadata['processing_status'] = 'segmented'
+        metadata['segmentation_params'] = {
+            "resolution": params["resolution"],
+            "threshold": params["threshold"],
+            "engine": engine
+        }
+        metadata['point_counts'] = {
+            "raw": raw_count,
+            "ground": ground_count,
+            "non_ground": raw_count - ground_count
+        }
+
+        # Dosya referansları
+        metadata['files']['ground_data'] = 'ground.las'
+        metadata['files']['non_ground_data'] = 'non_ground.las'
+
+        # Artımlı mod için girdi parmak izi ve parametreler
+        record_stage(metadata, "csf", {"raw": input_las_path}, csf_stage_params(engine, params))
+        if timer is not None:
+            record_timings(metadata, "csf", timer)
+
+    update_tile_metadata(tile_directory, update)
+
+
+def cache_csf_outputs(tile_directory, points=None):
+    """
+    Karo sütunlu önbellekle üretildiyse (raw.columns) ground/non_ground için de
+    önbellek yazar. points (PDAL çıktı dizisi) verilirse LAZ dosyaları yeniden
+    çözülmez. Dönüş: önbellek yazıldı mı.
+    """
+    if not os.path.isdir(cache_path(os.path.join(tile_directory, "raw.las"))):
+        return False
+    for name, is_ground in (("ground", True), ("non_ground", False)):
+        las_path = os.path.join(tile_directory, f"{name}.las")
+        if points is None:
+            if os.path.exists(las_path):
+                build_point_cache(las_path)
+            continue
+        subset = points[(points["Classification"] == 2) == is_ground]
+        columns = {
+            "classification": subset["Classification"],
+            "intensity": subset["Intensity"],
+            "return_number": subset["ReturnNumber"],
+            "number_of_returns": subset["NumberOfReturns"]
+        }
+        write_point_cache(cache_path(las_path), np.column_stack((subset["X"], subset["Y"], subset["Z"])),
+                          columns, las_path)
+    return True
+
+
+def _missing_input(tile_directory, raise_errors):
+    # Girdisi olmayan karo başarılı sayılmasın: paralel özette başarısız görünür
+    message = f"'{tile_directory}' içinde raw.las bulunamadı"
+    if raise_errors:
+        raise FileNotFoundError(message)
+    print(f"Hata: {message}")
+    return None
+
+
+def apply_csf_with_pdal(tile_directory, raise_errors=False, incremental=False, params=None):
     """
     raw.las dosyasını okur, PDAL CSF uygular, 
     ground.las (Zemin) ve non_ground.las (Engel) olarak kaydeder.
+
+    Dönüş: nokta sayılarını ve adım zamanlamalarını ("timings") içeren dict
+    (hata veya raw.las yoksa None; raise_errors=True ise hata fırlatılır).
+    raise_errors=True ise hata yazdırılmak yerine yukarı fırlatılır
+    (paralel çalıştırıcı hataları kendisi toplar).
+    incremental=True ise raw.las ve CSF parametreleri son çalıştırmadan beri
+    değişmediyse karo atlanır (dönüşte "skipped": True).
+    params verilmezse AYARLAR'daki değerler (csf_params()) kullanılır.
     """
+    timer = StageTimer()
+    params = params or csf_params()
+
     # Girdi ve Çıktı yolları (LAS kullanıyoruz)
     input_las_path = os.path.join(tile_directory, "raw.las")
     ground_output_path = os.path.join(tile_directory, "ground.las")
@@ -29,7 +220,13 @@ def apply_csf_with_pdal(tile_directory):
              print(f"Uyarı: {tile_directory} içinde LAS yok, PCD kullanılacak (Tavsiye edilmez).")
              input_las_path = os.path.join(tile_directory, "raw.pcd")
         else:
-            return
+            return _missing_input(tile_directory, raise_errors)
+
+    if incremental:
+        metadata = load_tile_metadata(tile_directory)
+        if stage_is_current(metadata, "csf", {"raw": input_las_path},
+                            [ground_output_path, non_ground_output_path], params):
+            return {**metadata.get("point_counts", {}), "skipped": True}
 
     try:
         # 1. Pipeline Tanımı
@@ -41,10 +238,7 @@ def apply_csf_with_pdal(tile_directory):
                 },
                 {
                     "type": "filters.csf",
-                    "resolution": CSF_RESOLUTION,
-                    "threshold": CSF_THRESHOLD,
-                    "smooth": CSF_SMOOTH,
-                    "returns": "last, first, intermediate, only" 
+                    **params
                 },
                 # Zemin Noktalarını Ayır ve Yaz (Sınıf 2)
                 {
@@ -64,62 +258,349 @@ def apply_csf_with_pdal(tile_directory):
         }
 
         # 2. Pipeline Çalıştır
-        pipeline = pdal.Pipeline(json.dumps(pipeline_json))
-        pipeline.execute()
+        # Okuma, CSF ve yazma tek PDAL pipeline'ında akar; ayrı ölçülemez
+        with timer.step("csf_pipeline"):
+            import pdal
+            for path in (ground_output_path, non_ground_output_path):
+                drop_point_cache(path)
+            pipeline = pdal.Pipeline(json.dumps(pipeline_json))
+            pipeline.execute()
 
         # 3. Nokta Sayılarını Güncelle (Metadata İçin)
         # laspy ile başlık (header) okumak çok hızlıdır, tüm dosyayı taramaz.
         raw_count = 0
         ground_count = 0
         
-        with laspy.open(input_las_path) as f:
-            raw_count = f.header.point_count
-            
-        if os.path.exists(ground_output_path):
-            with laspy.open(ground_output_path) as f:
-                ground_count = f.header.point_count
+        with timer.step("count"):
+            with laspy.open(input_las_path) as f:
+                raw_count = f.header.point_count
+
+            if os.path.exists(ground_output_path):
+                with laspy.open(ground_output_path) as f:
+                    ground_count = f.header.point_count
+        timer.count("points_in", raw_count)
+        timer.count("ground_points", ground_count)
+        timer.count("bytes_written", sum(
+            os.path.getsize(p) for p in (ground_output_path, non_ground_output_path) if os.path.exists(p)
+        ))
+
+        with timer.step("columns"):
+            cache_csf_outputs(tile_directory)
 
         # 4. Metadata Güncelleme
-        metadata_path = os.path.join(tile_directory, "metadata.json")
-        if os.path.exists(metadata_path):
-            with open(metadata_path, 'r+') as f:
-                metadata = json.load(f)
-                
-                # İşlem durumu ve istatistikler
-                metadata['processing_status'] = 'segmented'
-                metadata['segmentation_params'] = {
-                    "resolution": CSF_RESOLUTION,
-                    "threshold": CSF_THRESHOLD
-                }
-                metadata['point_counts'] = {
-                    "raw": raw_count,
-                    "ground": ground_count,
-                    "non_ground": raw_count - ground_count
-                }
-                
-                # Dosya referansları
-                metadata['files']['ground_data'] = 'ground.las'
-                metadata['files']['non_ground_data'] = 'non_ground.las'
-                
-                f.seek(0)
-                json.dump(metadata, f, indent=4)
-                f.truncate()
+        update_csf_metadata(tile_directory, input_las_path, raw_count, ground_count, timer,
+                            engine="pdal", params=params)
+
+        return {
+            "raw": raw_count,
+            "ground": ground_count,
+            "non_ground": raw_count - ground_count,
+            "timings": timer.as_dict()
+        }
 
     except Exception as e:
+        if raise_errors:
+            raise
         print(f"Hata: '{tile_directory}' işlenirken CSF hatası: {e}")
+        return None
+
+
+def apply_csf_native(tile_directory, raise_errors=False, incremental=False, params=None):
+    """
+    apply_csf_with_pdal'ın NumPy motorlu karşılığı: raw.las laspy ile okunur,
+    csf_native ile sınıflandırılır, ground.las (sınıf 2) ve non_ground.las
+    PDAL çıktısı gibi LAZ sıkıştırmalı yazılır. Dönüş biçimi aynıdır.
+    """
+    timer = StageTimer()
+    params = params or csf_params()
+
+    input_las_path = os.path.join(tile_directory, "raw.las")
+    ground_output_path = os.path.join(tile_directory, "ground.las")
+    non_ground_output_path = os.path.join(tile_directory, "non_ground.las")
+    if not os.path.exists(input_las_path):
+        return _missing_input(tile_directory, raise_errors)
+
+    if incremental:
+        metadata = load_tile_metadata(tile_directory)
+        if stage_is_current(metadata, "csf", {"raw": input_las_path},
+                            [ground_output_path, non_ground_output_path], csf_stage_params("native", params)):
+            return {**metadata.get("point_counts", {}), "skipped": True}
+
+    try:
+        with timer.step("read"):
+            las = laspy.read(input_las_path)
+
+        with timer.step("csf"):
+            xyz = np.column_stack((las.x, las.y, las.z))
+            ground_mask = csf_ground_mask(xyz, las.return_number, las.number_of_returns, **params)
+
+        with timer.step("write"):
+            outputs = []
+            for path, mask in ((ground_output_path, ground_mask), (non_ground_output_path, ~ground_mask)):
+                drop_point_cache(path)
+                subset = laspy.LasData(copy.deepcopy(las.header), points=las.points[mask])
+                # filters.csf gibi: zemin 2, zemin sanılıp elenenler 1
+                subset.classification = (np.full(len(subset.points), 2, dtype=np.uint8) if path == ground_output_path
+                                         else np.where(subset.classification == 2, 1, subset.classification))
+                # laspy dosya adında sıkıştırmayı uzantıdan seçer; .las adına LAZ için akış verilir
+                with open(path, "wb") as f:
+                    subset.write(f, do_compress=True)
+                outputs.append(subset)
+
+        with timer.step("columns"):
+            if os.path.isdir(cache_path(input_las_path)):
+                for path, subset in zip((ground_output_path, non_ground_output_path), outputs):
+                    xyz_subset, columns = las_columns(subset)
+                    write_point_cache(cache_path(path), xyz_subset, columns, path)
+
+        raw_count = len(las.points)
+        ground_count = int(ground_mask.sum())
+        timer.count("points_in", raw_count)
+        timer.count("ground_points", ground_count)
+        timer.count("bytes_written", sum(os.path.getsize(p) for p in (ground_output_path, non_ground_output_path)))
+
+        update_csf_metadata(tile_directory, input_las_path, raw_count, ground_count, timer,
+                            engine="native", params=params)
+
+        return {
+            "raw": raw_count,
+            "ground": ground_count,
+            "non_ground": raw_count - ground_count,
+            "timings": timer.as_dict()
+        }
+
+    except Exception as e:
+        if raise_errors:
+            raise
+        print(f"Hata: '{tile_directory}' işlenirken CSF hatası: {e}")
+        return None
+
+
+def apply_csf_parallel(tile_folders, workers=None, max_in_flight=None, incremental=False,
+                       engine=CSF_ENGINE, params=None):
+    """
+    apply_csf_with_pdal'ı (engine="native" ise apply_csf_native'i) karolar
+    üzerinde süreç havuzuyla çalıştırır.
+    Karo hataları işi durdurmaz; başarılı/başarısız karoların özetini döndürür.
+    """
+    apply_csf = apply_csf_native if engine == "native" else apply_csf_with_pdal
+    return run_parallel(
+        profiled(partial(apply_csf, raise_errors=True, incremental=incremental, params=params), "csf"),
+        tile_folders,
+        workers=workers,
+        max_in_flight=max_in_flight,
+        desc="Zemin tespiti (CSF)"
+    )
+
+
+def build_batch_pipeline(tile_directories):
+    """
+    Bir grup karo için tek PDAL pipeline'ı kurar. Her karo kendi dalında
+    okunur, TileId boyutuyla etiketlenir, kendi kumaşıyla (filters.csf)
+    filtrelenir ve kendi ground/non_ground dosyalarına yazılır. Dallar sonda
+    filters.merge ile birleşir; böylece tek bir çıktı dizisinden karo başına
+    nokta sayıları elde edilir.
+    """
+    params = csf_params()
+    stages = []
+    branch_tags = []
+    for k, tile_directory in enumerate(tile_directories):
+        tag = f"tile{k}"
+        stages.extend([
+            {
+                "type": "readers.las",
+                "filename": os.path.join(tile_directory, "raw.las"),
+                "tag": f"{tag}_read"
+            },
+            # Yeni boyut oluştur ve karo sırasını yaz (LAS çıktısına yazılmaz)
+            {
+                "type": "filters.ferry",
+                "dimensions": "=>TileId"
+            },
+            {
+                "type": "filters.assign",
+                "value": f"TileId = {k}"
+            },
+            {
+                "type": "filters.csf",
+                **params
+            },
+            {
+                "type": "writers.las",
+                "filename": os.path.join(tile_directory, "ground.las"),
+                "where": "Classification == 2",
+                "compression": "lazperf"
+            },
+            {
+                "type": "writers.las",
+                "filename": os.path.join(tile_directory, "non_ground.las"),
+                "where": "Classification != 2",
+                "compression": "lazperf",
+                "tag": f"{tag}_done"
+            }
+        ])
+        branch_tags.append(f"{tag}_done")
+
+    stages.append({"type": "filters.merge", "inputs": branch_tags})
+    return {"pipeline": stages}
+
+
+def run_csf_batch(tile_directories):
+    """
+    Bir karo grubunu tek pipeline ile işler. Nokta sayıları dosyalar yeniden
+    açılmadan pipeline'ın çıktı dizisinden (TileId + Classification) hesaplanır.
+    Pipeline hata verirse (ör. bozuk bir karo) grup karo karo işlenir ki tek
+    bir hata tüm grubu düşürmesin.
+
+    Ortak pipeline süresi karolara nokta sayısı oranında paylaştırılır
+    ("csf_pipeline" adımı); karo başına önbellek ve metadata ayrıca ölçülür.
+
+    Dönüş: {"results": {karo: sayılar + timings}, "errors": {karo: hata}}
+    """
+    results = {}
+    errors = {}
+    try:
+        batch_timer = StageTimer()
+        with batch_timer.step("csf_pipeline"):
+            import pdal
+            for tile_directory in tile_directories:
+                for name in ("ground.las", "non_ground.las"):
+                    drop_point_cache(os.path.join(tile_directory, name))
+            pipeline = pdal.Pipeline(json.dumps(build_batch_pipeline(tile_directories)))
+            pipeline.execute()
+            merged = pipeline.arrays[0]
+
+        with batch_timer.step("count"):
+            tile_ids = merged["TileId"].astype(np.int64)
+            n_tiles = len(tile_directories)
+            raw_counts = np.bincount(tile_ids, minlength=n_tiles)
+            ground_counts = np.bincount(tile_ids[merged["Classification"] == 2], minlength=n_tiles)
+        shares = raw_counts / max(int(raw_counts.sum()), 1)
+
+        for k, tile_directory in enumerate(tile_directories):
+            timer = StageTimer()
+            for name, seconds in batch_timer.steps.items():
+                timer.add(name, seconds * float(shares[k]))
+            raw_count, ground_count = int(raw_counts[k]), int(ground_counts[k])
+            timer.count("points_in", raw_count)
+            timer.count("ground_points", ground_count)
+            timer.count("bytes_written", sum(
+                os.path.getsize(p) for p in (os.path.join(tile_directory, name)
+                                             for name in ("ground.las", "non_ground.las"))
+                if os.path.exists(p)
+            ))
+            with timer.step("columns"):
+                cache_csf_outputs(tile_directory, merged[tile_ids == k])
+            update_csf_metadata(tile_directory, os.path.join(tile_directory, "raw.las"),
+                                raw_count, ground_count, timer)
+            results[tile_directory] = {
+                "raw": raw_count,
+                "ground": ground_count,
+                "non_ground": raw_count - ground_count,
+                "timings": timer.as_dict()
+            }
+    except Exception as batch_error:
+        print(f"Uyarı: Grup pipeline'ı başarısız ({batch_error}), karolar tek tek işleniyor.")
+        for tile_directory in tile_directories:
+            try:
+                results[tile_directory] = apply_csf_with_pdal(tile_directory, raise_errors=True)
+            except Exception as e:
+                errors[tile_directory] = f"{type(e).__name__}: {e}"
+
+    return {"results": results, "errors": errors}
+
+
+def apply_csf_batched(tile_folders, batch_size=CSF_BATCH_SIZE, workers=None, incremental=False):
+    """
+    Karoları batch_size'lık gruplar halinde, grup başına tek PDAL pipeline ile
+    işler (gruplar süreç havuzunda paralel). Binlerce küçük karoda pipeline
+    kurulumu ve dosya aç/kapa maliyeti grup başına bire iner.
+
+    Dönüş: run_parallel ile aynı biçimde karo bazlı özet.
+    """
+    start_time = time.perf_counter()
+    succeeded = []
+    failed = []
+
+    batchable = []
+    for tile_directory in tile_folders:
+        if not os.path.exists(os.path.join(tile_directory, "raw.las")):
+            # LAS'ı olmayan karolar (PCD yedeği) eski yoldan işlenir
+            try:
+                succeeded.append((tile_directory, apply_csf_with_pdal(tile_directory, raise_errors=True,
+                                                                      incremental=incremental)))
+            except Exception as e:
+                failed.append((tile_directory, f"{type(e).__name__}: {e}"))
+            continue
+        if incremental:
+            metadata = load_tile_metadata(tile_directory)
+            outputs = [os.path.join(tile_directory, name) for name in ("ground.las", "non_ground.las")]
+            if stage_is_current(metadata, "csf", {"raw": os.path.join(tile_directory, "raw.las")},
+                                outputs, csf_params()):
+                succeeded.append((tile_directory, {**metadata.get("point_counts", {}), "skipped": True}))
+                continue
+        batchable.append(tile_directory)
+
+    batches = [batchable[k:k + batch_size] for k in range(0, len(batchable), batch_size)]
+    batch_summary = run_parallel(run_csf_batch, batches, workers=workers,
+                                 desc="Zemin tespiti (CSF, gruplu)")
+
+    for _, batch_result in batch_summary["succeeded"]:
+        succeeded.extend(batch_result["results"].items())
+        failed.extend(batch_result["errors"].items())
+    for batch, error in batch_summary["failed"]:
+        failed.extend((tile_directory, error) for tile_directory in batch)
+
+    return {
+        "total": len(succeeded) + len(failed),
+        "succeeded": succeeded,
+        "failed": failed,
+        "elapsed_sec": time.perf_counter() - start_time
+    }
+
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Karolar üzerinde CSF (PDAL veya NumPy) ile zemin ayıklama.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="Paralel süreç sayısı (1 = sıralı çalıştır).")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Girdisi ve parametreleri değişmeyen karoları atla.")
+    parser.add_argument("--pending", action="store_true",
+                        help="Yalnızca henüz CSF uygulanmamış karoları işle (katalogdaki duruma göre).")
+    parser.add_argument("--batch_size", type=int, default=0,
+                        help="> 0 ise karolar bu boyutta gruplar halinde tek pipeline ile işlenir.")
+    parser.add_argument("--engine", choices=CSF_ENGINES, default=CSF_ENGINE,
+                        help="CSF motoru: PDAL filters.csf veya NumPy (csf_native.py).")
+    parser.add_argument("--profile", metavar="DIR", default=None,
+                        help="Her karoyu cProfile ile çalıştır, .prof dosyalarını DIR'e yaz.")
+    args = parser.parse_args()
+    if args.batch_size > 0 and args.engine != "pdal":
+        parser.error("--batch_size yalnızca --engine pdal ile kullanılabilir.")
+
+    if args.profile:
+        enable_profiling(args.profile)
+
     processed_tiles_dir = os.path.join("data", "processed", "tiles")
     
-    # Sadece klasörleri al
-    tile_folders = [f.path for f in os.scandir(processed_tiles_dir) if f.is_dir()]
+    # Karo klasörleri (katalog varsa ondan)
+    tile_folders = tile_directories(processed_tiles_dir, pending="segmented" if args.pending else None)
 
     if not tile_folders:
         print(f"Hata: '{processed_tiles_dir}' içinde işlenecek karo klasörü bulunamadı.")
     else:
-        print(f"Toplam {len(tile_folders)} adet karo üzerinde PDAL CSF (Threshold: {CSF_THRESHOLD}m) çalıştırılacak.")
+        print(f"Toplam {len(tile_folders)} adet karo üzerinde CSF ({args.engine}, Threshold: {CSF_THRESHOLD}m) çalıştırılacak.")
 
-        for tile_path in tqdm(tile_folders, desc="Zemin tespiti (CSF)"):
-            apply_csf_with_pdal(tile_path)
+        if args.batch_size > 0:
+            summary = apply_csf_batched(tile_folders, batch_size=args.batch_size,
+                                        workers=args.workers, incremental=args.incremental)
+        else:
+            summary = apply_csf_parallel(tile_folders, workers=args.workers, incremental=args.incremental,
+                                         engine=args.engine)
+        print_summary(summary, label="Zemin ayıklama (CSF)")
+        skipped = sum(1 for _, result in summary["succeeded"] if result and result.get("skipped"))
+        if skipped:
+            print(f"Güncel olduğu için atlanan karo: {skipped}")
 
-        print("\nTüm karolar için zemin ayıklama tamamlandı.")
+        report = report_from_summary("csf", summary)
+        print_run_report(report)
+        print(f"Rapor: {write_run_report(report)}")
@@ -0,0 +1,347 @@
+# src/segmentation/csf_native.py
+
+import os
+import sys
+import time
+import argparse
+import numpy as np
+import laspy
+from scipy import ndimage
+
+# src/ klasörünü import yoluna ekle (ortak modüller için)
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from common.catalog import tile_directories
+from common.instrumentation import write_run_report
+
+# ----------------------------------------------------------------------
+# PDAL filters.csf'e alternatif, doğrudan NumPy XYZ dizileri üzerinde çalışan
+# Cloth Simulation Filter (Zhang vd. 2016):
+#   1. Bulut ters çevrilir (z -> -z); zemin artık "tavan" olur.
+#   2. resolution aralıklı bir kumaş ızgarası bulutun üstüne yerleştirilir ve
+#      her parçacığa en yakın noktanın yüksekliği (çarpışma yüksekliği) atanır.
+#   3. Her adımda tüm parçacıklar birlikte (vektörel) yerçekimiyle düşer
+#      (Verlet), yapısal/kesme/bükülme yayları RELAX_SWEEPS tur boyunca
+#      'rigidness' kadar gevşetilir ve çarpışma yüksekliğine ulaşan
+#      parçacıklar sabitlenir.
+#   4. Yer değiştirme eşiğin altına inince (veya tüm kumaş oturunca) durulur.
+#   5. Kumaşa 'threshold'dan yakın noktalar zemindir.
+#
+# Parametre adları filters.csf ile aynıdır; csf_filter.csf_params() olduğu
+# gibi verilebilir. Sonuç CSF kütüphanesiyle bire bir aynı değildir (yay
+# gevşetmesi parçacık sırası yerine ayrık yay kümeleriyle, vektörel yapılır);
+# uyum `python src/segmentation/csf_native.py --benchmark` ile ölçülür.
+# ----------------------------------------------------------------------
+
+# --- AYARLAR ---
+# CSF kütüphanesi / PDAL filters.csf varsayılanları
+CSF_STEP = 0.65             # Zaman adımı
+CSF_RIGIDNESS = 3           # Kumaş sertliği (1: dik yamaç, 3: düz arazi)
+CSF_ITERATIONS = 500        # En fazla simülasyon adımı
+CSF_HDIFF = 0.3             # smooth: eğim düzeltmede yükseklik farkı eşiği (m)
+GRAVITY = 0.2
+DAMPING = 0.01
+CLOTH_START_HEIGHT = 0.05   # Kumaşın (ters) bulutun en yüksek noktası üstündeki başlangıcı
+CLOTH_BUFFER = 2            # Izgaranın bulut sınırı dışına taşan parçacık sayısı
+CONVERGENCE_DIFF = 0.005    # Adımdaki en büyük yer değiştirme bunun altındaysa dur (m)
+MIN_SMOOTH_COMPONENT = 50   # smooth: bundan küçük hareketli bölgeler düzeltilmez
+# CSF kütüphanesindeki yay komşulukları: yapısal (1 hücre), kesme (köşegen) ve
+# bükülme (2 hücre). Bükülme yayları kumaşın geniş çukurlar üstünde köprü kurmasını sağlar.
+SPRING_OFFSETS = ((0, 1), (1, 0), (1, 1), (1, -1), (0, 2), (2, 0), (2, 2), (2, -2))
+RELAX_SWEEPS = 2            # Adım başına yay gevşetme turu
+RETURN_TYPES = ("first", "last", "intermediate", "only")
+
+# Karşılaştırmada okunacak en fazla karo
+BENCHMARK_TILES = 10
+
+
+def return_mask(return_number, number_of_returns, returns):
+    """
+    filters.csf 'returns' seçeneği: yalnızca bu dönüş türlerindeki noktalar
+    kumaş simülasyonuna girer ("last, first, intermediate, only").
+    """
+    types = {t.strip() for t in returns.split(",")} if isinstance(returns, str) else set(returns)
+    unknown = types - set(RETURN_TYPES)
+    if unknown:
+        raise ValueError(f"Bilinmeyen dönüş türü: {', '.join(sorted(unknown))}")
+
+    rn = np.asarray(return_number, dtype=np.int16)
+    nr = np.asarray(number_of_returns, dtype=np.int16)
+    mask = np.zeros(len(rn), dtype=bool)
+    if "only" in types:
+        mask |= nr <= 1
+    if "first" in types:
+        mask |= (rn == 1) & (nr > 1)
+    if "last" in types:
+        mask |= (rn == nr) & (nr > 1)
+    if "intermediate" in types:
+        mask |= (rn > 1) & (rn < nr)
+    return mask
+
+
+def collision_heights(xy, z_inv, origin, shape, resolution):
+    """
+    Her parçacık için XY'de en yakın noktanın (ters) yüksekliği. Noktası
+    olmayan parçacıklar en yakın dolu parçacığın değerini alır.
+    """
+    ny, nx = shape
+    cell = np.rint((xy - origin) / resolution).astype(np.int64)
+    flat = cell[:, 1] * nx + cell[:, 0]
+    offset = xy - (origin + cell * resolution)
+    dist2 = np.einsum("ij,ij->i", offset, offset)
+
+    # Parçacık başına en yakın nokta: (parçacık, uzaklık) sırasında ilk eleman
+    order = np.lexsort((dist2, flat))
+    flat_sorted = flat[order]
+    first = np.r_[True, flat_sorted[1:] != flat_sorted[:-1]]
+
+    heights = np.full(ny * nx, np.nan)
+    heights[flat_sorted[first]] = z_inv[order[first]]
+    heights = heights.reshape(shape)
+
+    empty = np.isnan(heights)
+    if empty.any():
+        nearest = ndimage.distance_transform_edt(empty, return_distances=False, return_indices=True)
+        heights = heights[tuple(nearest)]
+    return heights
+
+
+def spring_sets(shape):
+    """
+    SPRING_OFFSETS yaylarını, her parçacığın bir kümede en fazla bir kez
+    geçtiği ayrık (a, b) düz indeks kümelerine böler; her küme tek vektörel
+    işlemle gevşetilir. Offset'in adımı s ise ana eksende (indeks // s) % 2
+    rengi a ve b uçlarını ayırır.
+    """
+    ny, nx = shape
+    iy, ix = np.mgrid[0:ny, 0:nx]
+    flat = iy * nx + ix
+    sets = []
+    for dy, dx in SPRING_OFFSETS:
+        valid = (iy + dy < ny) & (ix + dx >= 0) & (ix + dx < nx)
+        s = max(dy, abs(dx))
+        color = ((iy if dy else ix) // s) % 2
+        for c in (0, 1):
+            a = flat[valid & (color == c)]
+            sets.append((a, a + dy * nx + dx))
+    return sets
+
+
+def _relax(z, movable, a, b, double_move, single_move):
+    # Ayrık (a, b) çiftleri arasındaki yaylar; z (düz) yerinde güncellenir
+    za, zb = z[a], z[b]
+    ma, mb = movable[a], movable[b]
+    d = zb - za
+    both = ma & mb
+    z[a] = za + np.where(both, d * double_move, np.where(ma & ~mb, d * single_move, 0.0))
+    z[b] = zb - np.where(both, d * double_move, np.where(~ma & mb, d * single_move, 0.0))
+
+
+def satisfy_constraints(z, movable, rigidness, sets, sweeps=RELAX_SWEEPS):
+    """
+    Yayları (spring_sets) 'sweeps' tur gevşetir; z ve movable düz dizilerdir.
+
+    CSF kütüphanesindeki gibi yay 'rigidness' kez yarıya indirilmiş kabul
+    edilir: iki hareketli uç için 0.5 * (1 - 0.4^r), tek hareketli uç için
+    1 - 0.7^r oranında düzeltme. Kütüphane her yayı iki ucundan da işler
+    (adım başına iki tur); tek tur kumaşı belirgin biçimde yumuşatır ve
+    geniş çatılar zemine sarkar.
+    """
+    double_move = 0.5 * (1.0 - 0.4 ** rigidness)
+    single_move = 1.0 - 0.7 ** rigidness
+    for _ in range(sweeps):
+        for a, b in sets:
+            _relax(z, movable, a, b, double_move, single_move)
+
+
+def simulate_cloth(heights, step=CSF_STEP, rigidness=CSF_RIGIDNESS, iterations=CSF_ITERATIONS):
+    """
+    Kumaşı çarpışma yüksekliklerine (ters bulut) düşürür.
+    Dönüş: (kumaş yükseklikleri, hareketli maskesi, adım sayısı)
+    """
+    z = np.full(heights.shape, heights.max() + CLOTH_START_HEIGHT)
+    previous = z.copy()
+    movable = np.ones(heights.shape, dtype=bool)
+    acceleration = -GRAVITY * step * step
+    sets = spring_sets(heights.shape)
+
+    iteration = 0
+    for iteration in range(1, iterations + 1):
+        before = z.copy()
+
+        # Yerçekimi (Verlet): yalnızca hareketli parçacıklar
+        moved = z + (z - previous) * (1.0 - DAMPING) + acceleration
+        previous = np.where(movable, z, previous)
+        z = np.where(movable, moved, z)
+
+        satisfy_constraints(z.reshape(-1), movable.reshape(-1), rigidness, sets)
+        max_diff = float(np.abs(z - before)[movable].max()) if movable.any() else 0.0
+
+        # Çarpışma: zemine (ters bulutta tavana) ulaşan parçacık sabitlenir
+        hit = movable & (z < heights)
+        z[hit] = heights[hit]
+        movable &= ~hit
+
+        if not movable.any() or (max_diff != 0.0 and max_diff < CONVERGENCE_DIFF):
+            break
+    return z, movable, iteration
+
+
+def smooth_slopes(z, heights, movable, hdiff=CSF_HDIFF):
+    """
+    filters.csf 'smooth' (eğim düzeltme): büyük hareketli bölgelerde, sabit
+    bir parçacığa komşuluk zinciriyle bağlı ve çarpışma yüksekliğine hdiff'ten
+    yakın parçacıklar da zemine oturtulur (dik yamaçlarda kumaşın asılı
+    kalmasını önler).
+    """
+    labels, _ = ndimage.label(movable)
+    sizes = np.bincount(labels.ravel())
+    close = movable & (sizes[labels] > MIN_SMOOTH_COMPONENT) & (np.abs(heights - z) < hdiff)
+
+    # Sabit parçacıklara 'close' zinciriyle ulaşılabilenler (BFS yerine bileşen etiketi)
+    fixed = ~movable
+    reach, _ = ndimage.label(close | fixed)
+    touched = np.unique(reach[fixed])
+    snap = close & np.isin(reach, touched[touched > 0])
+
+    z = np.where(snap, heights, z)
+    return z, movable & ~snap
+
+
+def cloth_height_at(z, xy, origin, resolution):
+    """
+    Noktaların XY konumunda kumaş yüksekliği (dört parçacıktan bilineer).
+    """
+    ny, nx = z.shape
+    f = (xy - origin) / resolution
+    i0 = np.clip(np.floor(f).astype(np.int64), 0, [nx - 2, ny - 2])
+    t = np.clip(f - i0, 0.0, 1.0)
+    tx, ty = t[:, 0], t[:, 1]
+    ix, iy = i0[:, 0], i0[:, 1]
+    return ((1 - tx) * (1 - ty) * z[iy, ix] + tx * (1 - ty) * z[iy, ix + 1] +
+            (1 - tx) * ty * z[iy + 1, ix] + tx * ty * z[iy + 1, ix + 1])
+
+
+def csf_ground_mask(xyz, return_number=None, number_of_returns=None, resolution=1.0,
+                    threshold=0.5, smooth=True, returns="last, only", step=CSF_STEP,
+                    rigidness=CSF_RIGIDNESS, iterations=CSF_ITERATIONS, hdiff=CSF_HDIFF,
+                    info=None):
+    """
+    (N, 3) XYZ için zemin maskesi (girdi sırasıyla hizalı). 'returns' dışındaki
+    noktalar simülasyona girmez ve zemin sayılmaz (dönüş bilgisi verilmezse
+    tüm noktalar kullanılır). Varsayılanlar filters.csf ile aynıdır.
+
+    info bir dict ise ızgara boyutu ve adım sayısı içine yazılır.
+    """
+    xyz = np.asarray(xyz, dtype=np.float64)
+    ground = np.zeros(len(xyz), dtype=bool)
+    selected = np.ones(len(xyz), dtype=bool)
+    if return_number is not None and number_of_returns is not None and returns:
+        selected = return_mask(return_number, number_of_returns, returns)
+    if selected.sum() < 3:
+        return ground
+
+    points = xyz[selected]
+    xy = points[:, :2]
+    z_inv = -points[:, 2]
+
+    origin = xy.min(axis=0) - CLOTH_BUFFER * resolution
+    nx, ny = (np.ceil((xy.max(axis=0) - origin) / resolution).astype(np.int64) + CLOTH_BUFFER + 1)
+    heights = collision_heights(xy, z_inv, origin, (ny, nx), resolution)
+
+    cloth, movable, steps = simulate_cloth(heights, step, int(rigidness), int(iterations))
+    if smooth:
+        cloth, movable = smooth_slopes(cloth, heights, movable, hdiff)
+
+    distance = np.abs(cloth_height_at(cloth, xy, origin, resolution) - z_inv)
+    ground[np.flatnonzero(selected)] = distance < threshold
+
+    if info is not None:
+        info.update({"grid": [int(ny), int(nx)], "iterations": steps,
+                     "unsettled": int(movable.sum())})
+    return ground
+
+
+def benchmark_against_pdal(tile_folders, params=None):
+    """
+    Aynı karolarda PDAL filters.csf ve NumPy CSF'i çalıştırıp süre ve
+    sınıflandırma uyumunu karşılaştırır (okuma süresi hariç).
+
+    Dönüş: run_report benzeri dict (karo başına satırlar + özet)
+    """
+    from segmentation.csf_filter import csf_params, las_points_to_pdal_array, run_csf_on_array
+
+    params = params or csf_params()
+    rows = []
+    for tile_directory in tile_folders:
+        las = laspy.read(os.path.join(tile_directory, "raw.las"))
+        array = las_points_to_pdal_array(las.points)
+
+        t0 = time.perf_counter()
+        pdal_mask = run_csf_on_array(array, params, engine="pdal")
+        pdal_sec = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        native_mask = run_csf_on_array(array, params, engine="native")
+        native_sec = time.perf_counter() - t0
+
+        union = int((pdal_mask | native_mask).sum())
+        rows.append({
+            "tile": os.path.basename(os.path.normpath(tile_directory)),
+            "points": len(array),
+            "pdal_sec": round(pdal_sec, 4),
+            "native_sec": round(native_sec, 4),
+            "agreement": float((pdal_mask == native_mask).mean()) if len(array) else 1.0,
+            "ground_iou": float((pdal_mask & native_mask).sum() / union) if union else 1.0,
+            "pdal_ground": int(pdal_mask.sum()),
+            "native_ground": int(native_mask.sum())
+        })
+
+    summary = {}
+    if rows:
+        pdal_total = sum(r["pdal_sec"] for r in rows)
+        native_total = sum(r["native_sec"] for r in rows)
+        points = sum(r["points"] for r in rows)
+        summary = {
+            "pdal_sec": round(pdal_total, 4),
+            "native_sec": round(native_total, 4),
+            "speedup": round(pdal_total / native_total, 3) if native_total else None,
+            # Nokta ağırlıklı ortalama uyum
+            "agreement": sum(r["agreement"] * r["points"] for r in rows) / points if points else 1.0,
+            "ground_iou_min": min(r["ground_iou"] for r in rows)
+        }
+    return {"stage": "csf_benchmark", "params": params, "tiles": rows, "summary": summary}
+
+
+def print_benchmark(report):
+    print(f"\n{'karo':<14} {'nokta':>9} {'PDAL (sn)':>10} {'NumPy (sn)':>11} {'uyum':>7} {'zemin IoU':>10}")
+    for r in report["tiles"]:
+        print(f"{r['tile']:<14} {r['points']:>9} {r['pdal_sec']:>10.3f} {r['native_sec']:>11.3f} "
+              f"{r['agreement']:>7.2%} {r['ground_iou']:>10.3f}")
+    s = report["summary"]
+    if s:
+        print(f"Toplam: PDAL {s['pdal_sec']:.2f} sn, NumPy {s['native_sec']:.2f} sn "
+              f"(hızlanma x{s['speedup']}), uyum {s['agreement']:.2%}, en düşük zemin IoU {s['ground_iou_min']:.3f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="NumPy CSF motoru: PDAL filters.csf ile hız ve uyum karşılaştırması.")
+    parser.add_argument("--tiles_dir", default=os.path.join("data", "processed", "tiles"))
+    parser.add_argument("--benchmark", action="store_true",
+                        help="Karolarda PDAL ve NumPy CSF'i karşılaştır ve rapor yaz.")
+    parser.add_argument("--tiles", type=int, default=BENCHMARK_TILES,
+                        help="Karşılaştırmada kullanılacak en fazla karo sayısı.")
+    args = parser.parse_args()
+
+    tile_folders = [d for d in tile_directories(args.tiles_dir)
+                    if os.path.exists(os.path.join(d, "raw.las"))][:args.tiles]
+    if not tile_folders:
+        print(f"Hata: '{args.tiles_dir}' içinde raw.las içeren karo bulunamadı.")
+    elif not args.benchmark:
+        parser.print_help()
+    else:
+        report = benchmark_against_pdal(tile_folders)
+        print_benchmark(report)
+        print(f"Rapor: {write_run_report(report)}")
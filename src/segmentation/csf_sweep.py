@@ -0,0 +1,256 @@
+# src/segmentation/csf_sweep.py
+
+import os
+import sys
+import time
+import argparse
+import itertools
+import importlib.util
+import numpy as np
+from functools import partial
+
+# src/ klasörünü import yoluna ekle (ortak modüller için)
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from common.parallel import run_parallel, print_summary
+from common.catalog import tile_directories
+from common.point_cache import load_columns
+from common.instrumentation import write_run_report
+from segmentation.csf_filter import (
+    CSF_RETURNS, CSF_ENGINES, csf_params, columns_to_pdal_array, run_csf_on_array, apply_csf_parallel
+)
+
+# ----------------------------------------------------------------------
+# CSF parametre taraması: (resolution, threshold, smooth, returns) ızgarasının
+# tüm kombinasyonları her karoda denenir. Karo bir kez okunur (sütunlu önbellek
+# varsa memmap) ve tüm kombinasyonlar bellekteki aynı dizi üzerinde çalışır;
+# karolar süreç havuzunda paraleldir. Kombinasyon başına yalnızca istatistik
+# tutulur, ground.las yazılmaz. Sonda kazanan seçilir ve (istenirse) yalnızca
+# onun çıktıları normal CSF aşamasıyla yazılır.
+#
+# Etiketli veri olmadığı için kalite, zeminden üretilen kaba DTM'den ölçülür:
+#   coverage      : nokta içeren hücrelerden zemin noktası da içerenlerin oranı
+#                   (düşükse zeminde delik var -> eşik/çözünürlük fazla sıkı)
+#   roughness     : DTM'nin ayrık Laplace'ının RMS'i (m); zemine karışan çatı ve
+#                   bitki örtüsü basamak üretir -> yüksekse eşik fazla gevşek
+#   below_ground  : DTM'nin BELOW_MARGIN altında kalan zemin-dışı nokta oranı
+#                   (kaçırılmış zemin / alçak gürültü)
+# Kazanan: en iyi coverage'ın COVERAGE_RATIO katına ulaşan kombinasyonlar
+# arasında roughness'ı en düşük olan.
+# ----------------------------------------------------------------------
+
+# --- AYARLAR ---
+SWEEP_RESOLUTIONS = (0.5, 1.0)
+SWEEP_THRESHOLDS = (0.3, 0.5, 1.0)
+SWEEP_SMOOTH = (False, True)
+SWEEP_RETURNS = (CSF_RETURNS,)
+SWEEP_ENGINE = "native"     # Disk ve PDAL pipeline'ı gerektirmez
+QUALITY_CELL_SIZE = 1.0     # Kalite DTM'inin hücre boyutu (m)
+BELOW_MARGIN = 0.5          # below_ground için DTM altı pay (m)
+COVERAGE_RATIO = 0.98
+
+
+def parameter_grid(resolutions=SWEEP_RESOLUTIONS, thresholds=SWEEP_THRESHOLDS,
+                   smooth=SWEEP_SMOOTH, returns=SWEEP_RETURNS):
+    """
+    Izgaranın tüm kombinasyonları (filters.csf parametre dict'leri).
+    """
+    return [
+        {"resolution": float(r), "threshold": float(t), "smooth": bool(s), "returns": ret}
+        for r, t, s, ret in itertools.product(resolutions, thresholds, smooth, returns)
+    ]
+
+
+def ground_quality(xyz, ground_mask, cell_size=QUALITY_CELL_SIZE):
+    """
+    Bir karo ve bir kombinasyon için toplanabilir kalite sayaçları
+    (karolar arasında toplanıp summarize_stats ile oranlara çevrilir).
+    """
+    cells = np.floor((xyz[:, :2] - xyz[:, :2].min(axis=0)) / cell_size).astype(np.int64)
+    nx, ny = cells.max(axis=0) + 1
+    flat = cells[:, 1] * nx + cells[:, 0]
+    n_cells = int(nx * ny)
+
+    occupied = np.bincount(flat, minlength=n_cells) > 0
+    ground_counts = np.bincount(flat[ground_mask], minlength=n_cells)
+    ground_cells = ground_counts > 0
+
+    # Hücre başına ortalama zemin yüksekliği (kaba DTM)
+    dtm = np.full(n_cells, np.nan)
+    dtm[ground_cells] = (np.bincount(flat[ground_mask], weights=xyz[ground_mask, 2], minlength=n_cells)
+                         [ground_cells] / ground_counts[ground_cells])
+
+    grid = dtm.reshape(ny, nx)
+    laplace = (4 * grid[1:-1, 1:-1] - grid[:-2, 1:-1] - grid[2:, 1:-1]
+               - grid[1:-1, :-2] - grid[1:-1, 2:])
+    laplace = laplace[~np.isnan(laplace)]
+
+    non_ground = ~ground_mask
+    below = xyz[non_ground, 2] < dtm[flat[non_ground]] - BELOW_MARGIN   # NaN karşılaştırması False
+
+    return {
+        "points": int(len(xyz)),
+        "ground": int(ground_mask.sum()),
+        "occupied_cells": int(occupied.sum()),
+        "ground_cells": int(ground_cells.sum()),
+        "laplace_sq_sum": float(np.sum(laplace ** 2)),
+        "laplace_count": int(len(laplace)),
+        "below_ground": int(below.sum())
+    }
+
+
+def sweep_tile(tile_directory, combinations, engine=SWEEP_ENGINE):
+    """
+    Karoyu bir kez okuyup tüm kombinasyonları çalıştırır.
+    Dönüş: {"stats": [kombinasyon başına sayaçlar], "csf_sec": [...], "read_sec": ...}
+    """
+    t0 = time.perf_counter()
+    columns = load_columns(os.path.join(tile_directory, "raw.las"),
+                           ("return_number", "number_of_returns", "classification"))
+    xyz = np.asarray(columns["xyz"])
+    array = columns_to_pdal_array(xyz, columns["return_number"], columns["number_of_returns"],
+                                  columns["classification"])
+    read_sec = time.perf_counter() - t0
+
+    stats, csf_sec = [], []
+    for params in combinations:
+        t0 = time.perf_counter()
+        ground_mask = run_csf_on_array(array, params, engine=engine)
+        csf_sec.append(time.perf_counter() - t0)
+        stats.append(ground_quality(xyz, ground_mask))
+    return {"stats": stats, "csf_sec": csf_sec, "read_sec": read_sec}
+
+
+def summarize_stats(counters):
+    """
+    Karolar üzerinde toplanmış sayaçlardan oranlar.
+    """
+    return {
+        "ground_fraction": counters["ground"] / counters["points"] if counters["points"] else 0.0,
+        "coverage": counters["ground_cells"] / counters["occupied_cells"] if counters["occupied_cells"] else 0.0,
+        "roughness": float(np.sqrt(counters["laplace_sq_sum"] / counters["laplace_count"]))
+        if counters["laplace_count"] else 0.0,
+        "below_ground": (counters["below_ground"] / (counters["points"] - counters["ground"])
+                         if counters["points"] > counters["ground"] else 0.0)
+    }
+
+
+def choose_winner(results, coverage_ratio=COVERAGE_RATIO):
+    """
+    Yeterli coverage'a sahip kombinasyonlardan roughness'ı en düşük olanın sırası.
+    """
+    best_coverage = max(r["coverage"] for r in results)
+    candidates = [k for k, r in enumerate(results) if r["coverage"] >= coverage_ratio * best_coverage]
+    return min(candidates, key=lambda k: (results[k]["roughness"], -results[k]["coverage"]))
+
+
+def run_sweep(tile_folders, combinations, engine=SWEEP_ENGINE, workers=None):
+    """
+    Taramayı karolar üzerinde paralel çalıştırır ve kombinasyon başına
+    istatistikleri, süreleri ve kazananı içeren raporu döndürür.
+    """
+    summary = run_parallel(partial(sweep_tile, combinations=combinations, engine=engine),
+                           tile_folders, workers=workers,
+                           desc=f"CSF taraması ({len(combinations)} kombinasyon)")
+    print_summary(summary, label="CSF taraması")
+
+    keys = ("points", "ground", "occupied_cells", "ground_cells", "laplace_sq_sum",
+            "laplace_count", "below_ground")
+    totals = [dict.fromkeys(keys, 0) for _ in combinations]
+    csf_sec = [0.0] * len(combinations)
+    read_sec = 0.0
+    for _, result in summary["succeeded"]:
+        read_sec += result["read_sec"]
+        for k, stats in enumerate(result["stats"]):
+            csf_sec[k] += result["csf_sec"][k]
+            for key in keys:
+                totals[k][key] += stats[key]
+
+    results = [
+        {"index": k, "params": params, **summarize_stats(totals[k]), "csf_sec": round(csf_sec[k], 3)}
+        for k, params in enumerate(combinations)
+    ]
+    return {
+        "stage": "csf_sweep",
+        "engine": engine,
+        "tiles": len(summary["succeeded"]),
+        "failed": [{"tile": str(tile), "error": error} for tile, error in summary["failed"]],
+        "elapsed_sec": summary.get("elapsed_sec"),
+        "read_sec": round(read_sec, 3),
+        "combinations": results,
+        "winner": choose_winner(results) if summary["succeeded"] else None
+    }
+
+
+def print_sweep(report):
+    if not report["tiles"]:
+        print("Hiçbir karo işlenemedi; karşılaştırılacak istatistik yok.")
+        return
+    print(f"\n{'#':>3} {'res':>5} {'thr':>5} {'smooth':>6}  {'zemin %':>8} {'coverage':>9} "
+          f"{'roughness':>10} {'alt %':>7} {'CSF (sn)':>9}  returns")
+    for r in report["combinations"]:
+        p = r["params"]
+        mark = " *" if r["index"] == report["winner"] else ""
+        print(f"{r['index']:>3} {p['resolution']:>5} {p['threshold']:>5} {str(p['smooth']):>6}  "
+              f"{r['ground_fraction']:>8.2%} {r['coverage']:>9.3f} {r['roughness']:>10.3f} "
+              f"{r['below_ground']:>7.2%} {r['csf_sec']:>9.2f}  {p['returns']}{mark}")
+    print(f"Okuma (karo başına bir kez): {report['read_sec']:.2f} sn, toplam: {report['elapsed_sec']:.2f} sn")
+
+
+def _parse_bool(value):
+    if value.lower() in ("true", "1", "yes", "evet"):
+        return True
+    if value.lower() in ("false", "0", "no", "hayir", "hayır"):
+        return False
+    raise argparse.ArgumentTypeError(f"true/false bekleniyordu: {value}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="CSF parametre taraması: karolar bir kez okunur, tüm kombinasyonlar denenir.")
+    parser.add_argument("--tiles_dir", default=os.path.join("data", "processed", "tiles"))
+    parser.add_argument("--resolutions", type=float, nargs="+", default=list(SWEEP_RESOLUTIONS))
+    parser.add_argument("--thresholds", type=float, nargs="+", default=list(SWEEP_THRESHOLDS))
+    parser.add_argument("--smooth", type=_parse_bool, nargs="+", default=list(SWEEP_SMOOTH),
+                        help="ör. --smooth false true")
+    parser.add_argument("--returns", nargs="+", default=list(SWEEP_RETURNS),
+                        help='ör. --returns "last, only" "last, first, intermediate, only"')
+    parser.add_argument("--engine", choices=CSF_ENGINES, default=SWEEP_ENGINE)
+    parser.add_argument("--tiles", type=int, default=None,
+                        help="Taramayı ilk N karoyla sınırla (kazanan yine tüm karolara uygulanır).")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="Paralel süreç sayısı (1 = sıralı çalıştır).")
+    parser.add_argument("--choose", type=int, default=None,
+                        help="Otomatik kazanan yerine bu sıradaki kombinasyonu uygula.")
+    parser.add_argument("--no_apply", action="store_true",
+                        help="Yalnızca istatistikleri yaz, ground.las / non_ground.las üretme.")
+    args = parser.parse_args()
+    if args.engine == "pdal" and importlib.util.find_spec("pdal") is None:
+        parser.error("--engine pdal için python-pdal kurulu olmalı (PDAL'sız tarama: --engine native).")
+
+    tile_folders = [d for d in tile_directories(args.tiles_dir)
+                    if os.path.exists(os.path.join(d, "raw.las"))]
+    combinations = parameter_grid(args.resolutions, args.thresholds, args.smooth, args.returns)
+    if args.choose is not None and not 0 <= args.choose < len(combinations):
+        parser.error(f"--choose 0 ile {len(combinations) - 1} arasında olmalı.")
+
+    if not tile_folders:
+        print(f"Hata: '{args.tiles_dir}' içinde raw.las içeren karo bulunamadı.")
+    else:
+        sweep_folders = tile_folders[:args.tiles] if args.tiles else tile_folders
+        print(f"{len(sweep_folders)} karo üzerinde {len(combinations)} CSF kombinasyonu denenecek ({args.engine}).")
+        report = run_sweep(sweep_folders, combinations, engine=args.engine, workers=args.workers)
+        if args.choose is not None and report["tiles"]:
+            report["winner"] = args.choose
+        print_sweep(report)
+        print(f"Rapor: {write_run_report(report)}")
+
+        if report["winner"] is not None and not args.no_apply:
+            params = combinations[report["winner"]]
+            print(f"\nKazanan #{report['winner']} {params} tüm karolara uygulanıyor...")
+            summary = apply_csf_parallel(tile_folders, workers=args.workers, engine=args.engine, params=params)
+            print_summary(summary, label="Zemin ayıklama (CSF, kazanan)")
+            if params != csf_params():
+                print("Not: Kalıcı yapmak için csf_filter.py AYARLAR'ını bu değerlerle güncelleyin; "
+                      "aksi halde --incremental çalıştırmalar karoları varsayılanlarla yeniden işler.")
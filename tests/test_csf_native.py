@@ -0,0 +1,32 @@
+# tests/test_csf_native.py
+
+import os
+import sys
+import numpy as np
+import pytest
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from segmentation.csf_native import csf_ground_mask
+
+
+def roof_scene(width, height=8.0, size=100.0, density=8.0, seed=0):
+    # Düz zemin ortasında width x width, height yüksekliğinde düz çatı
+    rng = np.random.default_rng(seed)
+    n = int(size * size * density)
+    xy = rng.uniform(0.0, size, (n, 2))
+    half = width / 2.0
+    on_roof = np.all(np.abs(xy - size / 2.0) <= half, axis=1)
+    z = np.where(on_roof, height, 0.0) + rng.normal(0.0, 0.02, n)
+    return np.column_stack((xy, z)), ~on_roof
+
+
+@pytest.mark.parametrize("width", [14.0, 20.0, 30.0, 50.0])
+def test_roof_is_not_ground(width):
+    # Yumuşak kumaş geniş çatılara sarkıp çatı noktalarını zemin sayıyordu
+    xyz, is_ground = roof_scene(width)
+    mask = csf_ground_mask(xyz, resolution=0.5, threshold=0.5, smooth=False)
+    assert mask[~is_ground].mean() < 0.01
+    assert mask[is_ground].mean() > 0.99
@@ -0,0 +1,54 @@
+# tests/test_heightmap.py
+
+import os
+import sys
+import json
+import numpy as np
+import pytest
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+laspy = pytest.importorskip("laspy")
+
+from meshing.heightmap import create_heightmap_from_las, is_terrain_resolution
+
+
+def write_tile(tile_dir, size=100.0):
+    # tiling.py düzeni: ground.las + bounds.local'lı metadata.json
+    os.makedirs(tile_dir)
+    rng = np.random.default_rng(0)
+    xy = rng.uniform(0.0, size, (20000, 2))
+    header = laspy.LasHeader(point_format=3, version="1.2")
+    header.scales = [0.001, 0.001, 0.001]
+    header.offsets = [0.0, 0.0, 0.0]
+    las = laspy.LasData(header)
+    las.x, las.y, las.z = xy[:, 0], xy[:, 1], np.sin(xy[:, 0] / 9.0)
+    las.write(os.path.join(tile_dir, "ground.las"))
+    metadata = {"files": {}, "bounds": {"local": {"x_min": 0.0, "y_min": 0.0, "x_max": size, "y_max": size}}}
+    with open(os.path.join(tile_dir, "metadata.json"), "w") as f:
+        json.dump(metadata, f)
+
+
+def test_terrain_resolutions():
+    assert [n for n in range(2, 300) if is_terrain_resolution(n)] == [3, 5, 9, 17, 33, 65, 129, 257]
+
+
+def test_default_raw16_is_unity_terrain_sized(tmp_path):
+    tile_dir = str(tmp_path / "tile_0_0")
+    write_tile(tile_dir)
+    result = create_heightmap_from_las(tile_dir, str(tmp_path))
+    assert result["success"], result["message"]
+    assert result["shape"] == [129, 129]
+    assert os.path.getsize(result["output_path"]) == 129 * 129 * 2
+
+
+def test_raw16_rejects_non_terrain_grid(tmp_path):
+    # 1 m aralık 100 m karoda 101 x 101 verir: Unity Terrain içe aktaramaz
+    tile_dir = str(tmp_path / "tile_0_0")
+    write_tile(tile_dir)
+    result = create_heightmap_from_las(tile_dir, str(tmp_path), cell_size=1.0)
+    assert not result["success"] and "2^n+1" in result["message"]
+    npy = create_heightmap_from_las(tile_dir, str(tmp_path), cell_size=1.0, raster_format="npy")
+    assert npy["success"] and npy["shape"] == [101, 101]
@@ -0,0 +1,97 @@
+# tests/test_mesh_io.py
+
+import os
+import sys
+import json
+import struct
+import numpy as np
+import pytest
+from scipy.spatial import Delaunay
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from meshing.mesh_io import apply_coordinate_convention, compute_vertex_normals, convert_axes, write_glb
+
+
+def area_weighted_normals(vertices, triangles):
+    # Referans: köşe başına döngüyle alan ağırlıklı (Open3D ile aynı) normaller
+    normals = np.zeros_like(vertices)
+    for a, b, c in triangles:
+        n = np.cross(vertices[b] - vertices[a], vertices[c] - vertices[a])
+        normals[a] += n
+        normals[b] += n
+        normals[c] += n
+    return normals / np.linalg.norm(normals, axis=1, keepdims=True)
+
+
+def test_vertex_normals_are_area_weighted():
+    # Gürültülü TIN: dış kabuktaki ince üçgenler birim ağırlıkla köşeleri bozardı
+    rng = np.random.default_rng(0)
+    xy = rng.uniform(0.0, 50.0, (2000, 2))
+    vertices = np.column_stack((xy, np.sin(xy[:, 0] / 6.0) + rng.normal(0.0, 0.05, len(xy))))
+    triangles = Delaunay(xy).simplices
+
+    normals = compute_vertex_normals(vertices, triangles)
+    np.testing.assert_allclose(normals, area_weighted_normals(vertices, triangles), atol=1e-9)
+
+
+def test_vertex_normal_ignores_sliver_weight():
+    # Büyük yatay üçgen + aynı köşede dik, çok küçük bir üçgen: sonuç yukarı bakmalı
+    vertices = np.array([[0, 0, 0], [10, 0, 0], [0, 10, 0], [0, 0, 0.01], [0.01, 0, 0]], dtype=np.float64)
+    triangles = np.array([[0, 1, 2], [0, 4, 3]])
+    normals = compute_vertex_normals(vertices, triangles)
+    assert normals[0] @ np.array([0.0, 0.0, 1.0]) > 0.99
+
+
+def read_glb(path):
+    # Tek mesh'li GLB: düğüm dönüşümü uygulanmış dünya pozisyonları, normaller, üçgenler
+    with open(path, "rb") as f:
+        data = f.read()
+    json_length = struct.unpack_from("<I", data, 12)[0]
+    gltf = json.loads(data[20:20 + json_length])
+    binary = data[20 + json_length + 8:]
+
+    def accessor(index, columns):
+        acc = gltf["accessors"][index]
+        view = gltf["bufferViews"][acc["bufferView"]]
+        dtype = {5120: "i1", 5123: "<u2", 5125: "<u4", 5126: "<f4"}[acc["componentType"]]
+        itemsize = np.dtype(dtype).itemsize
+        stride = view.get("byteStride", itemsize * columns) // itemsize
+        raw = np.frombuffer(binary, dtype, view["byteLength"] // itemsize, view["byteOffset"])
+        values = raw.reshape(-1, stride)[:acc["count"], :columns].astype(np.float64)
+        return values / 127.0 if acc.get("normalized") else values
+
+    node = gltf["nodes"][0]
+    primitive = gltf["meshes"][0]["primitives"][0]
+    scale = np.array(node.get("scale", [1.0, 1.0, 1.0]))
+    positions = accessor(primitive["attributes"]["POSITION"], 3) * scale + node["translation"]
+    normals = accessor(primitive["attributes"]["NORMAL"], 3) / scale
+    normals /= np.linalg.norm(normals, axis=1, keepdims=True)
+    triangles = accessor(primitive["indices"], 1).astype(np.int64).reshape(-1, 3)
+    return positions, normals, triangles
+
+
+@pytest.mark.parametrize("quantize", [False, True])
+def test_unity_glb_is_right_handed_y_up(tmp_path, quantize):
+    # glTF sağ el +Y yukarı ister: düz zemin +Y'ye bakmalı, üçgenler yukarıdan CCW görünmeli
+    rng = np.random.default_rng(0)
+    xy = rng.uniform(0.0, 100.0, (500, 2)) + (200.0, 300.0)
+    vertices = np.column_stack((xy, rng.normal(0.0, 0.01, len(xy))))
+    triangles = Delaunay(xy).simplices
+    normals = compute_vertex_normals(vertices, triangles)
+
+    path = str(tmp_path / "tile.glb")
+    origin = convert_axes([(200.0, 300.0, 0.0)], "y_up_unity", "glb")[0]
+    write_glb(path, *apply_coordinate_convention(vertices, triangles, normals, "y_up_unity", "glb"),
+              quantize=quantize, origin=origin)
+    positions, glb_normals, glb_triangles = read_glb(path)
+
+    # Konum: (x, y, z) -> (x, z, -y); aynalanmış karo yerinde durmaz
+    np.testing.assert_allclose(positions, np.column_stack((vertices[:, 0], vertices[:, 2], -vertices[:, 1])),
+                               atol=0.01)
+    assert glb_normals[:, 1].min() > 0.99
+    p = positions[glb_triangles]
+    face_normals = np.cross(p[:, 1] - p[:, 0], p[:, 2] - p[:, 0])
+    assert np.all(face_normals[:, 1] > 0)
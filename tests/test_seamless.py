@@ -0,0 +1,79 @@
+# tests/test_seamless.py
+
+import os
+import sys
+import json
+import numpy as np
+import pytest
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+laspy = pytest.importorskip("laspy")
+pytest.importorskip("open3d", exc_type=ImportError)   # meshing.seamless -> preprocessing.tiling
+
+from common.point_cache import load_xyz
+from meshing.seamless import triangulate_seamless
+from preprocessing.tiling import TILE_SIZE, OVERLAP
+
+
+def write_tiles(root, points, n_tiles=2):
+    # tiling.py düzeni: tile_i_j, adım TILE_SIZE - OVERLAP, yerel sınırlar metadata.json'da
+    step = TILE_SIZE - OVERLAP
+    for i in range(n_tiles):
+        for j in range(n_tiles):
+            tile_dir = os.path.join(root, f"tile_{i}_{j}")
+            os.makedirs(tile_dir)
+            x0, y0 = i * step, j * step
+            inside = ((points[:, 0] >= x0) & (points[:, 0] < x0 + TILE_SIZE) &
+                      (points[:, 1] >= y0) & (points[:, 1] < y0 + TILE_SIZE))
+            header = laspy.LasHeader(point_format=3, version="1.2")
+            header.scales = [0.001, 0.001, 0.001]
+            header.offsets = [0.0, 0.0, 0.0]
+            las = laspy.LasData(header)
+            las.x, las.y, las.z = points[inside].T
+            las.write(os.path.join(tile_dir, "ground.las"))
+            metadata = {
+                "grid_index": {"i": i, "j": j},
+                "bounds": {"local": {"x_min": x0, "y_min": y0,
+                                     "x_max": x0 + TILE_SIZE, "y_max": y0 + TILE_SIZE}}
+            }
+            with open(os.path.join(tile_dir, "metadata.json"), "w") as f:
+                json.dump(metadata, f)
+
+
+def merged_edge_defects(root, n_tiles=2, border=1.0):
+    # Karoların üçgenlerini koordinatla birleştir: (açık iç kenar, >2 üçgenli kenar).
+    # Verinin dış sınırına border'dan yakın kenarlar sayılmaz (bkz. seamless.py)
+    faces = []
+    for i in range(n_tiles):
+        for j in range(n_tiles):
+            tile_dir = os.path.join(root, f"tile_{i}_{j}")
+            with open(os.path.join(tile_dir, "metadata.json")) as f:
+                metadata = json.load(f)
+            vertices, triangles = triangulate_seamless(tile_dir, metadata, load_xyz(os.path.join(tile_dir, "ground.las")))
+            faces.append(np.round(vertices[triangles][:, :, :2], 3))
+    faces = np.concatenate(faces)
+
+    xy, ids = np.unique(faces.reshape(-1, 2), axis=0, return_inverse=True)
+    ids = ids.reshape(-1, 3)
+    edges = np.sort(np.concatenate([ids[:, [0, 1]], ids[:, [1, 2]], ids[:, [2, 0]]]), axis=1)
+    edges, counts = np.unique(edges, axis=0, return_counts=True)
+    lo, hi = xy.min(axis=0) + border, xy.max(axis=0) - border
+    interior = np.all((xy[edges] > lo) & (xy[edges] < hi), axis=(1, 2))
+    open_interior = int(((counts == 1) & interior).sum())
+    return open_interior, int((counts > 2).sum())
+
+
+@pytest.mark.parametrize("hole", [0.0, 30.0, 80.0])
+def test_seam_has_no_cracks_across_ground_gap(tmp_path, hole):
+    # Dikişi (x = 95) kesen, SEAM_MARGIN'den geniş kare zemin boşluğu
+    rng = np.random.default_rng(0)
+    size = 2 * (TILE_SIZE - OVERLAP) + OVERLAP
+    xy = rng.uniform(0.0, size, (int(size * size * 0.5), 2))
+    xy = xy[~np.all(np.abs(xy - (93.0, 50.0)) < hole / 2.0, axis=1)]
+    points = np.column_stack((xy, np.sin(xy[:, 0] / 7.0) + np.cos(xy[:, 1] / 5.0)))
+    write_tiles(str(tmp_path), points)
+
+    assert merged_edge_defects(str(tmp_path)) == (0, 0)
@@ -7,43 +7,50 @@ os.environ.setdefault("MKL_NUM_THREADS", "1")
 
 import open3d as o3d
 import numpy as np
-import glob
 import os
+import sys
+import time
 import argparse
-from tqdm import tqdm
 import matplotlib
 import matplotlib.pyplot as plt
+from scipy.spatial import cKDTree
+
+# src/ klasörünü import yoluna ekle (ortak modüller için)
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "src")
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from common.spatial_index import tile_files, add_region_arguments, region_from_args
+from common.point_cache import with_cache
+from common.tile_loader import load_tiles, LOADER_THREADS
+from preprocessing.octree import OctreeReader, OCTREE_DIR, POINT_BUDGET, GROUND_CLASS
 
 # ------------------------------------------------------------
 # 1) Tile'ları yükleme ve birleştirme (seninle aynı mantık)
 # ------------------------------------------------------------
-def load_points_from_tiles(tiles_base_dir, file_to_load, max_points_per_tile=None):
+def load_points_from_tiles(tiles_base_dir, file_to_load, max_points_per_tile=None,
+                           region=None, index=None, workers=LOADER_THREADS):
+    """
+    region (common.spatial_index.Region) verilirse yalnızca bölgeye değen
+    karolar okunur ve noktalar bölgeye tam olarak kırpılır.
+    Dosyalar workers thread ile eşzamanlı okunur (common/tile_loader.py).
+    """
     search_pattern = os.path.join(tiles_base_dir, "*", file_to_load)
-    pcd_files = glob.glob(search_pattern)
+    # Sütunlu önbellek (ground.columns ...) varsa PCD yerine o okunur
+    pcd_files = tile_files(tiles_base_dir, with_cache(file_to_load), region, index)
 
     if not pcd_files:
-        print(f"Uyarı: '{search_pattern}' ile eşleşen dosya bulunamadı.")
+        suffix = f" ({region} içinde)" if region is not None else ""
+        print(f"Uyarı: '{search_pattern}' ile eşleşen dosya bulunamadı{suffix}.")
         return None
 
     print(f"Toplam {len(pcd_files)} adet '{file_to_load}' dosyası bulundu.")
-    all_points = []
-    for pcd_path in tqdm(pcd_files, desc=f"{file_to_load} dosyaları yükleniyor"):
-        try:
-            pcd = o3d.io.read_point_cloud(pcd_path)
-            if pcd.has_points():
-                pts = np.asarray(pcd.points)
-                if max_points_per_tile is not None and len(pts) > max_points_per_tile:
-                    idx = np.random.choice(len(pts), max_points_per_tile, replace=False)
-                    pts = pts[idx]
-                all_points.append(pts)
-        except Exception as e:
-            print(f"Uyarı: {pcd_path} okunurken hata oluştu: {e}")
-
-    if not all_points:
+    combined = load_tiles(pcd_files, region, max_points_per_tile, workers,
+                          desc=f"{file_to_load} dosyaları yükleniyor")
+    if combined is None:
         print(f"'{file_to_load}' için birleştirilecek hiç nokta bulunamadı.")
         return None
 
-    combined = np.vstack(all_points)
     print(f"'{file_to_load}' için toplam {len(combined)} nokta birleştirildi.")
     return combined
 
@@ -68,10 +75,31 @@ def sanitize_points(points, voxel_size=None):
 # ------------------------------------------------------------
 # 3) Yoğunluk + Z tabanlı renkler (Matplotlib uyarısız)
 # ------------------------------------------------------------
-def compute_density_colors(points, base_colormap='magma', radius=1.0, sample_target=20000):
-    z_vals = points[:, 2]
-    z_norm = (z_vals - z_vals.min()) / (np.ptp(z_vals) + 1e-9)
+# Yoğunluk hesabı:
+#   "voxel":  kenarı 2 * radius olan voxel ızgarasında hücre başına nokta sayısı
+#             (tek bincount, en hızlı; her noktaya kendi hücresinin sayısı)
+#   "kdtree": her nokta için radius içindeki komşu sayısı (kesin; cKDTree, tüm çekirdekler)
+#   "open3d": eski yöntem, ~sample_target örnek nokta üzerinde döngü (karşılaştırma için)
+DENSITY_BACKENDS = ("voxel", "kdtree", "open3d")
+
+
+def voxel_densities(points, radius=1.0):
+    cells = np.floor((points - points.min(axis=0)) / (2.0 * radius)).astype(np.int64)
+    dims = cells.max(axis=0) + 1
+    if np.prod(dims.astype(np.float64)) < 2 ** 62:
+        ids = np.ravel_multi_index(cells.T, dims)
+        _, inverse, counts = np.unique(ids, return_inverse=True, return_counts=True)
+    else:
+        _, inverse, counts = np.unique(cells, axis=0, return_inverse=True, return_counts=True)
+    return counts[inverse.reshape(-1)].astype(np.float64)
 
+
+def kdtree_densities(points, radius=1.0):
+    tree = cKDTree(points)
+    return tree.query_ball_point(points, r=radius, return_length=True, workers=-1).astype(np.float64)
+
+
+def open3d_densities(points, radius=1.0, sample_target=20000):
     pcd = o3d.geometry.PointCloud(o3d.utility.Vector3dVector(points))
     tree = o3d.geometry.KDTreeFlann(pcd)
 
@@ -81,6 +109,25 @@ def compute_density_colors(points, base_colormap='magma', radius=1.0, sample_tar
     for i in range(0, len(points), step):
         [_, idx, _] = tree.search_radius_vector_3d(points[i], radius)
         densities[idx] += 1
+    return densities
+
+
+def point_densities(points, radius=1.0, backend="voxel", sample_target=20000):
+    if backend == "voxel":
+        return voxel_densities(points, radius)
+    if backend == "kdtree":
+        return kdtree_densities(points, radius)
+    if backend == "open3d":
+        return open3d_densities(points, radius, sample_target)
+    raise ValueError(f"Desteklenmeyen yoğunluk yöntemi: {backend}")
+
+
+def compute_density_colors(points, base_colormap='magma', radius=1.0, sample_target=20000,
+                           backend="voxel"):
+    z_vals = points[:, 2]
+    z_norm = (z_vals - z_vals.min()) / (np.ptp(z_vals) + 1e-9)
+
+    densities = point_densities(points, radius, backend, sample_target)
 
     if densities.max() > 0:
         densities = densities / densities.max()
@@ -147,20 +194,113 @@ def estimate_normals_safe(pcd: o3d.geometry.PointCloud,
         return False
 
 # ------------------------------------------------------------
-# 5) Ana Program (Visualizer eski API ile)
+# 5) Octree modu: düğümler kameraya göre kademeli yüklenir;
+#    bellekteki nokta sayısı veri boyutundan bağımsız, en fazla point_budget
+#    (octree: python src/preprocessing/octree.py)
+# ------------------------------------------------------------
+def octree_node_colors(points, classification, z_range, base_colormap='magma'):
+    colors = np.empty((len(points), 3))
+    ground = classification == GROUND_CLASS
+    colors[ground] = [0.0, 0.4, 0.05]  # koyu yeşil
+    if np.any(~ground):
+        z_norm = (points[~ground, 2] - z_range[0]) / (z_range[1] - z_range[0] + 1e-9)
+        cmap = matplotlib.colormaps.get_cmap(base_colormap)
+        colors[~ground] = cmap(np.clip(z_norm, 0.0, 1.0))[:, :3]
+    return colors
+
+
+def camera_position(extrinsic):
+    # Dünya -> kamera dönüşümünden kameranın dünya konumu: -R^T t
+    rotation, translation = extrinsic[:3, :3], extrinsic[:3, 3]
+    return -rotation.T @ translation
+
+
+def run_octree_viewer(octree_dir, point_budget=POINT_BUDGET, update_interval=0.3):
+    reader = OctreeReader(octree_dir)
+    z_range = reader.hierarchy["z_range"]
+    print(f"Octree: {reader.hierarchy['point_count']} nokta, {len(reader.nodes)} düğüm; "
+          f"nokta bütçesi {point_budget}")
+
+    pcd = o3d.geometry.PointCloud()
+    loaded = {}  # düğüm -> (noktalar, renkler); yalnızca seçili düğümler tutulur
+
+    def show(selected):
+        for name in list(loaded):
+            if name not in selected:
+                del loaded[name]
+        for name in selected:
+            if name not in loaded:
+                points, classification = reader.read_node(name)
+                loaded[name] = (points, octree_node_colors(points, classification, z_range))
+        pcd.points = o3d.utility.Vector3dVector(np.vstack([loaded[n][0] for n in selected]))
+        pcd.colors = o3d.utility.Vector3dVector(np.vstack([loaded[n][1] for n in selected]))
+
+    current = ["r"]
+    show(current)
+
+    vis = o3d.visualization.Visualizer()
+    vis.create_window(window_name="Octree Point Cloud (progressive)", width=1440, height=900)
+    vis.add_geometry(pcd)
+
+    opt = vis.get_render_option()
+    opt.background_color = np.asarray([1.0, 1.0, 1.0])
+    opt.point_size = 2.0
+
+    ctr = vis.get_view_control()
+    ctr.set_front([0.5, -0.4, -0.8])
+    ctr.set_up([0, 0, 1])
+
+    last_update = 0.0
+    while vis.poll_events():
+        now = time.perf_counter()
+        if now - last_update >= update_interval:
+            last_update = now
+            params = ctr.convert_to_pinhole_camera_parameters()
+            selected = reader.select_nodes(camera_position(params.extrinsic), point_budget,
+                                           focal_px=params.intrinsic.intrinsic_matrix[1, 1])
+            if selected and selected != current:
+                show(selected)
+                vis.update_geometry(pcd)
+                current = selected
+        vis.update_renderer()
+    vis.destroy_window()
+
+# ------------------------------------------------------------
+# 6) Ana Program (Visualizer eski API ile)
 # ------------------------------------------------------------
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Conda uyumlu: derinlik + yoğunluk renkleri, güvenli normal hesaplama, klasik Visualizer")
     parser.add_argument("--tiles_dir", default=os.path.join("data", "processed", "tiles"))
     parser.add_argument("--max_points", type=int, default=None)
+    parser.add_argument("--threads", type=int, default=LOADER_THREADS,
+                        help="Karo dosyalarını eşzamanlı okuyan thread sayısı.")
     parser.add_argument("--density_radius", type=float, default=1.0, help="Yoğunluk hesabı yarıçapı")
+    parser.add_argument("--density_backend", choices=DENSITY_BACKENDS, default="voxel",
+                        help="voxel: en hızlı, kdtree: kesin komşu sayısı, open3d: eski örneklemeli döngü")
     parser.add_argument("--voxel", type=float, default=0.0, help="Opsiyonel voxel downsample (0=kapalı)")
+    add_region_arguments(parser)
+    parser.add_argument("--octree", nargs="?", const=OCTREE_DIR, default=None, metavar="DIR",
+                        help="Karolar yerine octree'yi kameraya göre kademeli yükleyerek göster.")
+    parser.add_argument("--point_budget", type=int, default=POINT_BUDGET,
+                        help="Octree modunda bellekte tutulacak en fazla nokta.")
     args = parser.parse_args()
 
+    if args.octree:
+        run_octree_viewer(args.octree, args.point_budget)
+        raise SystemExit
+
+    try:
+        region, index = region_from_args(args, args.tiles_dir)
+    except ValueError as e:
+        parser.error(str(e))
+    if region is not None:
+        print(f"Bölge: {region} -> {len(index.query(region))}/{len(index)} karo")
+
     print("Ground noktaları yükleniyor...")
-    ground = load_points_from_tiles(args.tiles_dir, "ground.pcd", args.max_points)
+    ground = load_points_from_tiles(args.tiles_dir, "ground.pcd", args.max_points, region, index, args.threads)
     print("\nNon-ground noktaları yükleniyor...")
-    non_ground = load_points_from_tiles(args.tiles_dir, "non_ground.pcd", args.max_points)
+    non_ground = load_points_from_tiles(args.tiles_dir, "non_ground.pcd", args.max_points, region, index,
+                                        args.threads)
 
     if ground is None and non_ground is None:
         print("Görselleştirilecek veri yok.")
@@ -195,7 +335,8 @@ if __name__ == "__main__":
             combined[~mask_ground],
             base_colormap='magma',
             radius=args.density_radius,
-            sample_target=20000
+            sample_target=20000,
+            backend=args.density_backend
         )
 
     # --- PointCloud ---
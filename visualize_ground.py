@@ -1,14 +1,22 @@
 # visualize_ground_only.py
 
 import open3d as o3d
-import numpy as np
-import glob
 import os
+import sys
 import argparse
-from tqdm import tqdm
+
+# src/ klasörünü import yoluna ekle (ortak modüller için)
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "src")
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from common.spatial_index import tile_files, add_region_arguments, region_from_args
+from common.point_cache import with_cache
+from common.tile_loader import load_tiles, LOADER_THREADS
 # import matplotlib.pyplot as plt # Artık matplotlib'e gerek yok
 
-def visualize_combined_ground_pcd(tiles_base_dir, max_points_per_tile=None):
+def visualize_combined_ground_pcd(tiles_base_dir, max_points_per_tile=None, region=None, index=None,
+                                  workers=LOADER_THREADS):
     """
     Belirtilen klasördeki tüm tile'lardan ground.pcd dosyasını okur,
     birleştirir ve tek renk (yeşil) olarak görselleştirir.
@@ -16,10 +24,15 @@ def visualize_combined_ground_pcd(tiles_base_dir, max_points_per_tile=None):
     Args:
         tiles_base_dir (str): Tüm tile klasörlerini içeren ana dizin.
         max_points_per_tile (int, optional): Her tile'dan yüklenecek maksimum nokta sayısı.
+        region (Region, optional): Verilirse yalnızca bu bölgeye değen tile'lar okunur
+            ve noktalar bölgeye kırpılır.
+        index (TileIndex, optional): Önceden oluşturulmuş karo indeksi.
+        workers (int, optional): Dosyaları eşzamanlı okuyan thread sayısı.
     """
     file_to_load = "ground.pcd"
-    search_pattern = os.path.join(tiles_base_dir, "", file_to_load)
-    pcd_files = glob.glob(search_pattern)
+    search_pattern = os.path.join(tiles_base_dir, "*", file_to_load)
+    # Sütunlu önbellek (ground.columns) varsa PCD yerine o okunur
+    pcd_files = tile_files(tiles_base_dir, with_cache(file_to_load), region, index)
 
     if not pcd_files:
         print(f"Hata: '{search_pattern}' ile eşleşen dosya bulunamadı.")
@@ -29,25 +42,13 @@ def visualize_combined_ground_pcd(tiles_base_dir, max_points_per_tile=None):
     print("Zemin nokta bulutları birleştiriliyor...")
 
     combined_pcd = o3d.geometry.PointCloud()
-    all_points = []
-
-    for pcd_path in tqdm(pcd_files, desc=f"{file_to_load} dosyaları yükleniyor"):
-        try:
-            pcd = o3d.io.read_point_cloud(pcd_path)
-            if pcd.has_points():
-                points = np.asarray(pcd.points)
-                if max_points_per_tile is not None and len(points) > max_points_per_tile:
-                    indices = np.random.choice(len(points), max_points_per_tile, replace=False)
-                    points = points[indices]
-                all_points.append(points)
-        except Exception as e:
-            print(f"Uyarı: {pcd_path} okunurken hata oluştu: {e}")
-
-    if not all_points:
+    # Önceden ayrılmış tek diziye eşzamanlı okuma (list + vstack kopyası yok)
+    combined_points = load_tiles(pcd_files, region, max_points_per_tile, workers,
+                                 desc=f"{file_to_load} dosyaları yükleniyor")
+    if combined_points is None:
         print("Birleştirilecek hiç zemin noktası bulunamadı.")
         return
 
-    combined_points = np.vstack(all_points)
     print(f"Toplam {len(combined_points)} zemin noktası birleştirildi.")
 
     combined_pcd.points = o3d.utility.Vector3dVector(combined_points)
@@ -67,7 +68,15 @@ if __name__ == "__main__":
                         help="Tile klasörlerinin bulunduğu ana dizin.")
     parser.add_argument("--max_points", type=int, default=None,
                         help="Performans için her tile'dan yüklenecek maksimum nokta sayısı (opsiyonel).")
+    parser.add_argument("--threads", type=int, default=LOADER_THREADS,
+                        help="Tile dosyalarını eşzamanlı okuyan thread sayısı.")
+    add_region_arguments(parser)
 
     args = parser.parse_args()
 
-    visualize_combined_ground_pcd(args.tiles_dir, args.max_points)
+    try:
+        region, index = region_from_args(args, args.tiles_dir)
+    except ValueError as e:
+        parser.error(str(e))
+
+    visualize_combined_ground_pcd(args.tiles_dir, args.max_points, region, index, args.threads)